@@ -0,0 +1,568 @@
+"""
+Barcodes printed next to the label text.
+
+A placeholder with a barcode kind, e.g. "{SampleID|qr}", prints the field as a code instead of
+as text: "code128" (1D), "qr" or "datamatrix" (2D). Code 128 is encoded here; QR codes need the
+optional `segno` package and DataMatrix codes the optional `ppf-datamatrix` package.
+
+Codes are rendered to 1-bit PNG images at print resolution and cached by content: an image is
+named by the SHA-256 of its PNG bytes, stored once in the document as
+"word/media/barcode_<digest>.png", and every cell that shows it refers to the same relationship,
+whose id is derived from the digest as well. Pages rendered in worker processes therefore refer
+to the right image without any coordination; the document only has to collect the images its
+pages use (see `BarcodeMedia`).
+
+2D codes float at the left edge of the cell with the label text wrapping beside them; Code 128
+codes are placed inline, where the placeholder is.
+"""
+
+import copy
+import hashlib
+import math
+import re
+import struct
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml.shape import CT_Inline
+from docx.parts.image import ImagePart
+
+BARCODE_KINDS = ("code128", "qr", "datamatrix")
+BARCODE_2D_KINDS = ("qr", "datamatrix")
+
+# Images are rendered at this resolution, with a whole number of pixels per module
+BARCODE_DPI = 300
+EMU_PER_INCH = 914400
+
+# Share of the label a code may take
+BARCODE_2D_HEIGHT = 0.85
+BARCODE_2D_MAX_WIDTH = 0.5
+BARCODE_1D_WIDTH = 0.9
+BARCODE_1D_HEIGHT = 0.3
+
+# Light margin around the code, in modules
+QUIET_ZONES = {
+    "code128": 10,
+    "qr": 4,
+    "datamatrix": 1,
+}
+
+# Space between a floating 2D code and the text beside it
+TEXT_GAP = 45720
+
+BARCODE_VALUE_ERROR = "Cannot print {value!r} as a {kind} barcode: {reason}"
+
+RELATIONSHIP_ID_PREFIX = "rIdBarcode"
+MEDIA_PARTNAME = "/word/media/barcode_{}.png"
+
+# Bar and space widths of the Code 128 symbols 0-105, and the stop pattern
+CODE128_PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312", "132212",
+    "221213", "221312", "231212", "112232", "122132", "122231", "113222", "123122", "123221",
+    "223211", "221132", "221231", "213212", "223112", "312131", "311222", "321122", "321221",
+    "312212", "322112", "322211", "212123", "212321", "232121", "111323", "131123", "131321",
+    "112313", "132113", "132311", "211313", "231113", "231311", "112133", "112331", "132131",
+    "113123", "113321", "133121", "313121", "211331", "231131", "213113", "213311", "213131",
+    "311123", "311321", "331121", "312113", "312311", "332111", "314111", "221411", "431111",
+    "111224", "111422", "121124", "121421", "141122", "141221", "112214", "112412", "122114",
+    "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111", "111242",
+    "121142", "121241", "114212", "124112", "124211", "411212", "421112", "421211", "212141",
+    "214121", "412121", "111143", "111341", "131141", "114113", "114311", "411113", "411311",
+    "113141", "114131", "311141", "411131", "211412", "211214", "211232",
+)
+CODE128_STOP = "2331112"
+CODE128_START_B = 104
+CODE128_START_C = 105
+CODE128_CODE_B = 100
+CODE128_CODE_C = 99
+
+
+def split_barcode_placeholder(name):
+    """
+    Splits a placeholder name into its field and barcode kind.
+
+    Args:
+        name (str): Text between the braces, e.g. "SampleID|qr".
+
+    Returns:
+        tuple: (field name, barcode kind or None for a text placeholder).
+    """
+    field, separator, kind = name.rpartition("|")
+    if separator and kind.strip().lower() in BARCODE_KINDS:
+        return field, kind.strip().lower()
+    return name, None
+
+
+def has_barcodes(textboxformatinput):
+    """Returns whether a label format string has a barcode placeholder."""
+    if not textboxformatinput:
+        return False
+    return any(
+        split_barcode_placeholder(name)[1]
+        for name in re.findall(r"{([^}]+)}", textboxformatinput)
+    )
+
+
+def _code128_digit_run(value, start):
+    end = start
+    while end < len(value) and value[end].isdigit():
+        end += 1
+    return end - start
+
+
+def encode_code128_values(value):
+    """
+    Encodes text as Code 128 symbol values, from the start symbol to the check symbol.
+
+    Code set B is used for text and code set C for runs of digits long enough to make it
+    shorter.
+
+    Args:
+        value (str): Printable ASCII text.
+
+    Returns:
+        list: Symbol values.
+
+    Raises:
+        ValueError: If the text is empty or has characters Code 128 set B cannot hold.
+    """
+    if not value:
+        raise ValueError("Code 128 needs at least one character")
+    for char in value:
+        if not 32 <= ord(char) <= 126:
+            raise ValueError(f"Code 128 cannot encode {char!r}")
+
+    values = []
+    code_set = None
+    i = 0
+    while i < len(value):
+        digits = _code128_digit_run(value, i)
+        # Set C packs two digits per symbol; it pays off for 4 digits at the ends, 6 elsewhere
+        at_edge = i == 0 or i + digits == len(value)
+        if digits >= (4 if at_edge else 6):
+            if digits % 2:
+                if code_set is None:
+                    values.append(CODE128_START_B)
+                    code_set = "B"
+                if code_set == "B":
+                    values.append(ord(value[i]) - 32)
+                    i += 1
+                    digits -= 1
+            if code_set is None:
+                values.append(CODE128_START_C)
+            elif code_set == "B":
+                values.append(CODE128_CODE_C)
+            code_set = "C"
+            for j in range(i, i + digits, 2):
+                values.append(int(value[j:j + 2]))
+            i += digits
+            continue
+
+        if code_set is None:
+            values.append(CODE128_START_B)
+        elif code_set == "C":
+            values.append(CODE128_CODE_B)
+        code_set = "B"
+        values.append(ord(value[i]) - 32)
+        i += 1
+
+    checksum = values[0] + sum(position * v for position, v in enumerate(values[1:], start=1))
+    values.append(checksum % 103)
+    return values
+
+
+def encode_code128(value):
+    """
+    Returns the modules of a Code 128 symbol, without quiet zone.
+
+    Args:
+        value (str): Printable ASCII text.
+
+    Returns:
+        list: One row of modules (True for a bar).
+    """
+    widths = "".join(CODE128_PATTERNS[v] for v in encode_code128_values(value)) + CODE128_STOP
+    modules = []
+    for position, width in enumerate(widths):
+        modules.extend([position % 2 == 0] * int(width))
+    return [modules]
+
+
+def encode_qr(value):
+    """Returns the modules of a QR code (error correction level M), without quiet zone."""
+    try:
+        import segno
+    except ImportError as e:
+        raise ImportError("QR codes need the 'segno' package (pip install segno)") from e
+    return [[bool(module) for module in row] for row in segno.make_qr(value, error="m").matrix]
+
+
+def encode_datamatrix(value):
+    """Returns the modules of an ECC 200 DataMatrix code, without quiet zone."""
+    try:
+        from ppf.datamatrix import DataMatrix
+    except ImportError as e:
+        raise ImportError(
+            "DataMatrix codes need the 'ppf-datamatrix' package (pip install ppf-datamatrix)"
+        ) from e
+    return [[bool(module) for module in row] for row in DataMatrix(value).matrix]
+
+
+ENCODERS = {
+    "code128": encode_code128,
+    "qr": encode_qr,
+    "datamatrix": encode_datamatrix,
+}
+
+
+def get_barcode_modules(kind, value):
+    """
+    Encodes a value and adds the quiet zone of its kind.
+
+    Args:
+        kind (str): One of `BARCODE_KINDS`.
+        value (str): Text to encode.
+
+    Returns:
+        list: Rows of modules (True for dark). A Code 128 symbol has a single row.
+
+    Raises:
+        ValueError: If the value cannot be encoded as this kind, naming the value and kind.
+    """
+    try:
+        rows = ENCODERS[kind](value)
+    except ValueError as e:
+        raise ValueError(BARCODE_VALUE_ERROR.format(value=value, kind=kind, reason=e)) from e
+    quiet = QUIET_ZONES[kind]
+    width = len(rows[0]) + 2 * quiet
+    padded = [[False] * quiet + row + [False] * quiet for row in rows]
+    if kind in BARCODE_2D_KINDS:
+        blank = [False] * width
+        padded = [blank] * quiet + padded + [blank] * quiet
+    return padded
+
+
+def make_png(rows, module_size, height=None):
+    """
+    Draws modules as a black-and-white PNG image.
+
+    Args:
+        rows (list): Rows of modules (True for dark).
+        module_size (int): Pixels per module.
+        height (int, optional): Image height in pixels for a single-row (1D) code.
+
+    Returns:
+        bytes: The PNG file.
+    """
+    width = len(rows[0]) * module_size
+    if height is None:
+        pixel_rows = [row for row in rows for _ in range(module_size)]
+    else:
+        pixel_rows = rows * height
+
+    raw = bytearray()
+    packed_rows = {}
+    for row in pixel_rows:
+        key = id(row)
+        if key not in packed_rows:
+            # 1-bit grayscale: 0 is black, 1 is white
+            bits = "".join("0" if dark else "1" for dark in row for _ in range(module_size))
+            bits += "1" * (-len(bits) % 8)
+            packed_rows[key] = bytes([0]) + int(bits, 2).to_bytes(len(bits) // 8, "big")
+        raw += packed_rows[key]
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, len(pixel_rows), 1, 0, 0, 0, 0)
+    dpm = round(BARCODE_DPI / 0.0254)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"pHYs", struct.pack(">IIB", dpm, dpm, 1))
+        + chunk(b"IDAT", zlib.compress(bytes(raw), 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+@dataclass(frozen=True)
+class BarcodeImage:
+    """
+    A rendered code.
+
+    Args:
+        kind (str): One of `BARCODE_KINDS`.
+        value (str): Encoded text.
+        digest (str): Content hash of the PNG, naming its media part.
+        width (int): Display width in EMU.
+        height (int): Display height in EMU.
+    """
+
+    kind: str
+    value: str
+    digest: str
+    width: int
+    height: int
+
+    @property
+    def relationship_id(self):
+        return get_relationship_id(self.digest)
+
+
+def get_relationship_id(digest):
+    return RELATIONSHIP_ID_PREFIX + digest
+
+
+def get_image_digest(relationship_id):
+    """Returns the image digest of a barcode relationship id, or None for other ids."""
+    if relationship_id and relationship_id.startswith(RELATIONSHIP_ID_PREFIX):
+        return relationship_id[len(RELATIONSHIP_ID_PREFIX):]
+    return None
+
+
+def render_barcode(kind, value, label_width, label_height):
+    """
+    Renders a code sized for a label.
+
+    2D codes take up to `BARCODE_2D_HEIGHT` of the label height and `BARCODE_2D_MAX_WIDTH` of
+    its width; Code 128 codes take `BARCODE_1D_WIDTH` of the width and `BARCODE_1D_HEIGHT` of
+    the height. Modules are a whole number of pixels at `BARCODE_DPI`, so the code prints sharp.
+
+    Args:
+        kind (str): One of `BARCODE_KINDS`.
+        value (str): Text to encode.
+        label_width (float): Label width in inches.
+        label_height (float): Label height in inches.
+
+    Returns:
+        tuple: (BarcodeImage, PNG bytes).
+    """
+    rows = get_barcode_modules(kind, value)
+    columns = len(rows[0])
+    if kind in BARCODE_2D_KINDS:
+        side = min(label_height * BARCODE_2D_HEIGHT, label_width * BARCODE_2D_MAX_WIDTH)
+        module_size = max(1, math.floor(side * BARCODE_DPI / max(columns, len(rows))))
+        height = None
+        pixel_height = len(rows) * module_size
+    else:
+        module_size = max(1, math.floor(label_width * BARCODE_1D_WIDTH * BARCODE_DPI / columns))
+        height = pixel_height = max(1, round(label_height * BARCODE_1D_HEIGHT * BARCODE_DPI))
+
+    png = make_png(rows, module_size, height)
+    emu_per_pixel = EMU_PER_INCH // BARCODE_DPI
+    image = BarcodeImage(
+        kind=kind,
+        value=value,
+        digest=hashlib.sha256(png).hexdigest()[:16],
+        width=columns * module_size * emu_per_pixel,
+        height=pixel_height * emu_per_pixel,
+    )
+    return image, png
+
+
+class BarcodeCache:
+    """
+    Rendered codes of this process, with their PNG bytes.
+
+    Each code is one entry holding both the image and its PNG, so they are always dropped
+    together. Entries are only dropped by `trim`, which the consumers call once they have taken
+    the PNGs of a page (see `BarcodeMedia.collect`), so a page may use more codes than `maxsize`.
+
+    Args:
+        maxsize (int): Number of codes kept after a trim; the least recently used go first.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        # (kind, value, label width, label height) to (image, PNG bytes)
+        self._entries = OrderedDict()
+        # Digest to the key of the entry last used with it
+        self._keys = {}
+
+    def get(self, kind, value, label_width, label_height):
+        """
+        Returns a rendered code, rendering it on first use (see `render_barcode`).
+
+        Returns:
+            BarcodeImage: The code.
+        """
+        key = (kind, value, label_width, label_height)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = render_barcode(kind, value, label_width, label_height)
+            self._entries[key] = entry
+        else:
+            self._entries.move_to_end(key)
+        image = entry[0]
+        self._keys[image.digest] = key
+        return image
+
+    def png(self, digest):
+        """
+        Returns the PNG bytes of an image.
+
+        Raises:
+            KeyError: If the image is not cached in this process.
+        """
+        return self._entries[self._keys[digest]][1]
+
+    def trim(self):
+        """Drops the least recently used codes beyond `maxsize`."""
+        while len(self._entries) > self.maxsize:
+            _, (image, _) = self._entries.popitem(last=False)
+            key = self._keys.get(image.digest)
+            if key is not None and key not in self._entries:
+                del self._keys[image.digest]
+
+    def clear(self):
+        self._entries.clear()
+        self._keys.clear()
+
+
+barcode_cache = BarcodeCache()
+
+
+def make_picture(image, docpr_id):
+    """Returns the `pic:pic` graphic of an inline image, with the code as its description."""
+    inline = CT_Inline.new_pic_inline(
+        docpr_id, image.relationship_id, f"barcode_{image.digest}.png", image.width, image.height
+    )
+    inline.docPr.set("descr", f"{image.kind}: {image.value}")
+    return inline
+
+
+def make_barcode_run(image, run_properties=None, docpr_id=1):
+    """
+    Builds a run holding a code.
+
+    Code 128 codes are inline. 2D codes float at the left edge of the cell, with the text
+    wrapping to their right.
+
+    Args:
+        image (BarcodeImage): The code.
+        run_properties (CT_RPr, optional): Run formatting to copy onto the run.
+        docpr_id (int): Drawing id; `BarcodeMedia.collect` makes the ids of a document unique.
+
+    Returns:
+        CT_R: The `w:r` element.
+    """
+    run = OxmlElement("w:r")
+    if run_properties is not None:
+        run.append(copy.deepcopy(run_properties))
+    drawing = OxmlElement("w:drawing")
+    inline = make_picture(image, docpr_id)
+    if image.kind in BARCODE_2D_KINDS:
+        drawing.append(make_anchor(inline, image))
+    else:
+        drawing.append(inline)
+    run.append(drawing)
+    return run
+
+
+def make_anchor(inline, image):
+    """Turns an inline picture into one floating at the left of the cell, text wrapping right."""
+    anchor = parse_xml(
+        f'<wp:anchor {nsdecls("wp")} distT="0" distB="0" distL="0" distR="{TEXT_GAP}"'
+        ' simplePos="0" relativeHeight="1" behindDoc="0" locked="0" layoutInCell="1"'
+        ' allowOverlap="0">'
+        '<wp:simplePos x="0" y="0"/>'
+        '<wp:positionH relativeFrom="column"><wp:align>left</wp:align></wp:positionH>'
+        '<wp:positionV relativeFrom="paragraph"><wp:posOffset>0</wp:posOffset></wp:positionV>'
+        f'<wp:extent cx="{image.width}" cy="{image.height}"/>'
+        '<wp:effectExtent l="0" t="0" r="0" b="0"/>'
+        '<wp:wrapSquare wrapText="right"/>'
+        "</wp:anchor>"
+    )
+    for tag in ("wp:docPr", "wp:cNvGraphicFramePr", "a:graphic"):
+        anchor.append(inline.find(qn(tag)))
+    return anchor
+
+
+class BarcodeMedia:
+    """
+    Images used by one output document.
+
+    Pages pass through `collect` on their way into the document. It numbers the drawings of the
+    document uniquely and keeps the PNG bytes of every code the pages refer to, each once.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or barcode_cache
+        self.images = {}
+        self._next_id = 1
+
+    def collect(self, elements):
+        """
+        Registers the codes of one page.
+
+        Args:
+            elements (list): Body elements of the page.
+
+        Returns:
+            list: The same elements, with unique drawing ids.
+        """
+        for element in elements:
+            for docPr in element.iter(qn("wp:docPr")):
+                docPr.set("id", str(self._next_id))
+                docPr.set("name", f"Barcode {self._next_id}")
+                self._next_id += 1
+            for blip in element.iter(qn("a:blip")):
+                digest = get_image_digest(blip.get(qn("r:embed")))
+                if digest is not None and digest not in self.images:
+                    self.images[digest] = self.cache.png(digest)
+        self.cache.trim()
+        return elements
+
+    def add_images(self, images):
+        """
+        Registers images rendered elsewhere, e.g. in a worker process.
+
+        Args:
+            images (dict): Digest to PNG bytes.
+        """
+        self.images.update(images)
+
+    def collect_pages(self, page_elements):
+        """Passes pages through `collect` as they are produced."""
+        for elements in page_elements:
+            yield self.collect(elements)
+
+    def parts(self):
+        """
+        Returns the media parts of the document.
+
+        Returns:
+            list: (relationship id, part name, PNG bytes), sorted by part name.
+        """
+        return sorted(
+            (get_relationship_id(digest), MEDIA_PARTNAME.format(digest), png)
+            for digest, png in self.images.items()
+        )
+
+    def add_to_document(self, document):
+        """
+        Adds the collected images to a python-docx document.
+
+        Args:
+            document (docx.document.Document): The output document.
+        """
+        rels = document.part.rels
+        for relationship_id, partname, png in self.parts():
+            part = ImagePart(PackURI(partname), "image/png", png)
+            rels.add_relationship(RT.IMAGE, part, relationship_id)
+
+
+def get_image_digests(elements):
+    """Returns the digests of the codes a page's body elements refer to."""
+    digests = set()
+    for element in elements:
+        for blip in element.iter(qn("a:blip")):
+            digest = get_image_digest(blip.get(qn("r:embed")))
+            if digest is not None:
+                digests.add(digest)
+    return digests
@@ -2,6 +2,7 @@ import csv
 import re
 from datetime import datetime, date
 import openpyxl as xlsx
+from barcodes import split_barcode_placeholder
 
 def get_data_list_csv(input_file_path, textboxformatinput, date_format=None):
     """
@@ -15,15 +16,58 @@ def get_data_list_csv(input_file_path, textboxformatinput, date_format=None):
     Returns:
         list: Extracted label data.
     """
+    return list(iter_data_rows_csv(input_file_path, textboxformatinput, date_format))
+
+
+def iter_data_rows_csv(input_file_path, textboxformatinput, date_format=None):
+    """
+    Reads label data from a CSV file one row at a time (see `get_data_list_csv`).
+
+    Args:
+        input_file_path (str): Path to the CSV file.
+        textboxformatinput (str): Format string describing column layout using header names.
+        date_format (str or None): User-selected date format, or "Leave as is".
+
+    Yields:
+        list: Label data of one row.
+    """
+    for data, _ in iter_data_runs_csv(input_file_path, textboxformatinput, date_format):
+        yield data
+
+
+def iter_data_runs_csv(
+    input_file_path, textboxformatinput, date_format=None, copies=1, copies_column=None
+):
+    """
+    Reads label data from a CSV file one row at a time, with the number of copies of each row.
+
+    The file is opened when the first row is requested and closed after the last one, so label
+    pages can be rendered while the rest of the file is still being read.
+
+    Args:
+        input_file_path (str): Path to the CSV file.
+        textboxformatinput (str): Format string describing column layout using header names.
+        date_format (str or None): User-selected date format, or "Leave as is".
+        copies (int): Copies of each row, or of rows with a blank copies column.
+        copies_column (str, optional): Header of a column holding the copies of each row.
+
+    Yields:
+        tuple: (label data of one row, copies).
+
+    Raises:
+        ValueError: If the copies column is missing or holds something other than a count.
+    """
     label_data_list_format = get_label_data_list_format(textboxformatinput)
 
-    batchdata = []
     with open(input_file_path, 'r', encoding='utf-8') as file:
-        csv_reader = list(csv.reader(file))
-        columns_in_csv = csv_reader[0]
+        csv_reader = csv.reader(file)
+        columns_in_csv = next(csv_reader, None)
+        if columns_in_csv is None:
+            return
         indices_for_labeldata = [columns_in_csv.index(col) for col in label_data_list_format if col in columns_in_csv]
+        copies_index = get_copies_column_index(columns_in_csv, copies_column)
 
-        for row in csv_reader[1:]:
+        for row in csv_reader:
             data = []
             for index in indices_for_labeldata:
                 if index < len(row):
@@ -41,9 +85,9 @@ def get_data_list_csv(input_file_path, textboxformatinput, date_format=None):
                     data.append(None)
 
             if not all(val is None for val in data):
-                batchdata.append(data)
-
-    return batchdata
+                yield data, get_copy_count(
+                    row, copies_index, copies, csv_reader.line_num, copies_column
+                )
 
 
 def get_data_list_xlsx(input_file_path, textboxformatinput, date_format=None):
@@ -58,68 +102,143 @@ def get_data_list_xlsx(input_file_path, textboxformatinput, date_format=None):
     Returns:
         list: Extracted label data (preserves datetime objects or raw strings).
     """
+    return list(iter_data_rows_xlsx(input_file_path, textboxformatinput, date_format))
+
+
+def iter_data_rows_xlsx(input_file_path, textboxformatinput, date_format=None):
+    """
+    Reads label data from an Excel (.xlsx) file one row at a time (see `get_data_list_xlsx`).
+
+    Args:
+        input_file_path (str): Path to the Excel file.
+        textboxformatinput (str): Column layout format using headers.
+        date_format (str or None): User-selected date format, or "Leave as is".
+
+    Yields:
+        list: Label data of one row.
+    """
+    for data, _ in iter_data_runs_xlsx(input_file_path, textboxformatinput, date_format):
+        yield data
+
+
+def iter_data_runs_xlsx(
+    input_file_path, textboxformatinput, date_format=None, copies=1, copies_column=None
+):
+    """
+    Reads label data from an Excel (.xlsx) file one row at a time, with the number of copies of
+    each row (see `iter_data_runs_csv`).
+
+    Args:
+        input_file_path (str): Path to the Excel file.
+        textboxformatinput (str): Column layout format using headers.
+        date_format (str or None): User-selected date format, or "Leave as is".
+        copies (int): Copies of each row, or of rows with a blank copies column.
+        copies_column (str, optional): Header of a column holding the copies of each row.
+
+    Yields:
+        tuple: (label data of one row, copies).
+
+    Raises:
+        ValueError: If the copies column is missing or holds something other than a count.
+    """
+    label_data_list_format = get_label_data_list_format(textboxformatinput)
     workbook = xlsx.load_workbook(filename=input_file_path, read_only=True)
-    sheet = workbook.active
-    raw_info = extract_label_info(sheet, textboxformatinput)
-
-    cleaned_info = []
-    for row in raw_info[1:]:  # skip header
-        cleaned_row = []
-        for cell in row:
-            if cell is None:
-                cleaned_row.append(None)
-            elif isinstance(cell, str):
-                stripped = cell.strip()
-                if stripped == "":
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns_in_sheet = next(rows, None)
+        if columns_in_sheet is None:
+            return
+        columns_in_sheet = list(columns_in_sheet)
+        indices_for_labeldata = [columns_in_sheet.index(col) for col in label_data_list_format if col in columns_in_sheet]
+        copies_index = get_copies_column_index(columns_in_sheet, copies_column)
+
+        for row_number, row in enumerate(rows, start=2):
+            cleaned_row = []
+            for idx in indices_for_labeldata:
+                if idx >= len(row):
+                    continue
+                cell = row[idx]
+                if cell is None:
                     cleaned_row.append(None)
-                elif date_format != "Leave as is":
-                    cleaned_row.append(try_parse_date(stripped))
-                else:
-                    cleaned_row.append(str(cell)) 
-            elif isinstance(cell, (datetime, date)):
-                if date_format == "Leave as is":
-                    cleaned_row.append(str(cell))  
+                elif isinstance(cell, str):
+                    stripped = cell.strip()
+                    if stripped == "":
+                        cleaned_row.append(None)
+                    elif date_format != "Leave as is":
+                        cleaned_row.append(try_parse_date(stripped))
+                    else:
+                        cleaned_row.append(str(cell))
+                elif isinstance(cell, (datetime, date)):
+                    if date_format == "Leave as is":
+                        cleaned_row.append(str(cell))
+                    else:
+                        cleaned_row.append(cell)
                 else:
-                    cleaned_row.append(cell)  
-            else:
-                cleaned_row.append(cell)
-  
+                    cleaned_row.append(cell)
 
+            if any(cell is not None for cell in cleaned_row):
+                yield cleaned_row, get_copy_count(
+                    row, copies_index, copies, row_number, copies_column
+                )
+    finally:
+        workbook.close()
 
-        if any(cell is not None for cell in cleaned_row):
-            cleaned_info.append(cleaned_row)
 
-    workbook.close()
-    return cleaned_info
+def get_copies_column_index(columns, copies_column):
+    """
+    Returns the index of the copies column in a header row.
 
+    Args:
+        columns (list): Header row.
+        copies_column (str or None): Header of the copies column, or None if there is none.
 
+    Returns:
+        int or None: Zero-based column index, or None if no copies column is used.
+
+    Raises:
+        ValueError: If the column is not in the header.
+    """
+    if not copies_column:
+        return None
+    if copies_column not in columns:
+        raise ValueError(f"Copies column '{copies_column}' was not found in the input file")
+    return columns.index(copies_column)
 
 
-# Read the worksheet and format the label info into a list of lists
-def extract_label_info(sheet, textboxformatinput):
+def get_copy_count(row, copies_index, copies, row_number, copies_column):
     """
-    Extracts label data from a worksheet using the defined coordinates and format.
+    Returns the number of copies of one input row.
 
     Args:
-        sheet (Worksheet): Active Excel worksheet.
-        tablecoords (list): Table boundaries.
-        textboxformatinput (str): Format string defining column layout.
+        row (list): Values of the row.
+        copies_index (int or None): Index of the copies column (see `get_copies_column_index`).
+        copies (int): Copies of rows without a copies column or with a blank one.
+        row_number (int): 1-based row number in the file, for error messages.
+        copies_column (str): Header of the copies column, for error messages.
 
     Returns:
-        list: List of label entries (each entry is a list).
+        int: Number of copies (0 skips the row).
+
+    Raises:
+        ValueError: If the value is not a whole, non-negative number.
     """
-    label_data_list_format = get_label_data_list_format(textboxformatinput)
-    columns_in_sheet = [cell.value for cell in next(sheet.iter_rows(min_row=1, max_row=1))]
-    batchdata = []
-    indices_for_labeldata = [columns_in_sheet.index(col) for col in label_data_list_format if col in columns_in_sheet]
-    for row in sheet.iter_rows():
-        extracted = []
-        for idx in indices_for_labeldata:
-            if idx < len(row):
-                extracted.append(row[idx].value)
-        if extracted:
-            batchdata.append(extracted)
-    return batchdata
+    if copies_index is None:
+        return copies
+    value = row[copies_index] if copies_index < len(row) else None
+    if isinstance(value, str):
+        value = value.strip() or None
+    if value is None:
+        return copies
+    try:
+        count = float(value)
+    except (TypeError, ValueError):
+        count = -1
+    if count < 0 or not count.is_integer():
+        raise ValueError(
+            f"Row {row_number}: '{value}' in column '{copies_column}' is not a number of copies"
+        )
+    return int(count)
+
 
 def get_label_data_list_format(textboxformatinput):
     """
@@ -132,7 +251,8 @@ def get_label_data_list_format(textboxformatinput):
         list: List of zero-based column indices.
     """
     findlist = re.findall(r'{(.*?)}', textboxformatinput)
-    return findlist
+    # Barcode placeholders such as {SampleID|qr} read the column named before the "|"
+    return [split_barcode_placeholder(name)[0] for name in findlist]
 
 def try_parse_date(value):
     """
@@ -166,11 +286,24 @@ def try_parse_date(value):
 
 
 def remove_duplicate_labels(data_list):
+    return list(iter_unique_rows(data_list))
+
+
+def iter_unique_rows(rows):
+    """Yields each distinct row once, in first-seen order."""
+    seen = set()
+    for row in rows:
+        row_tuple = tuple(row)
+        if row_tuple not in seen:
+            seen.add(row_tuple)
+            yield row
+
+
+def iter_unique_runs(runs):
+    """Yields the (data, copies) run of each distinct row once, keeping the first copy count."""
     seen = set()
-    unique_data = []
-    for row in data_list:
+    for row, count in runs:
         row_tuple = tuple(row)
         if row_tuple not in seen:
             seen.add(row_tuple)
-            unique_data.append(row)
-    return unique_data
\ No newline at end of file
+            yield row, count
@@ -40,6 +40,42 @@ def parse_copiesperlabel_input(raw_input):
             result.append(part)
     return result
 
+def parse_reprint_selection(raw_input):
+    """
+    Parse a reprint selection into page numbers and single label slots.
+
+    Supports, separated by commas:
+    - Page numbers (e.g., "37")
+    - Page ranges using dashes (e.g., "40-42")
+    - Single labels as page/row/column (e.g., "37/2/4")
+
+    Args:
+        raw_input (str): The raw input string to parse.
+
+    Returns:
+        tuple: (list of page numbers, list of (page, row, column) tuples).
+
+    Raises:
+        ValueError: If a part of the input is not in one of the supported forms.
+    """
+    pages = []
+    slots = []
+    for part in [part.strip() for part in raw_input.split(",")]:
+        if not part:
+            continue
+        slot_match = re.fullmatch(r"(\d+)\s*/\s*(\d+)\s*/\s*(\d+)", part)
+        range_match = re.fullmatch(r"(\d+)\s*-\s*(\d+)", part)
+        if slot_match:
+            slots.append(tuple(map(int, slot_match.groups())))
+        elif range_match:
+            start, end = map(int, range_match.groups())
+            pages.extend(range(start, end + 1))
+        elif part.isdigit():
+            pages.append(int(part))
+        else:
+            raise ValueError(f"Cannot read '{part}'. Use page numbers, ranges or page/row/column.")
+    return pages, slots
+
 def estimate_max_chars(label_width_in_inches, font_size_pt, font_name="Arial"):
     """
     Estimate how many characters can fit on a single line based on label width and font size.
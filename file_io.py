@@ -34,22 +34,6 @@ def get_file_path(output_file_path, outputfilenameprefix, outputformat):
     return os.path.join(filepath, f"{outputfilenameprefix}{formatted_date}{outputformat}")
 
 
-def save_file(filepath, content):
-    """
-    Saves content to a file, appending a counter to the filename if it already exists.
-
-    Args:
-        filepath (str): The desired path to save the file.
-        content (str): The content to write to the file.
-    """
-    filename, extension = os.path.splitext(filepath)
-    counter = 1
-    while os.path.exists(filepath):
-        filepath = f"{filename}_{counter}{extension}"
-        counter += 1
-    content.save(filepath)
-    os.startfile(filepath)
-
 def resource_path(relative_path):
     """
     Get absolute path to resource, works for dev and for PyInstaller.
@@ -69,3 +53,15 @@ def get_user_presets_folder():
     folder = os.path.join(base, "CryoLabelStudio", "presets")
     os.makedirs(folder, exist_ok=True)
     return folder
+
+def get_user_cache_folder():
+    """
+    Returns a user-writable folder for cached label documents.
+    Creates it if needed.
+    """
+    base = os.getenv('LOCALAPPDATA') or os.getenv('APPDATA')
+    if not base:
+        base = os.path.expanduser("~/.CryoLabelStudio")
+    folder = os.path.join(base, "CryoLabelStudio", "cache")
+    os.makedirs(folder, exist_ok=True)
+    return folder
@@ -1,20 +1,28 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from label_spec import LabelSpec
-from main import main
+from main import main, reprint
 import json
+from functools import partial
+import multiprocessing
 import shutil
 import os
 import sys
 from datetime import datetime
 from label_templates import label_templates
+from template_registry import template_registry
 from userguide import show_help_window
 from preset_editor.editor_ui import PresetEditor
 from data_extract import get_data_list_csv, get_data_list_xlsx
 from label_format import apply_format_to_row
-from data_process import is_valid_serial_format, parse_copiesperlabel_input
+from data_process import is_valid_serial_format, parse_copiesperlabel_input, parse_reprint_selection
 from preset_editor.file_helpers import get_csv_headers, get_xlsx_headers
 from file_io import resource_path, get_user_presets_folder
+from job_cache import JobCache
+from job_estimate import format_job_estimate
+
+# Finished documents, reused when the same job is generated again (e.g. after a printer jam)
+job_cache = JobCache()
 
 
 class CryoLabelStudioLite:
@@ -37,6 +45,9 @@ class CryoLabelStudioLite:
                 if not os.path.exists(dest):
                     shutil.copyfile(src, dest)
 
+        # Template files without an entry in label_templates are offered as well
+        template_registry.register(label_templates)
+
         self.root = root
         self.root.iconbitmap(resource_path("app_icon.ico"))
 
@@ -145,6 +156,12 @@ class CryoLabelStudioLite:
         preset_menu.add_command(label="Edit Presets", command=self.edit_presets_window)
         self.menu_bar.add_cascade(label="Presets", menu=preset_menu)
 
+        # Labels menu
+        labels_menu = tk.Menu(self.menu_bar, tearoff=0)
+        labels_menu.add_command(label="Reprint Pages or Labels...", command=self.reprint_labels_window)
+        labels_menu.add_command(label="Estimate Job Size", command=lambda: self.generate_labels(dry_run=True))
+        self.menu_bar.add_cascade(label="Labels", menu=labels_menu)
+
         # Help menu
         help_menu = tk.Menu(self.menu_bar, tearoff=0)
         help_menu.add_command(label="User Guide", command=lambda: show_help_window(self.root))
@@ -480,10 +497,15 @@ class CryoLabelStudioLite:
                 self.widgets[eid] = btn
 
 
-    def generate_labels(self):
+    def generate_labels(self, reprint_selection=None, dry_run=False):
         """
         Generate labels based on the current preset and user input, saving the output to file.
         Handles both text and file input presets.
+
+        Args:
+            reprint_selection (tuple, optional): (pages, slots) to reprint instead of the whole job.
+            dry_run (bool, optional): Only count the labels and pages of the job and show them,
+                with an estimate of the render time, instead of generating it.
         """
 
         spec = self.current_spec
@@ -510,14 +532,25 @@ class CryoLabelStudioLite:
         else:
             initial_filename = filename_base
 
-        output_path = filedialog.asksaveasfilename(
-            defaultextension=".docx",
-            filetypes=[("Word Document", "*.docx")],
-            initialfile=initial_filename
-        )
+        if dry_run:
+            run_job = partial(main, dry_run=True)
+            output_path = None
+        else:
+            if reprint_selection is None:
+                run_job = partial(main, cache=job_cache)
+            else:
+                pages, slots = reprint_selection
+                run_job = partial(reprint, pages=pages, slots=slots)
+                initial_filename = f"{initial_filename}_reprint"
+
+            output_path = filedialog.asksaveasfilename(
+                defaultextension=".docx",
+                filetypes=[("Word Document", "*.docx")],
+                initialfile=initial_filename
+            )
 
-        if not output_path:
-            return
+            if not output_path:
+                return
 
         if hasattr(self, "row_start_var"):
             spec.row_start = int(self.row_start_var.get())
@@ -528,6 +561,7 @@ class CryoLabelStudioLite:
         if hasattr(self, "col_end_var"):
             spec.col_end = int(self.col_end_var.get())
 
+        result = None
         try:
             if spec.presettype == "Text":
                 if spec.identical_or_incremental.lower() == "incremental":
@@ -544,19 +578,52 @@ class CryoLabelStudioLite:
                             "  • Prefix + digits (e.g., ab0001)"
                         )
                         return 
-                    main(spec, text_box_input=text, output_file_path=output_path)
+                    result = run_job(spec, text_box_input=text, output_file_path=output_path)
                 elif spec.identical_or_incremental.lower() == "identical":
                     text = self.widgets["user_input"].get("1.0", "end").rstrip()
-                    main(spec, text_box_input=text, output_file_path=output_path)
+                    result = run_job(spec, text_box_input=text, output_file_path=output_path)
 
             elif spec.presettype == "File":
                 if not hasattr(self, "input_file_path") or not self.input_file_path:
                     messagebox.showerror("Error", "Please upload a CSV or file.")
                     return 
-                main(spec, input_file_path=self.input_file_path, output_file_path=output_path)
+                result = run_job(spec, input_file_path=self.input_file_path, output_file_path=output_path)
 
         except Exception as e:
             messagebox.showerror("Error", f"Label generation failed:\n{e}")
+            return
+
+        if dry_run and result is not None:
+            messagebox.showinfo("Job Size", format_job_estimate(result))
+
+    def reprint_labels_window(self):
+        """
+        Ask which pages or single labels of the current job to reprint, then generate only those.
+        """
+        if not self.current_spec:
+            messagebox.showerror("Error", "No preset loaded.")
+            return
+
+        selection = simpledialog.askstring(
+            "Reprint Pages or Labels",
+            "Enter the pages or labels to reprint, separated by commas:\n"
+            "  • Pages (e.g., 37 or 40-42)\n"
+            "  • Single labels as page/row/column (e.g., 37/2/4)",
+            parent=self.root,
+        )
+        if not selection:
+            return
+
+        try:
+            pages, slots = parse_reprint_selection(selection)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if not pages and not slots:
+            messagebox.showerror("Error", "Nothing selected to reprint.")
+            return
+
+        self.generate_labels(reprint_selection=(pages, slots))
 
     def upload_sample_file(self):
         """
@@ -723,6 +790,7 @@ class CryoLabelStudioLite:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = CryoLabelStudioLite(root)
     root.mainloop()
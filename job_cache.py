@@ -0,0 +1,234 @@
+"""
+Content-addressed cache of finished label documents.
+
+After a printer jam the same sheet is often generated again from the same preset and the same
+input. Each job is identified by a hash of everything that affects the output: the preset
+fields, the template file and its stock entry in `label_templates`, the input file or text, and
+the output options, plus `FORMAT_VERSION` so that documents rendered by an older version of the
+renderer are not served after it changes. When a finished document for that hash is already in
+the cache it is copied to the output path instead of being rendered again. The cache is bounded
+by total size and evicts the least recently used documents first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from file_io import get_user_cache_folder
+from template_cache import template_cache
+from label_templates import label_templates
+
+# Version of the rendered output. Bump when the renderer output changes
+FORMAT_VERSION = 1
+
+# Preset fields that only affect the GUI or the output file name, not the document content
+IGNORED_SPEC_FIELDS = {
+    "color_theme",
+    "ui_layout",
+    "outputfilenameprefix",
+    "output_add_date",
+    "outputformat",
+    "sample_filename",
+}
+NUMERIC_SPEC_FIELDS = {
+    "fontsize",
+    "copiesperlabel",
+    "row_start",
+    "row_end",
+    "col_start",
+    "col_end",
+    "pages_of_labels",
+}
+
+
+def normalize_spec(spec):
+    """
+    Returns the preset fields that affect the output, in a form suitable for hashing.
+
+    Numeric fields are compared by value, so a font size of "6" and 6 give the same key.
+
+    Args:
+        spec (LabelSpec): Preset specification.
+
+    Returns:
+        dict: Field name to value.
+    """
+    fields = {}
+    for name, value in vars(spec).items():
+        if name in IGNORED_SPEC_FIELDS:
+            continue
+        if name in NUMERIC_SPEC_FIELDS and value is not None:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                pass
+        fields[name] = value
+    return fields
+
+
+def hash_file(path):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_job_key(spec, templatepath, input_file_path=None, text_box_input=None, options=None):
+    """
+    Computes the cache key of a label job.
+
+    The stock's `label_templates` entry is part of the key, since settings such as
+    `chars_per_line`, `lines_per_label`, the font defaults and `needs_page_break` change the
+    output without changing the template file.
+
+    Args:
+        spec (LabelSpec): Preset specification.
+        templatepath (str): Path to the label template file, or a "synth://" path.
+        input_file_path (str, optional): CSV or XLSX input of 'File' presets.
+        text_box_input (str, optional): Text input of 'Text' presets.
+        options (dict, optional): Output options that change the document bytes, such as the
+            engine and the compression level.
+
+    Returns:
+        str: Hex digest identifying the job.
+    """
+    job = {
+        "format": FORMAT_VERSION,
+        "spec": normalize_spec(spec),
+        "template": hashlib.sha256(template_cache.get(templatepath).blob).hexdigest(),
+        "stock": label_templates.get(spec.labeltemplate),
+        "input": hash_file(input_file_path) if input_file_path else None,
+        "text": text_box_input,
+        "options": options or {},
+    }
+    blob = json.dumps(job, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+class JobCache:
+    """
+    Size-bounded LRU directory of finished documents keyed by `make_job_key`.
+
+    The modification time of each cached file records its last use, so the least recently used
+    documents are evicted first and the order survives restarts.
+
+    Args:
+        folder (str, optional): Cache directory. Defaults to the user cache folder.
+        max_bytes (int): Maximum total size of the cached documents.
+    """
+
+    def __init__(self, folder=None, max_bytes=500 * 1024 * 1024):
+        self._folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def folder(self):
+        """The cache directory, created on first use."""
+        if self._folder is None:
+            self._folder = get_user_cache_folder()
+        os.makedirs(self._folder, exist_ok=True)
+        return self._folder
+
+    def _entry_path(self, key):
+        return os.path.join(self.folder, key + ".docx")
+
+    def get(self, key):
+        """
+        Looks up a finished document and marks it as recently used.
+
+        Args:
+            key (str): Job key from `make_job_key`.
+
+        Returns:
+            str or None: Path of the cached document, or None on a miss.
+        """
+        path = self._entry_path(key)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                self.hits += 1
+                return path
+            self.misses += 1
+            return None
+
+    def put(self, key, filepath):
+        """
+        Stores a copy of a finished document and evicts old entries if the cache is too large.
+
+        Args:
+            key (str): Job key from `make_job_key`.
+            filepath (str): Path of the finished document.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(filepath, temp_path)
+            os.replace(temp_path, self._entry_path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used documents until the cache fits in `max_bytes`."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            for _, path, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Deletes every cached document and resets the statistics."""
+        with self._lock:
+            for _, path, _ in self._entries():
+                os.remove(path)
+            self.hits = 0
+            self.misses = 0
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.folder):
+            if name.endswith(".docx"):
+                path = os.path.join(self.folder, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    @property
+    def stats(self):
+        """
+        Cache statistics.
+
+        Returns:
+            dict: "hits", "misses", "entries" and "bytes".
+        """
+        with self._lock:
+            entries = self._entries()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(entries),
+                "bytes": sum(size for _, _, size in entries),
+            }
@@ -1,29 +1,36 @@
-import sys
 import re
 import copy
 from docx.oxml import OxmlElement
-from docx import Document
-from docx.shared import Pt, Inches
+from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.section import WD_SECTION_START
+from docx.enum.style import WD_STYLE_TYPE
+from docx.text.paragraph import Paragraph
 from datetime import datetime, date
 from label_templates import label_templates
 from docx.oxml.ns import qn
-from docxcompose.composer import Composer
-import math
+from functools import lru_cache
+from template_cache import template_cache
+from template_registry import get_table_size
+from slot_map import get_first_page_columns
+from barcodes import (
+    BARCODE_2D_KINDS,
+    barcode_cache,
+    has_barcodes,
+    make_barcode_run,
+    split_barcode_placeholder,
+)
 
 
 
 def get_row_and_column_indices(templatepath, table_format):
-    labelsheet = Document(templatepath)
-    table = labelsheet.tables[0]
+    num_rows, num_columns = get_table_size(templatepath)
     if table_format == "checkerboard":
-        row_indices = [i for i in range(len(table.rows)) if i % 2 == 0]
-        col_indices = [j for j in range(len(table.columns)) if j % 2 == 0]
+        row_indices = [i for i in range(num_rows) if i % 2 == 0]
+        col_indices = [j for j in range(num_columns) if j % 2 == 0]
 
     if table_format == "LSL stripes":
-        row_indices = [i for i in range(len(table.rows))]
-        col_indices = [j for j in range(len(table.columns)) if j % 2 == 0]
+        row_indices = [i for i in range(num_rows)]
+        col_indices = [j for j in range(num_columns) if j % 2 == 0]
 
     return row_indices, col_indices
 
@@ -37,266 +44,356 @@ def get_first_page_row_indices(start_row, end_row, row_indices):
 
 
 def get_first_page_col_indices(start_col, end_col, start_row, end_row, col_indices):
-    first_page_first_row_col_indices = []
-    first_page_last_row_col_indices = []
-    if end_row - start_row == 0:
-        for i in range(len(col_indices)):
-            if i >= start_col - 1 and i <= end_col - 1:
-                first_page_first_row_col_indices.append(col_indices[i])
-        return first_page_first_row_col_indices, first_page_last_row_col_indices
-
-    for i in range(len(col_indices)):
-        if i >= start_col - 1:
-            first_page_first_row_col_indices.append(col_indices[i])
-
-    for i in range(len(col_indices)):
-        if i <= end_col - 1:
-            first_page_last_row_col_indices.append(col_indices[i])
-
-    if end_col - start_col == 0:
-        first_page_first_row_col_indices = []
-        for i in range(len(col_indices)):
-            if i >= start_col - 1:
-                first_page_first_row_col_indices.append(col_indices[i])
-
+    first_columns, last_columns = get_first_page_columns(
+        start_col, end_col, start_row, end_row, len(col_indices)
+    )
+    first_page_first_row_col_indices = [col_indices[col - 1] for col in first_columns]
+    first_page_last_row_col_indices = [col_indices[col - 1] for col in last_columns]
     return first_page_first_row_col_indices, first_page_last_row_col_indices
 
 
-def get_max_labels_per_page(spec, templatepath, table_format):
+def fill_label_slots(tbl, slots, data_list, spec, renderer=None):
     """
-    Calculates how many label entries can fit per page.
+    Fills label cells addressed by their position among the table's `w:tc` elements.
 
     Args:
-        labeltemplate (str): Path to label template file.
-        labelsheetlayouttype (str): Layout type of the label sheet.
-        copiesperlabel (int): Number of repeated labels per entry.
+        tbl (CT_Tbl): The page's `w:tbl` element.
+        slots (sequence): Flat cell index of each label slot, in fill order.
+        data_list (list): Label data for this page, one entry per label.
+        spec (LabelSpec): Preset specification with the format and font settings.
+        renderer (LabelCellRenderer, optional): Job-wide renderer, so copies of a row that
+            continue on the next page are not formatted again.
+    """
+    if renderer is None:
+        renderer = LabelCellRenderer(spec)
+    cells = tbl.findall(TABLE_CELL_PATH)
 
-    Returns:
-        int: Maximum number of unique label entries per page.
+    for slot, data in zip(slots, data_list):
+        tc = cells[slot]
+        tc.clear_content()
+        tc.append(renderer.paragraph_for(data))
+
+
+class LastValueMemo:
     """
+    Remembers the result for the last key only.
 
-    row_indices, column_indices = get_row_and_column_indices(templatepath, table_format)
-    total_cells = len(row_indices) * len(column_indices)
-    return total_cells
+    Pagination places the copies of a data row next to each other, so every writer formats a
+    row once and reuses the result while the same row repeats, however many copies are printed.
+    """
 
+    def __init__(self):
+        self._key = None
+        self._value = None
+        self._filled = False
 
-def get_max_labels_first_page(
-    first_page_row_indices,
-    column_indices,
-    first_page_first_row_col_indices,
-    first_page_last_row_col_indices,
-):
-    labels_first_page_first_last_row = len(first_page_first_row_col_indices) + len(
-        first_page_last_row_col_indices
-    )
-    rows_first_last = 0
-    for item in first_page_first_row_col_indices, first_page_last_row_col_indices:
-        if len(item) > 0:
-            rows_first_last += 1
+    def get(self, key, make):
+        """
+        Returns the result for a key, calling `make(key)` unless the key equals the last one.
 
-    labels_first_page_middle_rows = (len(first_page_row_indices) - rows_first_last) * len(
-        column_indices
-    )
-    total_cells = labels_first_page_first_last_row + labels_first_page_middle_rows
-    return total_cells
+        Args:
+            key: The label data (or a tuple including it).
+            make (callable): Computes the result for a new key.
+        """
+        if not self._filled or not (key is self._key or key == self._key):
+            self._value = make(key)
+            self._key = key
+            self._filled = True
+        return self._value
 
 
-def paginate_labels(
-    first_page_max_labels, max_labels_per_page, data_list, copiesperlabel
-):
-    total_labels = len(data_list) * copiesperlabel
-    if first_page_max_labels > total_labels:
-        num_pages = 1
-        firstpage = []
-        pages = []
-        for item in data_list:
-            for _ in range(copiesperlabel):
-                firstpage.append(item)
-
-    else:
-        num_pages = (
-            math.ceil((total_labels - first_page_max_labels) / max_labels_per_page) + 1
-        )
-        firstpage = []
+class LabelCellRenderer:
+    """
+    Renders label paragraphs for one job.
 
-        first_page_max_data = first_page_max_labels // copiesperlabel
+    The last rendered paragraph is kept (see `LastValueMemo`) and cloned while the same row
+    repeats, so each row is formatted once no matter how many copies of it are printed.
 
-        if first_page_max_data * copiesperlabel < first_page_max_labels:
-            first_page_max_data += 1
+    Args:
+        spec (LabelSpec): Preset specification with the format and font settings.
+    """
 
-        for item in data_list[:first_page_max_data]:
-            for i in range(copiesperlabel):
-                firstpage.append(item)
-        if len(firstpage) > first_page_max_labels:
-            hangover = firstpage[first_page_max_labels:]
-        else:
-            hangover = []
-   
-        firstpage = firstpage[:first_page_max_labels]
-        remaining = data_list[first_page_max_data:]
-        pages = []
-        remainingindex = 0
-        page = []
-        for i in range(1, num_pages):
-            if remainingindex == 0:
-                page = hangover
-            remaining_labels_on_page = max_labels_per_page - len(page)
-            remaining_data_items_on_page = math.ceil(
-                remaining_labels_on_page / copiesperlabel
+    def __init__(self, spec):
+        self.spec = spec
+        self.cell_format = get_cell_format(
+            spec.fontname, spec.fontsize, spec.alignment, spec.compact_output
+        )
+        self.label_size = None
+        if spec.identical_or_incremental != "Identical" and has_barcodes(spec.textboxformatinput):
+            template_meta = label_templates[spec.labeltemplate]
+            self.label_size = (template_meta["label_width"], template_meta["label_height"])
+        self._memo = LastValueMemo()
+
+    def paragraph_for(self, data):
+        """
+        Returns a formatted paragraph for one label, ready to be placed in a cell.
+
+        Args:
+            data: Label data (a row of values, or the label text).
+        """
+        return copy.deepcopy(self._memo.get(data, self._make_paragraph))
+
+    def _make_paragraph(self, data):
+        spec = self.spec
+        if self.label_size is not None:
+            return self.cell_format.make_barcode_paragraph(
+                get_label_segments(spec.textboxformatinput, data, spec.date_format),
+                *self.label_size,
             )
-            for item in remaining[remainingindex:remaining_data_items_on_page]:
-                for i in range(copiesperlabel):
-                    page.append(item)
-                remainingindex += 1
+        return self.cell_format.make_paragraph(
+            get_label_text(
+                data,
+                spec.textboxformatinput,
+                spec.date_format,
+                spec.identical_or_incremental,
+            )
+        )
 
-            if len(page) > max_labels_per_page:
-                hangover = page[max_labels_per_page:]
-            else:
-                hangover = []
-            page = page[:max_labels_per_page]
-            pages.append(page)
 
-            remaining = remaining[remainingindex:]
-            remainingindex = 0
-    return firstpage, pages
+def fill_identical_slots(tbl, slots, data, spec):
+    """
+    Fills label cells that all carry the same label.
+
+    The label is formatted once and the finished paragraph is cloned into every slot.
+
+    Args:
+        tbl (CT_Tbl): The page's `w:tbl` element.
+        slots (sequence): Flat cell index of each slot to fill.
+        data: Label data shared by every slot.
+        spec (LabelSpec): Preset specification with the format and font settings.
+    """
+    cell_format = get_cell_format(
+        spec.fontname, spec.fontsize, spec.alignment, spec.compact_output
+    )
+    paragraph = cell_format.make_paragraph(
+        get_label_text(data, spec.textboxformatinput, spec.date_format, spec.identical_or_incremental)
+    )
+    cells = tbl.findall(TABLE_CELL_PATH)
+
+    for slot in slots:
+        tc = cells[slot]
+        tc.clear_content()
+        tc.append(copy.deepcopy(paragraph))
 
 
-def format_labels_page(
-    data_list,
-    templatepath,
+TABLE_CELL_PATH = qn("w:tr") + "/" + qn("w:tc")
+
+
+def get_label_slots(
+    cell_grid,
     first_page_row_indices,
     column_indices,
     first_page_first_row_col_indices,
     first_page_last_row_col_indices,
-    spec,
-    needs_page_break,
-    is_last_page=False
 ):
-    labelsheet = Document(templatepath)
-    table = labelsheet.tables[0]
-    textboxformatinput = spec.textboxformatinput
-    fontname = spec.fontname
-    fontsize = spec.fontsize
+    """
+    Lists the flat cell index of every label slot on a page, in fill order.
 
-    first_row = first_page_row_indices[0]
+    Args:
+        cell_grid (list): Result of `get_cell_grid` for the template table.
+        first_page_row_indices (list): Table rows used on the page.
+        column_indices (list): Table columns used on full rows.
+        first_page_first_row_col_indices (list): Table columns used on the first row.
+        first_page_last_row_col_indices (list): Table columns used on the last row.
 
-    if len(first_page_row_indices) > 2:
-        middle_rows = first_page_row_indices[1:-1]
-        last_row = first_page_row_indices[-1]
-    else:
-        middle_rows = []
-        last_row = first_page_row_indices[-1]
-
-    labelcount = 0
-    # Fill first row
-    for cind in first_page_first_row_col_indices:
-        if labelcount >= len(data_list):
-            break
-        current_cell = table.rows[first_row].cells[cind]
-        format_label_cell(
-            current_cell,
-            data_list[labelcount],
-            textboxformatinput,
-            fontname,
-            fontsize,
-            spec.alignment,
-            spec.date_format,
-            spec.identical_or_incremental,
-        )
-        labelcount += 1
+    Returns:
+        list: Flat cell indices.
+    """
+    first_row = first_page_row_indices[0]
+    middle_rows = first_page_row_indices[1:-1]
+    last_row = first_page_row_indices[-1]
 
-    # Fill middle rows
+    slots = [cell_grid[first_row][col] for col in first_page_first_row_col_indices]
     for row in middle_rows:
-        for cind in column_indices:
-            if labelcount >= len(data_list):
-                break
-            current_cell = table.rows[row].cells[cind]
-            format_label_cell(
-                current_cell,
-                data_list[labelcount],
-                textboxformatinput,
-                fontname,
-                fontsize,
-                spec.alignment,
-                spec.date_format,
-                spec.identical_or_incremental,
-            )
-            labelcount += 1
-
-    # Fill last row (if it’s different)
+        slots.extend(cell_grid[row][col] for col in column_indices)
     if last_row != first_row:
-        for cind in first_page_last_row_col_indices:
-            if labelcount >= len(data_list):
-                break
-            current_cell = table.rows[last_row].cells[cind]
-            format_label_cell(
-                current_cell,
-                data_list[labelcount],
-                textboxformatinput,
-                fontname,
-                fontsize,
-                spec.alignment,
-                spec.date_format,
-                spec.identical_or_incremental,
-            )
-            labelcount += 1
+        slots.extend(cell_grid[last_row][col] for col in first_page_last_row_col_indices)
+    return slots
 
-    if needs_page_break:
-        if not is_last_page:
-            labelsheet.add_page_break()
 
-    return labelsheet
+def get_label_text(data, textboxformatinput, date_format, identical_or_incremental=None):
+    """
+    Returns the text of one label.
+
+    Identical labels and presets without a format string use the data as is; everything else is
+    run through `apply_format_to_row`.
+    """
+    if identical_or_incremental != "Identical":
+        if textboxformatinput:
+            return apply_format_to_row(textboxformatinput, data, date_format)
+    return data
+
+
+def get_label_string(text):
+    """Returns label text as a string; Incremental presets hold each label as a one-item list."""
+    if isinstance(text, (list, tuple)):
+        return "\n".join("" if value is None else str(value) for value in text)
+    return "" if text is None else str(text)
+
+
+ALIGNMENT_MAP = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+}
 
 
-def format_label_cell(cell, data, textboxformatinput, fontname, fontsize, alignment, date_format, identical_or_incremental=None):
+class LabelCellFormat:
     """
-    Populates a single label cell with the given data and formats it according to the label template.
+    Pre-built paragraph for label cells.
 
-    This function takes the extracted data and fills the corresponding label cell with the entry
-    number, last name, first name, and date.
+    The paragraph properties (alignment) and run properties (font, size, bold) are built once as
+    XML. Filling a cell then only clones that paragraph and sets the run text.
 
     Args:
-        cell (docx.table._Cell): The label cell in which the data will be inserted.
-        data (list): A list containing the entry's label data. The expected structure is:
-                 [identifier, last name, first name, date]. The `date` is expected to be a `datetime` object, but the program will also work if it's a str.
+        fontname (str): Font name for the label text.
+        fontsize (str or float): Font size in points.
+        alignment (str): "left", "center" or "right" (case-insensitive).
+        use_styles (bool): Reference the label styles instead of repeating the formatting in
+            every cell (see `add_label_styles`).
+    """
 
-    Returns:
-        None: The function directly modifies the cell's content and style.
+    def __init__(self, fontname, fontsize, alignment, use_styles=False):
+        direct = OxmlElement("w:p")
+        paragraph = Paragraph(direct, None)
+        paragraph.alignment = ALIGNMENT_MAP.get(alignment.lower(), WD_ALIGN_PARAGRAPH.CENTER)
+        run = paragraph.add_run()
+        run.font.size = Pt(float(fontsize))
+        run.font.name = fontname
+        run.bold = True
+        self.paragraph_properties = direct.pPr
+        self.run_properties = direct.r_lst[0].rPr
+
+        if use_styles:
+            # Compact output: the formatting lives in the styles added by add_label_styles
+            self._paragraph = OxmlElement("w:p")
+            self._paragraph.get_or_add_pPr().style = LABEL_PARAGRAPH_STYLE
+            self._paragraph.add_r().get_or_add_rPr().style = LABEL_CHARACTER_STYLE
+        else:
+            self._paragraph = direct
+
+    def make_paragraph(self, text):
+        """
+        Returns a new formatted paragraph holding `text`.
+
+        Args:
+            text (str): Label text; newlines become line breaks.
+        """
+        paragraph = copy.deepcopy(self._paragraph)
+        paragraph.r_lst[0].text = text
+        return paragraph
+
+    def make_barcode_paragraph(self, segments, label_width, label_height):
+        """
+        Returns a new formatted paragraph holding label text and barcodes.
+
+        A line break next to a floating 2D code is dropped, since the code does not take up a
+        line of its own. Codes with an empty value are left out.
+
+        Args:
+            segments (list): Result of `get_label_segments`.
+            label_width (float): Label width in inches, to size the codes.
+            label_height (float): Label height in inches.
+        """
+        paragraph = copy.deepcopy(self._paragraph)
+        text_run = paragraph.r_lst[0]
+        for i, segment in enumerate(segments):
+            if isinstance(segment, str):
+                if i > 0 and segments[i - 1][0] in BARCODE_2D_KINDS:
+                    segment = segment.removeprefix("\n")
+                if i + 1 < len(segments) and segments[i + 1][0] in BARCODE_2D_KINDS:
+                    segment = segment.removesuffix("\n")
+                if not segment:
+                    continue
+                run = copy.deepcopy(text_run)
+                run.text = segment
+            else:
+                kind, value = segment
+                if not value:
+                    continue
+                image = barcode_cache.get(kind, value, label_width, label_height)
+                run = make_barcode_run(image, text_run.rPr)
+            text_run.addprevious(run)
+        paragraph.remove(text_run)
+        return paragraph
+
+    def fill(self, tc, text):
+        """
+        Replaces the content of a table cell with one formatted paragraph holding `text`.
+
+        Args:
+            tc (CT_Tc): The cell's `w:tc` element.
+            text (str): Label text; newlines become line breaks.
+        """
+        tc.clear_content()
+        tc.append(self.make_paragraph(text))
+
+
+@lru_cache(maxsize=32)
+def get_cell_format(fontname, fontsize, alignment, use_styles=False):
+    """Returns the shared `LabelCellFormat` for a font, size and alignment."""
+    return LabelCellFormat(fontname, fontsize, alignment, use_styles)
 
-    Example:
-        format_label_cell(cell, ["25-0001", "Doe", "John", datetime.datetime(2025, 3, 29)])
-        This would fill the cell with the following formatted text:
-        "25-0001
-         Doe, John
-         03/29/2025"
+
+LABEL_PARAGRAPH_STYLE = "CryoLabelText"
+LABEL_CHARACTER_STYLE = "CryoLabelChar"
+
+
+def add_label_styles(styles_element, spec):
     """
-    if identical_or_incremental != "Identical":
-        if textboxformatinput:
-            label_text = apply_format_to_row(textboxformatinput, data, date_format)
-            cell.text = label_text
+    Adds the paragraph and character styles used by compact output to a styles part.
 
-        else:
-            cell.text = data
-    else:
-        cell.text = data
-
-    alignment_map = {
-        "left": WD_ALIGN_PARAGRAPH.LEFT,
-        "center": WD_ALIGN_PARAGRAPH.CENTER,
-        "right": WD_ALIGN_PARAGRAPH.RIGHT,
-    }
-
-    for paragraph in cell.paragraphs:
-        paragraph.alignment = alignment_map.get(
-            alignment.lower(), WD_ALIGN_PARAGRAPH.CENTER
-        )
-        for run in paragraph.runs:
-            run.font.size = Pt(float(fontsize))
-            run.font.name = fontname
-            run.bold = True
-    return
+    The paragraph style carries the alignment and the character style carries the font, size and
+    bold setting, exactly as direct formatting would set them.
+
+    Args:
+        styles_element (CT_Styles): The `w:styles` element of the output document.
+        spec (LabelSpec): Preset specification with the font settings.
+    """
+    cell_format = get_cell_format(spec.fontname, spec.fontsize, spec.alignment)
+    styles = (
+        ("Cryo Label Text", WD_STYLE_TYPE.PARAGRAPH, cell_format.paragraph_properties),
+        ("Cryo Label Char", WD_STYLE_TYPE.CHARACTER, cell_format.run_properties),
+    )
+    for name, style_type, properties in styles:
+        existing = styles_element.get_by_name(name)
+        if existing is not None:
+            styles_element.remove(existing)
+        style = styles_element.add_style_of_type(name, style_type, False)
+        default = styles_element.default_for(style_type)
+        if default is not None:
+            style.basedOn_val = default.styleId
+        style.append(copy.deepcopy(properties))
+
+
+W14_NAMESPACE = "http://schemas.microsoft.com/office/word/2010/wordml"
+REDUNDANT_ATTRIBUTES = {f"{{{W14_NAMESPACE}}}paraId", f"{{{W14_NAMESPACE}}}textId"}
+
+
+def compact_element(element):
+    """
+    Strips markup that has no visual effect from template content.
+
+    Removes revision-tracking ids (`w:rsid*`, `w14:paraId`, `w14:textId`), runs without content
+    and empty paragraphs that follow the first paragraph of a cell.
+
+    Args:
+        element (lxml.etree._Element): Element to clean in place.
+    """
+    rsid_prefix = qn("w:rsid")
+    for el in element.iter():
+        for name in [name for name in el.attrib if name in REDUNDANT_ATTRIBUTES or name.startswith(rsid_prefix)]:
+            del el.attrib[name]
+
+    for run in list(element.iter(qn("w:r"))):
+        if all(child.tag == qn("w:rPr") for child in run):
+            run.getparent().remove(run)
+
+    for tc in list(element.iter(qn("w:tc"))):
+        for paragraph in tc.findall(qn("w:p"))[1:]:
+            if paragraph.find(qn("w:r")) is None:
+                tc.remove(paragraph)
 
-import re
 
 def smart_wrap_label_text(label_text, max_chars, prefix=None, buffer=3):
     """
@@ -355,17 +452,78 @@ def apply_format_to_row(textboxformatinput, row_data, date_format):
     Returns:
         str: The formatted label string.
     """
-    slice_pattern = re.compile(r"({([^}]+)}(\[[^\]]+\])?)")
     placeholder_to_value = {}
-    matches = list(slice_pattern.finditer(textboxformatinput))
+    for match, value in get_placeholder_values(textboxformatinput, row_data, date_format):
+        placeholder_to_value[match.group(1)] = value
+
+    result = textboxformatinput
+    for full_placeholder, value in placeholder_to_value.items():
+        result = result.replace(full_placeholder, value)
+
+    return result
+
+
+PLACEHOLDER_PATTERN = re.compile(r"({([^}]+)}(\[[^\]]+\])?)")
+
+
+def get_label_segments(textboxformatinput, row_data, date_format):
+    """
+    Splits a formatted label into text and barcodes.
+
+    Text placeholders are filled in as by `apply_format_to_row`; barcode placeholders such as
+    {SampleID|qr} become (kind, value) tuples.
+
+    Args:
+        textboxformatinput (str): A string with placeholders like "{SampleID|qr}{SampleID}".
+        row_data (list): A list of values in the same order as placeholders.
+        date_format (str): strftime format for dates, or "Leave as is".
+
+    Returns:
+        list: Text (str) and (barcode kind, value) segments, in order. Text segments may be
+        empty; there is one before and after every barcode.
+    """
+    segments = []
+    text = []
+    position = 0
+    for match, value in get_placeholder_values(textboxformatinput, row_data, date_format):
+        text.append(textboxformatinput[position:match.start()])
+        position = match.end()
+        kind = split_barcode_placeholder(match.group(2))[1]
+        if kind is None:
+            text.append(value)
+        else:
+            segments.append("".join(text))
+            segments.append((kind, value))
+            text = []
+    text.append(textboxformatinput[position:])
+    segments.append("".join(text))
+    return segments
+
+
+def get_placeholder_values(textboxformatinput, row_data, date_format):
+    """
+    Formats the value of every placeholder of a label format string for one row of data.
+
+    Dates are formatted with `date_format`, None becomes an empty string and slices such as
+    {FIELD}[2:] are applied.
+
+    Args:
+        textboxformatinput (str): A string with placeholders like "{SampleID}\n{Date}".
+        row_data (list): A list of values in the same order as placeholders.
+        date_format (str): strftime format for dates, or "Leave as is".
+
+    Returns:
+        list: (placeholder match, formatted value) for each placeholder, in order.
+    """
+    values = []
+    matches = list(PLACEHOLDER_PATTERN.finditer(textboxformatinput))
 
     for i, match in enumerate(matches):
-        full_placeholder = match.group(1)  # e.g., {SERUM ID}[6:]
         key = match.group(2)               # e.g., SERUM ID
         slice_part = match.group(3)        # e.g., [6:]
 
         if i >= len(row_data):
-            placeholder_to_value[full_placeholder] = ""
+            values.append((match, ""))
         else:
             value = row_data[i]
 
@@ -386,26 +544,125 @@ def apply_format_to_row(textboxformatinput, row_data, date_format):
                 except Exception as e:
                     print(f"Warning: invalid slice {slice_part} on {key}: {e}")
 
-            placeholder_to_value[full_placeholder] = value
-
-    result = textboxformatinput
-    for full_placeholder, value in placeholder_to_value.items():
-        result = result.replace(full_placeholder, value)
+            values.append((match, value))
 
-    return result
+    return values
 
-def combine_docs(doc1, doc2):
+class PageAssembler:
     """
-    Appends all content from doc2 into doc1.
+    Builds every page of a label job inside a single output document.
+
+    The template is opened once. For each page only the label table is cloned and filled, followed
+    by the template's separator paragraph and, where the template needs it, a page break. The
+    output keeps the template's styles and a single set of section properties.
 
     Args:
-        doc1 (Document): First document.
-        doc2 (Document): Second document to append.
+        templatepath (str): Path to the label template file.
+        needs_page_break (bool): Whether pages must be separated by an explicit page break.
+        compact (bool): Strip markup without visual effect from the cloned template content
+            (see `compact_element`).
+    """
 
-    Returns:
-        Document: Combined document.
+    def __init__(self, templatepath, needs_page_break, compact=False):
+        self.templatepath = templatepath
+        self.template = template_cache.get(templatepath)
+        body = self.template.skeleton.element.body
+        self._table = body.find(qn("w:tbl"))
+        self._separators = [
+            element for element in body if element.tag not in (qn("w:tbl"), qn("w:sectPr"))
+        ]
+        if compact:
+            self._table = copy.deepcopy(self._table)
+            self._separators = [copy.deepcopy(element) for element in self._separators]
+            for element in [self._table, *self._separators]:
+                compact_element(element)
+        self._page_break = make_page_break_paragraph() if needs_page_break else None
+        self._document = None
+        self._identical_tables = {}
+        self._renderer = None
+        self.page_count = 0
+
+    @property
+    def document(self):
+        """The output document, created from the template on first use."""
+        if self._document is None:
+            self._document = self.template.new_document()
+            body = self._document.element.body
+            for element in list(body):
+                if element.tag != qn("w:sectPr"):
+                    body.remove(element)
+        return self._document
+
+    def render_page(self, data_list, slots, spec, is_last_page=False):
+        """
+        Renders one page of labels without adding it to the output document.
+
+        Args:
+            data_list (list): Label data for this page, one entry per label.
+            slots (sequence): Flat cell index of each label slot, in fill order
+                (see `LayoutPlan.slots_for_page`).
+            spec (LabelSpec): Preset specification.
+            is_last_page (bool): Suppresses the trailing page break on the last page.
+
+        Returns:
+            list: Body elements for the page (label table, separators and optional page break).
+        """
+        if spec.presettype == "Text" and spec.identical_or_incremental == "Identical":
+            tbl = self._render_identical_table(data_list, slots, spec)
+        else:
+            if self._renderer is None or self._renderer.spec is not spec:
+                self._renderer = LabelCellRenderer(spec)
+            tbl = copy.deepcopy(self._table)
+            fill_label_slots(tbl, slots, data_list, spec, self._renderer)
+        elements = [tbl] + [copy.deepcopy(element) for element in self._separators]
+        if self._page_break is not None and not is_last_page:
+            elements.append(copy.deepcopy(self._page_break))
+        return elements
+
+    def _render_identical_table(self, data_list, slots, spec):
+        """
+        Renders a page of identical labels, reusing an already finished page where possible.
+
+        Every full page of an Identical job is the same, so it is rendered once and cloned.
+        Only the partial first and last pages are filled separately.
+        """
+        data = data_list[0] if data_list else ""
+        key = (data, len(data_list), tuple(slots))
+        tbl = self._identical_tables.get(key)
+        if tbl is None:
+            tbl = copy.deepcopy(self._table)
+            fill_identical_slots(tbl, slots[:len(data_list)], data, spec)
+            self._identical_tables[key] = tbl
+        return copy.deepcopy(tbl)
+
+    def append_page(self, elements):
+        """
+        Appends rendered page elements to the output document, before its section properties.
+
+        Args:
+            elements (list): Body elements as returned by `render_page`.
+        """
+        body = self.document.element.body
+        sectPr = body.find(qn("w:sectPr"))
+        for element in elements:
+            if sectPr is not None:
+                sectPr.addprevious(element)
+            else:
+                body.append(element)
+        self.page_count += 1
+
+
+def make_page_break_paragraph():
     """
-    for element in doc2.element.body:
-        doc1.element.body.append(element)
+    Builds a paragraph containing only a page break.
 
-    return doc1
+    Returns:
+        lxml.etree._Element: The `w:p` element.
+    """
+    paragraph = OxmlElement("w:p")
+    run = OxmlElement("w:r")
+    br = OxmlElement("w:br")
+    br.set(qn("w:type"), "page")
+    run.append(br)
+    paragraph.append(run)
+    return paragraph
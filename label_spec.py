@@ -3,6 +3,7 @@ class LabelSpec:
     def __init__(self, **kwargs):
         self.presettype = kwargs.get("presettype")
         self.copiesperlabel = kwargs.get("copiesperlabel")
+        self.copies_column = kwargs.get("copies_column")
         self.multi_copiesperlabel = kwargs.get("multi_copiesperlabel")
         self.textboxformatinput = kwargs.get("textboxformatinput")
         self.labeltemplate = kwargs.get("labeltemplate")
@@ -25,4 +26,5 @@ class LabelSpec:
         self.pages_of_labels = kwargs.get("pages_of_labels", 1)
         self.date_format = kwargs.get("date_format")
         self.sample_filename = kwargs.get("sample_filename", None)
-        self.remove_duplicates = kwargs.get("remove_duplicates")
\ No newline at end of file
+        self.remove_duplicates = kwargs.get("remove_duplicates")
+        self.compact_output = kwargs.get("compact_output", False)
\ No newline at end of file
@@ -1,8 +1,11 @@
+# Entries without a "template_path" have their template built from the label dimensions, see
+# template_synth for the fields they need.
 label_templates = {
     "LCRY-1700": {
         "display_name": "Cryo-Babies 1.28 x 0.50",
         "template_path": "templates/LCRY-1700.docx",
         "label_width": 1.28,
+        "label_height": 0.50,
         "labels_across": 5,
         "labels_down": 17,
         "chars_per_line": 45,
@@ -15,6 +18,7 @@ label_templates = {
         "display_name": "Cryo-Tags 1.50 x 0.75",
         "template_path": "templates/LCRY-1200.docx",
         "label_width": 1.50,
+        "label_height": 0.75,
         "labels_across": 5,
         "labels_down": 12,
         "chars_per_line": 45,
@@ -27,6 +31,7 @@ label_templates = {
         "display_name": "Cryo-Babies 0.94 x 0.50",
         "template_path": "templates/LCRY-2380.docx",
         "label_width": 0.94,
+        "label_height": 0.50,
         "labels_across": 7,
         "labels_down": 17,
         "chars_per_line": 45,
@@ -39,6 +44,7 @@ label_templates = {
         "display_name": "Cryo-Tags 1.69 x 0.75",
         "template_path": "templates/LCRY-1100.docx",
         "label_width": 1.69,
+        "label_height": 0.75,
         "labels_across": 4,
         "labels_down": 13,
         "chars_per_line": 45,
@@ -51,6 +57,7 @@ label_templates = {
         "display_name": "Cryo-Tags 2.625 x 1.0",
         "template_path": "templates/LCRY-1258.docx",
         "label_width": 2.625,
+        "label_height": 1.0,
         "labels_across": 3,
         "labels_down": 10,
         "chars_per_line": 45,
@@ -63,6 +70,7 @@ label_templates = {
         "display_name": "Sidewall Cryo-Tags 1.50 x 0.25",
         "template_path": "templates/SIDE-1000.docx",
         "label_width": 1.50,
+        "label_height": 0.25,
         "labels_across": 4,
         "labels_down": 39,
         "chars_per_line": 45,
@@ -75,6 +83,7 @@ label_templates = {
         "display_name": "Tough-Spots 3/8 in",
         "template_path": "templates/SPOT-1000.docx",
         "label_width": 0.375,
+        "label_height": 0.375,
         "labels_across": 12,
         "labels_down": 16,
         "chars_per_line": 27,
@@ -87,6 +96,7 @@ label_templates = {
         "display_name": "Tough-Spots 1/2 in",
         "template_path": "templates/SPOT-2000.docx",
         "label_width": 0.5,
+        "label_height": 0.5,
         "labels_across": 12,
         "labels_down": 16,
         "chars_per_line": 27,
@@ -99,6 +109,7 @@ label_templates = {
         "display_name": "Tough-Spots 3/4 in",
         "template_path": "templates/SPOT-3000.docx",
         "label_width": 0.75,
+        "label_height": 0.75,
         "labels_across": 9,
         "labels_down": 12,
         "chars_per_line": 27,
@@ -112,6 +123,7 @@ label_templates = {
         "display_name": "Tough-Spots 1.00 in",
         "template_path": "templates/SPOT-4000.docx",
         "label_width": 1.0,
+        "label_height": 1.0,
         "labels_across": 7,
         "labels_down": 9,
         "chars_per_line": 27,
@@ -124,6 +136,7 @@ label_templates = {
         "display_name": "Tough-Spots 7/16 in",
         "template_path": "templates/SPOT-5000.docx",
         "label_width": 0.4375,
+        "label_height": 0.4375,
         "labels_across": 13,
         "labels_down": 18,
         "chars_per_line": 27,
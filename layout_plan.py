@@ -0,0 +1,243 @@
+"""
+Per-job label sheet geometry.
+
+A LayoutPlan holds everything `main()` needs to know about where labels go: the table rows and
+columns that hold labels, the usable slots on the (possibly partial) first page, the flat `w:tc`
+index of every slot, and how many labels fit on the first and on every later page. Plans are
+immutable and cached per template and partial-sheet selection, so the geometry is worked out once
+and reused across jobs. The cache key includes the template's version (file modification time or
+synthesized geometry, and its `label_templates` entry), so editing either builds a new plan. Slot numbering and page arithmetic are closed-form (see `slot_map`).
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from label_templates import label_templates
+from file_io import resource_path
+from label_format import (
+    get_row_and_column_indices,
+    get_first_page_row_indices,
+    get_first_page_col_indices,
+    get_label_slots,
+)
+from slot_map import SheetSlots, SlotMap
+from template_synth import (
+    get_synthetic_template_path,
+    get_synthetic_template_key,
+    is_synthetic_path,
+)
+from template_registry import template_registry, get_template_cell_grid
+
+
+@dataclass(frozen=True)
+class LayoutPlan:
+    """
+    Slot addresses and page capacities for one template and partial-sheet selection.
+
+    Row and column values are indices into the template table (spacer rows and columns are
+    already skipped).
+    """
+
+    labeltemplate: str
+    templatepath: str
+    needs_page_break: bool
+    row_indices: tuple
+    column_indices: tuple
+    first_page_row_indices: tuple
+    first_page_first_row_col_indices: tuple
+    first_page_last_row_col_indices: tuple
+    max_labels_per_page: int
+    first_page_max_labels: int
+    first_page_slots: tuple
+    page_slots: tuple
+    sheet_slots: SheetSlots
+
+    def slots_for_page(self, page_index):
+        """
+        Returns the flat `w:tc` index of every label slot on a page, in fill order.
+
+        Args:
+            page_index (int): Zero-based page number.
+
+        Returns:
+            tuple: Flat cell indices into the template table.
+        """
+        return self.first_page_slots if page_index == 0 else self.page_slots
+
+    def page_bounds(self, page_index):
+        """
+        Returns the range of job label indices that fall on a page.
+
+        Args:
+            page_index (int): Zero-based page number.
+
+        Returns:
+            tuple: (start, end) label indices; `end` is exclusive and may exceed the job size on
+            the last page.
+        """
+        if page_index == 0:
+            return 0, self.first_page_max_labels
+        start = self.first_page_max_labels + (page_index - 1) * self.max_labels_per_page
+        return start, start + self.max_labels_per_page
+
+    def slot_map(self, item_count, copies=1):
+        """
+        Returns the page and slot numbering of a job with this layout.
+
+        Args:
+            item_count (int): Data items of the job.
+            copies (int): Copies of each item.
+
+        Returns:
+            SlotMap: The job's slot map.
+        """
+        return SlotMap(self.first_page_max_labels, self.max_labels_per_page, item_count, copies)
+
+    def label_index_at(self, page_index, row, col):
+        """
+        Returns the job label index printed at a position on the sheet.
+
+        Args:
+            page_index (int): Zero-based page number.
+            row (int): Label row on the sheet (1-based).
+            col (int): Label column on the sheet (1-based).
+
+        Returns:
+            int: Zero-based index of the label within the job.
+
+        Raises:
+            ValueError: If the position is off the sheet or not used on that page.
+        """
+        on_sheet = 1 <= row <= len(self.row_indices) and 1 <= col <= len(self.column_indices)
+        if page_index < 0 or not on_sheet:
+            raise ValueError(f"Page {page_index + 1}, row {row}, column {col} is not on the sheet")
+        slot = self.sheet_slots.slot_at(page_index, row, col)
+        if slot is None:
+            raise ValueError(f"Page {page_index + 1}, row {row}, column {col} holds no label")
+        return self.page_bounds(page_index)[0] + slot
+
+
+def get_template_meta(labeltemplate):
+    """
+    Returns the `label_templates` entry of a template, registering discovered templates first if
+    it is not known yet.
+
+    Raises:
+        KeyError: If there is no such template.
+    """
+    if labeltemplate not in label_templates:
+        template_registry.register(label_templates)
+    return label_templates[labeltemplate]
+
+
+def get_layout_plan(spec):
+    """
+    Returns the cached LayoutPlan for a preset's template and partial-sheet settings.
+
+    Args:
+        spec (LabelSpec): Preset specification.
+
+    Returns:
+        LayoutPlan: The layout for the job.
+    """
+    template_meta = get_template_meta(spec.labeltemplate)
+    labels_down = template_meta.get("labels_down", 99)
+    labels_across = template_meta.get("labels_across", 99)
+
+    if spec.partialsheet == True:
+        row_start = spec.row_start or 1
+        row_end = spec.row_end or labels_down
+        col_start = spec.col_start or 1
+        col_end = spec.col_end or labels_across
+    else:
+        row_start, row_end, col_start, col_end = 1, labels_down, 1, labels_across
+
+    version = get_template_version(spec.labeltemplate, template_meta)
+    return build_layout_plan(spec.labeltemplate, row_start, row_end, col_start, col_end, version)
+
+
+def get_template_path(labeltemplate, template_meta):
+    """Returns the template file of a stock, or its "synth://" path if it has none."""
+    if "template_path" in template_meta:
+        return resource_path(template_meta["template_path"])
+    return get_synthetic_template_path(labeltemplate)
+
+
+def get_template_version(labeltemplate, template_meta):
+    """
+    Returns what identifies the current version of a stock's template.
+
+    Args:
+        labeltemplate (str): Key into `label_templates`.
+        template_meta (dict): The stock's `label_templates` entry.
+
+    Returns:
+        tuple: (file modification time or synthesized geometry, serialized stock entry).
+    """
+    templatepath = get_template_path(labeltemplate, template_meta)
+    if is_synthetic_path(templatepath):
+        template_key = get_synthetic_template_key(templatepath)
+    else:
+        template_key = os.path.getmtime(templatepath)
+    return template_key, json.dumps(template_meta, sort_keys=True, default=str)
+
+
+@lru_cache(maxsize=64)
+def build_layout_plan(labeltemplate, row_start, row_end, col_start, col_end, version=None):
+    """
+    Builds the LayoutPlan for a template and a first-page range of labels.
+
+    Args:
+        labeltemplate (str): Key into `label_templates`.
+        row_start (int): First label row used on the first page (1-based).
+        row_end (int): Last label row used on the first page (1-based).
+        col_start (int): First label column used on the first row of the first page (1-based).
+        col_end (int): Last label column used on the last row of the first page (1-based).
+        version (tuple, optional): Result of `get_template_version`. It is not read here; it
+            keeps plans of an edited template or stock entry apart in the cache.
+
+    Returns:
+        LayoutPlan: The layout.
+    """
+    template_meta = get_template_meta(labeltemplate)
+    templatepath = get_template_path(labeltemplate, template_meta)
+    row_indices, column_indices = get_row_and_column_indices(
+        templatepath, template_meta["table_format"]
+    )
+    row_end = min(row_end, len(row_indices))
+    sheet_slots = SheetSlots(
+        len(row_indices), len(column_indices), row_start, row_end, col_start, col_end
+    )
+
+    first_page_row_indices = get_first_page_row_indices(row_start, row_end, row_indices)
+    first_page_first_row_col_indices, first_page_last_row_col_indices = (
+        get_first_page_col_indices(col_start, col_end, row_start, row_end, column_indices)
+    )
+    cell_grid = get_template_cell_grid(templatepath)
+
+    return LayoutPlan(
+        labeltemplate=labeltemplate,
+        templatepath=templatepath,
+        needs_page_break=template_meta["needs_page_break"],
+        row_indices=tuple(row_indices),
+        column_indices=tuple(column_indices),
+        first_page_row_indices=tuple(first_page_row_indices),
+        first_page_first_row_col_indices=tuple(first_page_first_row_col_indices),
+        first_page_last_row_col_indices=tuple(first_page_last_row_col_indices),
+        max_labels_per_page=sheet_slots.page_capacity,
+        first_page_max_labels=sheet_slots.first_page_capacity,
+        first_page_slots=tuple(
+            get_label_slots(
+                cell_grid,
+                first_page_row_indices,
+                column_indices,
+                first_page_first_row_col_indices,
+                first_page_last_row_col_indices,
+            )
+        ),
+        page_slots=tuple(
+            get_label_slots(cell_grid, row_indices, column_indices, column_indices, column_indices)
+        ),
+        sheet_slots=sheet_slots,
+    )
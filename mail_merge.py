@@ -0,0 +1,304 @@
+"""
+Word mail-merge output for File presets.
+
+Instead of rendering every label, this mode writes a one-page main document and a data source
+next to it. Each label slot of the main document holds the preset's format string with the
+placeholders replaced by MERGEFIELD fields, and every slot after the first starts with a NEXT
+field so Word moves to the next record. The data source is a CSV with one column per
+placeholder, already date-formatted and sliced exactly as rendered labels would be. Word expands
+the labels when the merge runs, so the output size and generation time do not depend on the
+number of rows.
+"""
+
+import copy
+import csv
+import io
+import os
+import re
+from itertools import chain, repeat
+from pathlib import Path
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from label_format import (
+    PLACEHOLDER_PATTERN,
+    TABLE_CELL_PATH,
+    get_placeholder_values,
+    get_cell_format,
+)
+from template_cache import template_cache
+from slot_map import iter_labels
+from output_sinks import FileSink
+from docx_writer import save_document
+
+RT_MAIL_MERGE_SOURCE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/mailMergeSource"
+)
+
+# Elements that come before w:mailMerge in w:settings (CT_Settings sequence)
+SETTINGS_BEFORE_MAIL_MERGE = [
+    "writeProtection", "view", "zoom", "removePersonalInformation", "removeDateAndTime",
+    "doNotDisplayPageBoundaries", "displayBackgroundShape", "printPostScriptOverText",
+    "printFractionalCharacterWidth", "printFormsData", "embedTrueTypeFonts", "embedSystemFonts",
+    "saveSubsetFonts", "saveFormsData", "mirrorMargins", "alignBordersAndEdges",
+    "bordersDoNotSurroundHeader", "bordersDoNotSurroundFooter", "gutterAtTop",
+    "hideSpellingErrors", "hideGrammaticalErrors", "activeWritingStyle", "proofState",
+    "formsDesign", "attachedTemplate", "linkStyles", "stylePaneFormatFilter",
+    "stylePaneSortMethod", "documentType",
+]
+
+MAX_FIELD_NAME_LENGTH = 40
+
+
+def get_merge_field_names(textboxformatinput):
+    """
+    Returns a merge field name for every placeholder of a format string.
+
+    Word field names may only hold letters, digits and underscores, must start with a letter and
+    are limited to 40 characters. Sliced placeholders get the slice appended (e.g. {Name}[2:]
+    becomes "Name_2"), and repeated names are numbered so every placeholder has its own column.
+
+    Args:
+        textboxformatinput (str): Format string with placeholders like "{SampleID}\\n{Date}".
+
+    Returns:
+        list: Field names, one per placeholder, in order.
+    """
+    names = []
+    for match in PLACEHOLDER_PATTERN.finditer(textboxformatinput):
+        name = match.group(2) + (match.group(3) or "")
+        name = re.sub(r"\W+", "_", name).strip("_") or "Field"
+        if not name[0].isalpha():
+            name = f"F_{name}"
+        name = name[:MAX_FIELD_NAME_LENGTH]
+
+        unique_name, n = name, 2
+        while unique_name in names:
+            suffix = f"_{n}"
+            unique_name = name[:MAX_FIELD_NAME_LENGTH - len(suffix)] + suffix
+            n += 1
+        names.append(unique_name)
+    return names
+
+
+def make_field(instruction, run=None):
+    """
+    Creates a simple field (`w:fldSimple`), optionally showing a run as its placeholder result.
+
+    Args:
+        instruction (str): Field code, e.g. "MERGEFIELD SampleID".
+        run (CT_R, optional): Run shown until the field is updated.
+
+    Returns:
+        lxml.etree._Element: The `w:fldSimple` element.
+    """
+    field = OxmlElement("w:fldSimple", {qn("w:instr"): f" {instruction} "})
+    if run is not None:
+        field.append(run)
+    return field
+
+
+def make_merge_paragraph(textboxformatinput, field_names, cell_format, first_in_page):
+    """
+    Builds the paragraph of one label slot of the main document.
+
+    Args:
+        textboxformatinput (str): The preset's format string.
+        field_names (list): Merge field name of each placeholder (see `get_merge_field_names`).
+        cell_format (LabelCellFormat): Font and alignment of the labels.
+        first_in_page (bool): Whether this is the first slot of the page. Every other slot starts
+            with a NEXT field so it shows the next record.
+
+    Returns:
+        CT_P: The paragraph.
+    """
+    paragraph = cell_format.make_paragraph("")
+    run_template = paragraph.r_lst[0]
+    paragraph.remove(run_template)
+
+    def make_run(text):
+        run = copy.deepcopy(run_template)
+        run.text = text
+        return run
+
+    if not first_in_page:
+        paragraph.append(make_field("NEXT"))
+
+    position = 0
+    for match, name in zip(PLACEHOLDER_PATTERN.finditer(textboxformatinput), field_names):
+        if match.start() > position:
+            paragraph.append(make_run(textboxformatinput[position:match.start()]))
+        paragraph.append(make_field(f"MERGEFIELD {name}", make_run(f"«{name}»")))
+        position = match.end()
+    if position < len(textboxformatinput):
+        paragraph.append(make_run(textboxformatinput[position:]))
+    return paragraph
+
+
+def iter_merge_records(runs, layout):
+    """
+    Yields the data source records in merge order.
+
+    Each row is repeated as many times as it has copies. Slots that are skipped on a partial
+    first page get empty records, because Word fills every slot of every page.
+
+    Args:
+        runs (iterable): (label data row, copies) runs.
+        layout (LayoutPlan): Layout of the job.
+
+    Yields:
+        list or None: A record (list of values), or None for an empty slot.
+    """
+    first_page_slots = set(layout.first_page_slots)
+    # Every slot after the first page is used
+    slots_used = chain((slot in first_page_slots for slot in layout.page_slots), repeat(True))
+    labels = iter_labels(runs)
+    skipped = 0
+    for used in slots_used:
+        if not used:
+            skipped += 1
+            continue
+        label = next(labels, None)
+        if label is None:
+            # A short job does not need the padding after its last label
+            return
+        yield from repeat(None, skipped)
+        skipped = 0
+        yield label
+
+
+def write_merge_data_source(stream, spec, field_names, records):
+    """
+    Writes the merge data source as a UTF-8 CSV with one column per placeholder.
+
+    Args:
+        stream (file-like): Writable binary stream, such as an output sink. It is left open.
+        spec (LabelSpec): Preset specification (format string and date format).
+        field_names (list): Column names (see `get_merge_field_names`).
+        records (iterable): Records from `iter_merge_records`.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        writer = csv.writer(text_stream)
+        writer.writerow(field_names)
+        for record in records:
+            if record is None:
+                writer.writerow([""] * len(field_names))
+                continue
+            values = get_placeholder_values(spec.textboxformatinput, record, spec.date_format)
+            writer.writerow([value for _, value in values])
+    finally:
+        text_stream.flush()
+        text_stream.detach()
+
+
+def add_mail_merge_settings(document, data_source_path):
+    """
+    Marks a document as a mailing-labels main document linked to a CSV data source.
+
+    Args:
+        document (docx.document.Document): The main document.
+        data_source_path (str): Path of the CSV data source.
+    """
+    data_source_path = os.path.abspath(data_source_path)
+    settings_part = document.part.part_related_by(RT.SETTINGS)
+    rId = settings_part.relate_to(
+        Path(data_source_path).as_uri(), RT_MAIL_MERGE_SOURCE, is_external=True
+    )
+
+    mail_merge = OxmlElement("w:mailMerge")
+    for tag, value in (
+        ("w:mainDocumentType", "mailingLabels"),
+        ("w:linkToQuery", None),
+        ("w:dataType", "textFile"),
+        ("w:connectString", ""),
+        ("w:query", f"SELECT * FROM `{data_source_path}`"),
+        ("w:dataSource", None),
+        ("w:viewMergedData", None),
+    ):
+        element = OxmlElement(tag)
+        if tag == "w:dataSource":
+            element.set(qn("r:id"), rId)
+        elif value is not None:
+            element.set(qn("w:val"), value)
+        mail_merge.append(element)
+
+    element = settings_part.element
+    existing = element.find(qn("w:mailMerge"))
+    if existing is not None:
+        element.remove(existing)
+    preceding = {qn(f"w:{tag}") for tag in SETTINGS_BEFORE_MAIL_MERGE}
+    index = 0
+    for i, child in enumerate(element):
+        if child.tag in preceding:
+            index = i + 1
+    element.insert(index, mail_merge)
+
+
+def build_mail_merge_document(template, spec, layout, data_source_path):
+    """
+    Builds the one-page mail-merge main document.
+
+    Args:
+        template (CachedTemplate): The label template.
+        spec (LabelSpec): Preset specification.
+        layout (LayoutPlan): Layout of the job.
+        data_source_path (str): Path of the CSV data source.
+
+    Returns:
+        docx.document.Document: The main document.
+    """
+    document = template.new_document()
+    cell_format = get_cell_format(spec.fontname, spec.fontsize, spec.alignment)
+    field_names = get_merge_field_names(spec.textboxformatinput)
+
+    tbl = document.element.body.find(qn("w:tbl"))
+    cells = tbl.findall(TABLE_CELL_PATH)
+    for n, slot in enumerate(layout.page_slots):
+        tc = cells[slot]
+        tc.clear_content()
+        tc.append(
+            make_merge_paragraph(spec.textboxformatinput, field_names, cell_format, n == 0)
+        )
+
+    add_mail_merge_settings(document, data_source_path)
+    return document
+
+
+def write_mail_merge(sink, spec, layout, runs, compression="default"):
+    """
+    Writes the mail-merge main document and its data source ("<name>_data.csv").
+
+    Both files are reserved and written atomically through file sinks. If the data source name
+    is taken, the next free "<name>_data_N.csv" is used and linked instead.
+
+    Args:
+        sink (FileSink): Destination of the main document. Word links the data source by path,
+            so the main document has to be written to a file.
+        spec (LabelSpec): Preset specification.
+        layout (LayoutPlan): Layout of the job.
+        runs (iterable): (label data row, copies) runs.
+        compression (str): "fast", "default" or "small" (see `docx_writer.make_zip_info`).
+
+    Returns:
+        str: Path the main document was saved to.
+
+    Raises:
+        ValueError: If the sink is not a file.
+    """
+    if not isinstance(sink, FileSink):
+        raise ValueError("Mail merge output must be written to a file")
+    output_path = sink.reserve()
+    data_sink = FileSink(os.path.splitext(output_path)[0] + "_data.csv")
+    data_source_path = data_sink.reserve()
+
+    field_names = get_merge_field_names(spec.textboxformatinput)
+    records = iter_merge_records(runs, layout)
+    template = template_cache.get(layout.templatepath)
+    # A failed data source also releases the main document's reserved name
+    with sink.open() as f:
+        with data_sink.open() as data_file:
+            write_merge_data_source(data_file, spec, field_names, records)
+        document = build_mail_merge_document(template, spec, layout, data_source_path)
+        save_document(document, f, compression)
+    return sink.result
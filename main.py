@@ -14,26 +14,40 @@ The resulting document is saved to the specified output path.
 
 import sys
 import re
+import shutil
+from itertools import repeat
 from label_templates import label_templates
-from data_extract import get_data_list_csv, get_data_list_xlsx, remove_duplicate_labels
-from file_io import get_file_path, save_file, get_template, resource_path
+from data_extract import iter_data_runs_csv, iter_data_runs_xlsx, iter_unique_runs
 from label_format import (
-    get_row_and_column_indices,
-    get_first_page_row_indices,
-    get_first_page_col_indices,
     smart_wrap_label_text,
-    get_max_labels_per_page,
-    get_max_labels_first_page,
-    paginate_labels,
-    format_labels_page,
-    combine_docs,
+    PageAssembler,
+    add_label_styles,
 )
 from label_spec import LabelSpec
-from docx import Document
+from layout_plan import get_layout_plan
+from slot_map import LabelRuns, iter_labels
+from barcodes import BarcodeMedia, has_barcodes
+from stream_writer import write_labels_stream, get_label_styles_part
+from parallel_render import render_pages_parallel
+from docx_writer import COMPRESSION_PRESETS, save_document
+from output_sinks import FileSink
+from job_cache import make_job_key
+from mail_merge import write_mail_merge
+from job_estimate import estimate_job
+from zpl_writer import write_zpl_binary
+from pdf_writer import write_labels_pdf
 from data_process import estimate_max_chars
 
+BARCODE_ENGINE_ERROR = "Barcodes are only supported by the 'docx' and 'stream' engines"
+BARCODE_IDENTICAL_ERROR = (
+    "Barcodes are not supported by Identical presets; use an Incremental or File preset"
+)
+
+
 def main(
-    spec: LabelSpec, input_file_path=None, output_file_path=None, text_box_input=None
+    spec: LabelSpec, input_file_path=None, output_file_path=None, text_box_input=None,
+    engine="docx", workers=1, chunksize=4, max_pages_per_file=None, max_labels_per_file=None,
+    compression="default", cache=None, sink=None, dry_run=False
 ):
     """
     Generates formatted labels based on the provided LabelSpec and input data.
@@ -47,100 +61,287 @@ def main(
         input_file_path (str, optional): Path to the CSV or XLSX input file for 'File' presets.
         output_file_path (str, optional): Path to save the generated Word document.
         text_box_input (str, optional): Text or serial prefix for 'Text' presets.
+        engine (str, optional): Rendering engine. "docx" builds the document with python-docx
+            and saves it at the end; "stream" writes pages straight into the output file so
+            memory stays flat for very large jobs. "merge" (File presets only) writes a
+            one-page Word mail-merge main document plus "<name>_data.csv" for Word to expand at
+            print time; the split and cache options do not apply to it. "zpl" writes the
+            labels as "<name>.zpl" for Zebra thermal printers, one ZPL block per label. "pdf"
+            writes a print-ready "<name>.pdf" laid out from the template geometry, without Word.
+        workers (int, optional): Number of processes used to render pages. 1 renders serially.
+        chunksize (int, optional): Number of pages handed to a worker process at a time.
+        max_pages_per_file (int, optional): Split the output into "<name>_part001.docx",
+            "<name>_part002.docx", ... with at most this many pages each. Each part is written
+            to disk as soon as it is full.
+        max_labels_per_file (int, optional): Same as `max_pages_per_file`, capped by labels.
+        compression (str, optional): "fast" stores the document uncompressed, "small" uses the
+            highest deflate level and "default" sits in between. Output bytes depend only on the
+            job, not on when it was run.
+        cache (JobCache, optional): Cache of finished documents. When the same job was run
+            before, the cached document is copied to the output path instead of rendering it
+            again. Ignored when the output is split into parts or not written to a file.
+        sink (OutputSink, optional): Where the document goes, e.g. a `BytesSink` to keep it in
+            memory. Defaults to a `FileSink` at `output_file_path` that opens the file once it
+            is saved.
+        dry_run (bool, optional): Only read the input and work out the size of the job, without
+            rendering or writing anything. The counts are exact: dates are only left unparsed
+            when duplicates are not removed, since they cannot change the count otherwise.
 
     Raises:
-        ValueError: If the input file type is unsupported or the preset type is invalid.
+        ValueError: If the input file type is unsupported, the preset type, engine or
+            compression is invalid, barcodes are used where they cannot be printed, or a barcode
+            value cannot be encoded.
         Exception: For issues during data parsing, formatting, or saving.
 
     Returns:
-        None. The final document is saved to disk.
+        The sink's result (the saved path for files, the bytes for a `BytesSink`), or None for
+        split output and invalid serial input. A dry run returns a `JobEstimate` instead.
     """
 
-    template_meta = label_templates[spec.labeltemplate]
-    templatepath = resource_path(template_meta["template_path"])
-    needs_page_break = template_meta["needs_page_break"]
-    labeltemplateexample = Document(templatepath)
-    table_format = template_meta["table_format"]
-    start_row = getattr(spec, "row_start", 1)
-    end_row = getattr(spec, "row_end", template_meta.get("labels_down", 99))
-    start_col = getattr(spec, "col_start", 1)
-    end_col = getattr(spec, "col_end", template_meta.get("labels_across", 99))
-
-    row_indices, column_indices = get_row_and_column_indices(templatepath, table_format)
-
-    if spec.partialsheet == True:
-        first_page_row_indices = get_first_page_row_indices(
-            start_row, end_row, row_indices
+    layout = get_layout_plan(spec)
+    templatepath = layout.templatepath
+
+    if engine not in ("docx", "stream", "merge", "zpl", "pdf"):
+        raise ValueError("Invalid engine: must be 'docx', 'stream', 'merge', 'zpl' or 'pdf'")
+    if engine == "merge" and spec.presettype != "File":
+        raise ValueError("Mail merge output is only available for File presets")
+    if compression not in COMPRESSION_PRESETS:
+        raise ValueError("Invalid compression: must be 'fast', 'default' or 'small'")
+    if engine in ("merge", "zpl") and has_barcodes(spec.textboxformatinput):
+        raise ValueError(BARCODE_ENGINE_ERROR)
+    if (
+        spec.presettype == "Text"
+        and spec.identical_or_incremental == "Identical"
+        and has_barcodes(spec.textboxformatinput)
+    ):
+        # Identical labels print the text as is, so the placeholders would end up as text
+        raise ValueError(BARCODE_IDENTICAL_ERROR)
+
+    if dry_run:
+        # Differently written dates of the same day are duplicates only once parsed
+        unparsed_dates = (
+            spec.presettype == "File"
+            and spec.date_format != "Leave as is"
+            and spec.remove_duplicates != True
+        )
+        runs = iter_job_runs(spec, layout, input_file_path, text_box_input, unparsed_dates)
+        if runs is None:
+            return None
+        return estimate_job(runs, layout, engine, workers, unparsed_dates)
+
+    if sink is None:
+        sink = FileSink(output_file_path, open_after=True)
+
+    use_cache = (
+        cache is not None
+        and isinstance(sink, FileSink)
+        and engine in ("docx", "stream")
+        and not (max_pages_per_file or max_labels_per_file)
+    )
+    if use_cache:
+        cache_key = make_job_key(
+            spec,
+            templatepath,
+            input_file_path,
+            text_box_input,
+            {"engine": engine, "compression": compression},
         )
-        print(start_row)
-        print(end_row)
-        print(row_indices)
-        first_page_first_row_col_indices, first_page_last_row_col_indices = (
-            get_first_page_col_indices(
-                start_col, end_col, start_row, end_row, column_indices
+        cached_path = cache.get(cache_key)
+        if cached_path is not None:
+            with sink.open() as f, open(cached_path, "rb") as cached:
+                shutil.copyfileobj(cached, f)
+            return sink.result
+
+    # Rows are read and cut into pages as the writer asks for them, so the first pages are
+    # rendered while the input is still being read. Copies travel as (item, count) runs and are
+    # only repeated within the page they are printed on.
+    runs = iter_job_runs(spec, layout, input_file_path, text_box_input)
+    if runs is None:
+        return
+
+    if engine == "merge":
+        return write_mail_merge(sink, spec, layout, runs, compression)
+    if engine == "zpl":
+        # Thermal printers feed labels one at a time, so the pages are written out in order
+        zpl_sink = sink.with_extension(".zpl")
+        with zpl_sink.open() as f:
+            write_zpl_binary(f, iter_labels(runs), spec, label_templates[spec.labeltemplate])
+        return zpl_sink.result
+
+    page_jobs = iter_page_jobs(runs, layout)
+
+    if max_pages_per_file or max_labels_per_file:
+        parts = split_page_jobs(page_jobs, max_pages_per_file, max_labels_per_file)
+        for part_number, part_jobs in enumerate(parts, start=1):
+            write_labels_file(
+                sink.part(part_number),
+                part_jobs,
+                spec,
+                layout,
+                engine,
+                workers,
+                chunksize,
+                compression,
+            )
+        return None
+
+    result = write_labels_file(
+        sink, page_jobs, spec, layout, engine, workers, chunksize, compression
+    )
+    if use_cache:
+        cache.put(cache_key, result)
+    return result
+
+
+def reprint(
+    spec, input_file_path=None, output_file_path=None, text_box_input=None, pages=None,
+    slots=None, engine="docx", compression="default", sink=None
+):
+    """
+    Renders only selected pages or label slots of a job, e.g. to replace smeared labels.
+
+    Which labels fall on a page or slot is worked out from the page capacities of the layout, so
+    only the reprinted pages are rendered, however long the original job was.
+
+    Args:
+        spec (LabelSpec): The preset specification used for the original job.
+        input_file_path (str, optional): Input file of the original job ('File' presets).
+        output_file_path (str, optional): Path to save the reprint document.
+        text_box_input (str, optional): Text input of the original job ('Text' presets).
+        pages (list, optional): Page numbers (1-based) to reprint. Each page is reprinted with
+            the same layout as in the original job.
+        slots (list, optional): (page, row, column) tuples (1-based, counted in labels on the
+            sheet) of single labels to reprint. They are packed onto new pages in the preset's
+            layout, after the reprinted pages.
+        engine (str, optional): "docx", "stream" or "pdf" (see `main`).
+        compression (str, optional): "fast", "default" or "small" (see `main`).
+        sink (OutputSink, optional): Where the reprint goes (see `main`).
+
+    Returns:
+        The sink's result, or None if the serial input is invalid.
+
+    Raises:
+        ValueError: If nothing is selected or a page or slot is not part of the job.
+    """
+    layout = get_layout_plan(spec)
+    labels = get_job_data(spec, layout, input_file_path, text_box_input)
+    if labels is None:
+        return None
+    slot_map = layout.slot_map(labels.total_labels)
+
+    page_jobs = []
+    for page_number in pages or []:
+        if not 1 <= page_number <= slot_map.page_count or slot_map.total_labels == 0:
+            raise ValueError(f"Page {page_number} is not part of the job")
+        page_index = page_number - 1
+        page_jobs.append(
+            (
+                labels.labels(*slot_map.page_bounds(page_index)),
+                layout.slots_for_page(page_index),
+                False,
             )
         )
-        print(first_page_first_row_col_indices, first_page_last_row_col_indices)
-    else:
-        first_page_row_indices = row_indices
-        first_page_first_row_col_indices = column_indices
-        first_page_last_row_col_indices = column_indices
 
-    multi_pages = False
-    final_doc = None
+    if slots:
+        slot_labels = []
+        for page_number, row, col in slots:
+            index = layout.label_index_at(page_number - 1, row, col)
+            if index >= slot_map.total_labels:
+                raise ValueError(f"Page {page_number}, row {row}, column {col} holds no label")
+            slot_labels.append(labels.label_at(index))
+
+        reprint_map = layout.slot_map(len(slot_labels))
+        for i in range(reprint_map.page_count):
+            page_jobs.append(
+                (reprint_map.page_data(slot_labels, i), layout.slots_for_page(i), False)
+            )
+
+    if not page_jobs:
+        raise ValueError("Nothing selected to reprint")
+    page, page_slots, _ = page_jobs[-1]
+    page_jobs[-1] = (page, page_slots, True)
+
+    if sink is None:
+        sink = FileSink(output_file_path, open_after=True)
+    return write_labels_file(sink, page_jobs, spec, layout, engine, compression=compression)
+
+
+def get_job_data(spec, layout, input_file_path=None, text_box_input=None):
+    """
+    Builds the label data of a job, before it is split into pages.
+
+    Args:
+        spec (LabelSpec): Preset specification.
+        layout (LayoutPlan): Layout of the job.
+        input_file_path (str, optional): Path to the CSV or XLSX input file for 'File' presets.
+        text_box_input (str, optional): Text or serial prefix for 'Text' presets.
+
+    Returns:
+        LabelRuns or None: The labels of the job, or None if the serial input of an Incremental
+        preset is invalid.
 
+    Raises:
+        ValueError: If the input file type is unsupported or the preset type is invalid.
+    """
+    runs = iter_job_runs(spec, layout, input_file_path, text_box_input)
+    if runs is None:
+        return None
+    return LabelRuns(runs)
+
+
+def iter_job_runs(
+    spec, layout, input_file_path=None, text_box_input=None, unparsed_dates=False
+):
+    """
+    Sets up the label data of a job as a lazy sequence of (data item, copies) runs.
+
+    The preset and input are checked right away, but input files are only read as the runs are
+    consumed, one row at a time. The copies of a row come from the preset's `copies_column` if
+    it has one, and from `copiesperlabel` otherwise.
 
+    Args:
+        spec (LabelSpec): Preset specification.
+        layout (LayoutPlan): Layout of the job.
+        input_file_path (str, optional): Path to the CSV or XLSX input file for 'File' presets.
+        text_box_input (str, optional): Text or serial prefix for 'Text' presets.
+        unparsed_dates (bool, optional): Read input values as they are, without parsing dates,
+            e.g. when only the labels are counted.
+
+    Returns:
+        iterator or None: (data item, copies) runs in print order, or None if the serial input
+        of an Incremental preset is invalid.
+
+    Raises:
+        ValueError: If the input file type is unsupported or the preset type is invalid.
+    """
+    template_meta = label_templates[spec.labeltemplate]
+    first_page_max_labels = layout.first_page_max_labels
+    max_labels_per_page = layout.max_labels_per_page
 
     if spec.presettype == "File":
+        try:
+            copies = int(spec.copiesperlabel)
+        except (TypeError, ValueError):
+            copies = 1
+
         # Load data from file based on extension
         if input_file_path.lower().endswith(".csv"):
-            data_list = get_data_list_csv(input_file_path, spec.textboxformatinput, spec.date_format)
+            iter_data_runs = iter_data_runs_csv
         elif input_file_path.lower().endswith((".xls", ".xlsx")):
-            data_list = get_data_list_xlsx(input_file_path, spec.textboxformatinput, spec.date_format)
+            iter_data_runs = iter_data_runs_xlsx
         else:
             raise ValueError(
                 "Unsupported file type. Please upload a .csv or .xlsx file."
             )
-        
-        if spec.remove_duplicates == True:
-            data_list = remove_duplicate_labels(data_list)
-
-
-        max_labels_per_page = get_max_labels_per_page(spec, templatepath, table_format)
-
-        first_page_max_labels = get_max_labels_first_page(
-            first_page_row_indices,
-            column_indices,
-            first_page_first_row_col_indices,
-            first_page_last_row_col_indices
-        )
-        first_page, otherpages = paginate_labels(
-            first_page_max_labels, max_labels_per_page, data_list, spec.copiesperlabel
+        date_format = "Leave as is" if unparsed_dates else spec.date_format
+        runs = iter_data_runs(
+            input_file_path, spec.textboxformatinput, date_format, copies, spec.copies_column
         )
-        pages = [first_page]
-        pages = pages + otherpages
-
-        for i, page in enumerate(pages):
-            is_last = (i == len(pages) - 1)
-            formatted_page = format_labels_page(
-                page,
-                templatepath,
-                first_page_row_indices if i == 0 else row_indices,
-                column_indices,
-                first_page_first_row_col_indices if i == 0 else column_indices,
-                first_page_last_row_col_indices if i == 0 else column_indices,
-                spec,
-                needs_page_break,
-                is_last_page=is_last
-            )
 
-            if final_doc is None:
-                final_doc = formatted_page
-            else:
-                final_doc = combine_docs(final_doc, formatted_page)
+        if spec.remove_duplicates == True:
+            runs = iter_unique_runs(runs)
 
-        save_file(output_file_path, final_doc)
-        return
+        return runs
 
     elif spec.presettype == "Text":
         logic = spec.identical_or_incremental
@@ -152,53 +353,15 @@ def main(
                 count = int(spec.copiesperlabel)
             except (TypeError, ValueError):
                 # Fill the page if copiesperlabel is blank or invalid
-                count = get_max_labels_first_page(
-                    first_page_row_indices,
-                    column_indices,
-                    first_page_first_row_col_indices,
-                    first_page_last_row_col_indices
-                )
-
-
-            data_list = [labeltext] * count
-  
-            first_page_max_labels = get_max_labels_first_page(
-                first_page_row_indices,
-                column_indices,
-                first_page_first_row_col_indices,
-                first_page_last_row_col_indices,
-            )
-            max_labels_per_page = get_max_labels_per_page(spec, templatepath, table_format)
-            
-            firstpage, otherpages = [*paginate_labels(first_page_max_labels, max_labels_per_page, data_list, 1)]
-            
-            pages = [firstpage]
-
-            pages = pages + otherpages
-
-            for i, page in enumerate(pages):
-                is_last = (i == len(pages) - 1)
-                formatted_page = format_labels_page(
-                    page,
-                    templatepath,
-                    first_page_row_indices if i == 0 else row_indices,
-                    column_indices,
-                    first_page_first_row_col_indices if i == 0 else column_indices,
-                    first_page_last_row_col_indices if i == 0 else column_indices,
-                    spec,
-                    needs_page_break,
-                    is_last_page=is_last
-                )
-                if final_doc is None:
-                    final_doc = formatted_page
-                else:
-                    final_doc = combine_docs(final_doc, formatted_page)
-            
+                count = first_page_max_labels
+
+            return iter([(labeltext, count)])
+
         elif logic == "Incremental":
             num_pages = spec.pages_of_labels
             match = re.match(r"([A-Za-z0-9\-_]*?)(\d+)$", text_box_input)
             if not match:
-                return
+                return None
 
             prefix, start_num = match.groups()
             num_digits = len(start_num)
@@ -209,64 +372,172 @@ def main(
             except (TypeError, ValueError):
                 count = 1
 
-            first_page_max_labels = get_max_labels_first_page(
-                first_page_row_indices,
-                column_indices,
-                first_page_first_row_col_indices,
-                first_page_last_row_col_indices,
-            )
-
-            max_labels_per_page = get_max_labels_per_page(
-                spec, templatepath, table_format
-            )
             labelcount_additional_pages = max_labels_per_page * (num_pages - 1)
 
             num_serials = (first_page_max_labels + labelcount_additional_pages) // count
-            data_list = []
             label_width = template_meta["label_width"]
             font_size = float(spec.fontsize)
-            
+
             font_name = "Arial"
             max_chars = estimate_max_chars(label_width, font_size, font_name)
-            for i in range(start, start + num_serials):
-                serial_num = f"{i:0{num_digits}d}"
-                serial = f"{prefix}{serial_num}"
-                for _ in range(count):
-                    label = smart_wrap_label_text(serial, max_chars, prefix)                 
-                    data_list.append([label])
-
-            firstpage, otherpages = paginate_labels(
-                first_page_max_labels, max_labels_per_page, data_list, 1
+            labels = (
+                smart_wrap_label_text(f"{prefix}{i:0{num_digits}d}", max_chars, prefix)
+                for i in range(start, start + num_serials)
             )
+            return (([label], count) for label in labels)
 
-            pages = [firstpage]
+    else:
+        raise ValueError("Invalid presettype: must be 'Text' or 'File'")
+
+
+def iter_page_jobs(runs, layout):
+    """
+    Cuts (data item, copies) runs into pages as they arrive.
+
+    Only the page being filled is held in memory; the run after it is read ahead to tell whether
+    the page is the last one. A job without labels still has one, empty, page.
 
-            pages = pages + otherpages
+    Args:
+        runs (iterable): (data item, copies) runs in print order.
+        layout (LayoutPlan): Layout of the job.
 
-            for i, page in enumerate(pages):
-                is_last = (i == len(pages) - 1)
-                formatted_page = format_labels_page(
-                    page,
-                    templatepath,
-                    first_page_row_indices if i == 0 else row_indices,
-                    column_indices,
-                    first_page_first_row_col_indices if i == 0 else column_indices,
-                    first_page_last_row_col_indices if i == 0 else column_indices,
-                    spec,
-                    needs_page_break,
-                    is_last_page=is_last
-                )
+    Yields:
+        tuple: (page data, label slots, is last page) for each page.
+    """
+    runs = iter(runs)
+    item, remaining = None, 0
+    page_index = 0
+    capacity = layout.first_page_max_labels
+    while True:
+        page = []
+        while True:
+            while remaining == 0:
+                run = next(runs, None)
+                if run is None:
+                    break
+                item, remaining = run
+            if remaining == 0 or len(page) == capacity:
+                break
+            count = min(remaining, capacity - len(page))
+            page.extend(repeat(item, count))
+            remaining -= count
+
+        is_last = remaining == 0
+        yield page, layout.slots_for_page(page_index), is_last
+        if is_last:
+            return
+        page_index += 1
+        capacity = layout.max_labels_per_page
+
+
+def write_labels_file(
+    sink, page_jobs, spec, layout, engine="docx", workers=1, chunksize=4, compression="default"
+):
+    """
+    Renders pages and writes them to one output document.
 
-                if final_doc is None:
-                    final_doc = formatted_page
-                else:
-                    final_doc = combine_docs(final_doc, formatted_page)
+    Pages are pulled from `page_jobs` one at a time, so it can be a generator.
 
+    Args:
+        sink (OutputSink): Where the document goes.
+        page_jobs (iterable): Per-page tuples of (data, label slots, is last page).
+        spec (LabelSpec): Preset specification.
+        layout (LayoutPlan): Layout of the job.
+        engine (str): "docx", "stream" or "pdf" (see `main`).
+        workers (int): Number of processes used to render pages.
+        chunksize (int): Number of pages handed to a worker process at a time.
+        compression (str): "fast", "default" or "small" (see `main`).
 
+    Returns:
+        The sink's result (see `main`).
+    """
+    templatepath = layout.templatepath
+    needs_page_break = layout.needs_page_break
+
+    if engine == "pdf":
+        if has_barcodes(spec.textboxformatinput):
+            raise ValueError(BARCODE_ENGINE_ERROR)
+        pdf_sink = sink.with_extension(".pdf")
+        with pdf_sink.open() as f:
+            write_labels_pdf(f, templatepath, page_jobs, spec)
+        return pdf_sink.result
+
+    media = None
+    if has_barcodes(spec.textboxformatinput):
+        # Numbers the drawings and gathers the barcode images the pages use
+        media = BarcodeMedia()
+
+    assembler = PageAssembler(templatepath, needs_page_break, compact=spec.compact_output)
+    if workers and workers > 1:
+        page_elements = render_pages_parallel(
+            templatepath, needs_page_break, spec, page_jobs, workers, chunksize, media
+        )
     else:
-        raise ValueError("Invalid presettype: must be 'Text' or 'File'")
+        page_elements = (
+            assembler.render_page(page, slots, spec, is_last_page=is_last)
+            for page, slots, is_last in page_jobs
+        )
 
-    save_file(output_file_path, final_doc)
+    if media is not None:
+        page_elements = media.collect_pages(page_elements)
+
+    if engine == "stream":
+        # Pages are serialized straight into the output zip and dropped
+        part_overrides = None
+        if spec.compact_output:
+            part_overrides = dict([get_label_styles_part(templatepath, spec)])
+        with sink.open() as f:
+            write_labels_stream(
+                f, templatepath, page_elements, part_overrides, compression, media
+            )
+    else:
+        if spec.compact_output:
+            add_label_styles(assembler.document.styles.element, spec)
+        for elements in page_elements:
+            assembler.append_page(elements)
+        if media is not None:
+            media.add_to_document(assembler.document)
+        with sink.open() as f:
+            save_document(assembler.document, f, compression)
+    return sink.result
+
+
+def split_page_jobs(page_jobs, max_pages_per_file=None, max_labels_per_file=None):
+    """
+    Groups pages into output parts of bounded size.
+
+    A part is closed as soon as the next page would take it past either limit. Pages are never
+    split, so a single page larger than `max_labels_per_file` still forms a part of its own. The
+    last page of every part is marked as last so the part does not end with a page break.
+
+    Args:
+        page_jobs (iterable): Per-page tuples of (data, label slots, is last page).
+        max_pages_per_file (int, optional): Maximum number of pages per part.
+        max_labels_per_file (int, optional): Maximum number of labels per part.
+
+    Yields:
+        list: Page tuples of one part.
+    """
+    part = []
+    part_labels = 0
+    for page, slots, _ in page_jobs:
+        if part and (
+            (max_pages_per_file and len(part) >= max_pages_per_file)
+            or (max_labels_per_file and part_labels + len(page) > max_labels_per_file)
+        ):
+            yield _close_part(part)
+            part = []
+            part_labels = 0
+        part.append((page, slots, False))
+        part_labels += len(page)
+    if part:
+        yield _close_part(part)
+
+
+def _close_part(part):
+    page, slots, _ = part[-1]
+    part[-1] = (page, slots, True)
+    return part
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+"""
+Destinations for finished label documents.
+
+Every writer (docx, stream, PDF, ZPL, mail merge) writes one document into a binary stream
+handed out by a sink, so the same job can end up in a file, in memory or in a caller's stream:
+
+- FileSink writes to a temporary file next to the target and renames it into place once the
+  document is complete, so a half-written file is never left under the final name. The final
+  name is reserved up front with an exclusive create, so two jobs can never pick the same name.
+- BytesSink keeps the document in memory, for service and batch callers that do not want to
+  touch the disk.
+- StreamSink writes into a binary stream owned by the caller, such as an HTTP response.
+
+Opening the saved file afterwards is optional and never blocks the caller.
+"""
+
+import io
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+def reserve_file_path(filepath):
+    """
+    Reserves the desired path, or the first free "name_N.ext" variant if it is taken.
+
+    The path is claimed by creating an empty file with an exclusive create, so concurrent jobs
+    cannot end up with the same name.
+
+    Args:
+        filepath (str): The desired path to save the file.
+
+    Returns:
+        str: The reserved path. An empty file exists there until the document replaces it. It
+        is created with the permissions of a plain `open` (0o666 less the umask).
+    """
+    filename, extension = os.path.splitext(filepath)
+    candidate = filepath
+    counter = 1
+    while True:
+        try:
+            fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            candidate = f"{filename}_{counter}{extension}"
+            counter += 1
+            continue
+        os.close(fd)
+        return candidate
+
+
+def get_part_file_path(filepath, part_number):
+    """
+    Returns the path of one part of a split output, e.g. "labels_part003.docx".
+
+    Args:
+        filepath (str): Path requested for the whole output.
+        part_number (int): 1-based part number.
+
+    Returns:
+        str: Path for the part.
+    """
+    filename, extension = os.path.splitext(filepath)
+    return f"{filename}_part{part_number:03d}{extension}"
+
+
+def open_file(filepath):
+    """
+    Opens a saved file with its default application without waiting for it.
+
+    Uses `os.startfile` on Windows, `open` on macOS and `xdg-open` elsewhere. The launcher runs
+    in a background thread, and a missing launcher (e.g. on a headless server) only prints a
+    warning.
+
+    Args:
+        filepath (str): Path of the file to open.
+    """
+    def launch():
+        try:
+            if sys.platform.startswith("win"):
+                os.startfile(filepath)
+            elif sys.platform == "darwin":
+                subprocess.Popen(["open", filepath])
+            else:
+                subprocess.Popen(
+                    ["xdg-open", filepath],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+        except OSError as e:
+            print(f"Warning: could not open {filepath}: {e}")
+
+    threading.Thread(target=launch, daemon=True).start()
+
+
+class OutputSink:
+    """
+    Base class of document destinations.
+
+    Subclasses implement `open()`, a context manager that yields a writable binary stream for
+    one document and finalizes it when the block exits without an error.
+    """
+
+    def open(self):
+        raise NotImplementedError
+
+    def with_extension(self, extension):
+        """
+        Returns the sink to use for a document with a different file type, e.g. ".pdf".
+
+        Sinks that are not files ignore the extension.
+        """
+        return self
+
+    def part(self, part_number):
+        """
+        Returns the sink for one part of a split output.
+
+        Raises:
+            ValueError: If the sink can only hold a single document.
+        """
+        raise ValueError(f"{type(self).__name__} cannot hold split output")
+
+    @property
+    def result(self):
+        """What the finished document is available as (path, bytes or stream)."""
+        return None
+
+
+class FileSink(OutputSink):
+    """
+    Writes a document to a file, atomically.
+
+    Args:
+        filepath (str): Desired path. If it is taken, "name_1.ext", "name_2.ext", ... is used.
+        open_after (bool): Open the file with its default application once it is saved.
+    """
+
+    def __init__(self, filepath, open_after=False):
+        self.filepath = filepath
+        self.open_after = open_after
+        self.path = None
+
+    def with_extension(self, extension):
+        return FileSink(os.path.splitext(self.filepath)[0] + extension, self.open_after)
+
+    def part(self, part_number):
+        # Only the first part is opened, so a long job does not launch dozens of windows
+        return FileSink(
+            get_part_file_path(self.filepath, part_number),
+            self.open_after and part_number == 1,
+        )
+
+    def reserve(self):
+        """
+        Reserves the output path before the document is written.
+
+        Returns:
+            str: The path the document will be saved to.
+        """
+        if self.path is None:
+            self.path = reserve_file_path(self.filepath)
+        return self.path
+
+    @contextmanager
+    def open(self):
+        path = self.reserve()
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            # mkstemp files are owner-only; give the document the permissions of the
+            # reserved file instead, as if it had been written in place
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+            os.replace(temp_path, path)
+        except BaseException:
+            for leftover in (temp_path, path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            self.path = None
+            raise
+
+        if self.open_after:
+            open_file(path)
+
+    @property
+    def result(self):
+        return self.path
+
+
+class BytesSink(OutputSink):
+    """Keeps a document in memory; the bytes are in `data` once it is written."""
+
+    def __init__(self):
+        self.data = None
+
+    @contextmanager
+    def open(self):
+        buffer = io.BytesIO()
+        yield buffer
+        self.data = buffer.getvalue()
+
+    @property
+    def result(self):
+        return self.data
+
+
+class StreamSink(OutputSink):
+    """
+    Writes a document into a binary stream owned by the caller. The stream is not closed.
+
+    Args:
+        stream (file-like): Writable binary stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    @contextmanager
+    def open(self):
+        yield self.stream
+        self.stream.flush()
+
+    @property
+    def result(self):
+        return self.stream
@@ -0,0 +1,101 @@
+"""
+Parallel page rendering for large label jobs.
+
+Pages are independent of each other, so they can be filled in worker processes. Each worker
+keeps its own template cache, receives the page data plus its layout, and sends the page back as
+serialized XML. The parent parses the results in page order, so the output is identical to the
+serial path. Barcode images used by a chunk are sent back with it and handed to the output
+document's `BarcodeMedia`, so the parent can embed them. Only a few chunks of pages are in
+flight at a time, so pages can be fed from a generator without the whole job being queued up
+front.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from lxml import etree
+from docx.oxml import parse_xml
+from label_format import PageAssembler
+from barcodes import barcode_cache, get_image_digests, has_barcodes
+
+_assemblers = {}
+
+
+def _get_assembler(templatepath, needs_page_break, compact=False):
+    key = (templatepath, needs_page_break, compact)
+    if key not in _assemblers:
+        _assemblers[key] = PageAssembler(templatepath, needs_page_break, compact)
+    return _assemblers[key]
+
+
+def render_chunk_xml(job):
+    """
+    Renders a chunk of pages in a worker process.
+
+    Args:
+        job (tuple): (templatepath, needs_page_break, spec, chunk), where `chunk` is a list of
+            (page data, label slots, is last page) tuples.
+
+    Returns:
+        tuple: (pages, images). `pages` holds a list of the serialized XML (bytes) of each body
+        element, per page, and `images` maps the digest of every barcode the pages show to its
+        PNG bytes.
+    """
+    templatepath, needs_page_break, spec, chunk = job
+    assembler = _get_assembler(templatepath, needs_page_break, spec.compact_output)
+    with_barcodes = has_barcodes(spec.textboxformatinput)
+    pages = []
+    digests = set()
+    for page, slots, is_last_page in chunk:
+        elements = assembler.render_page(page, slots, spec, is_last_page=is_last_page)
+        if with_barcodes:
+            digests |= get_image_digests(elements)
+        pages.append([etree.tostring(element) for element in elements])
+    images = {digest: barcode_cache.png(digest) for digest in digests}
+    barcode_cache.trim()
+    return pages, images
+
+
+def render_pages_parallel(
+    templatepath, needs_page_break, spec, page_jobs, workers, chunksize=4, media=None
+):
+    """
+    Renders pages in a process pool and yields them in page order.
+
+    Up to two chunks per worker are submitted ahead of the page being yielded; the next chunk is
+    only read from `page_jobs` when one is taken off the queue.
+
+    Args:
+        templatepath (str): Path to the label template file.
+        needs_page_break (bool): Whether pages must be separated by an explicit page break.
+        spec (LabelSpec): Preset specification.
+        page_jobs (iterable): Per-page tuples of (data, label slots, is last page).
+        workers (int): Number of worker processes.
+        chunksize (int): Number of pages sent to a worker at a time.
+        media (BarcodeMedia, optional): Receives the barcode images of the pages.
+
+    Yields:
+        list: Body elements of each page, as returned by `PageAssembler.render_page`.
+    """
+    page_jobs = iter(page_jobs)
+    chunksize = max(1, chunksize)
+    chunks = iter(lambda: list(islice(page_jobs, chunksize)), [])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(
+                executor.submit(render_chunk_xml, (templatepath, needs_page_break, spec, chunk))
+            )
+            if len(pending) < 2 * workers:
+                continue
+            yield from _parse_chunk(pending.popleft().result(), media)
+        while pending:
+            yield from _parse_chunk(pending.popleft().result(), media)
+
+
+def _parse_chunk(result, media):
+    pages, images = result
+    if media is not None:
+        media.add_images(images)
+    for page_xml in pages:
+        yield [parse_xml(xml) for xml in page_xml]
@@ -0,0 +1,383 @@
+"""
+Native PDF output, laid out directly from the label templates.
+
+The PDF backend places every label at the position its cell has in the template table: page
+size and margins come from the section properties, column widths from the table grid and row
+heights from the exact row heights, so spacer rows and columns are kept as they are in Word.
+Text is set in the bold standard PDF fonts (Helvetica, Times or Courier), which every viewer
+and printer has built in, so no fonts are embedded and no Word layout step is needed. Pages are
+written to the file as they are produced and only the small page index is kept until the end.
+"""
+
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from docx.oxml.ns import qn
+from label_format import LastValueMemo, get_label_text, get_label_string
+from template_cache import template_cache
+from template_synth import get_twips
+
+TWIPS_PER_POINT = 20
+DEFAULT_CELL_MARGIN = 108  # twips; Word's default left/right table cell margin
+
+# Advance widths (1/1000 em) of WinAnsiEncoding codes 32-255, from the Adobe Core 14 AFM files
+HELVETICA_BOLD_WIDTHS = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584, 350,
+    556, 350, 278, 556, 500, 1000, 556, 556, 333, 1000, 667, 333, 1000, 350, 611, 350,
+    350, 278, 278, 500, 500, 350, 556, 1000, 333, 1000, 556, 333, 944, 350, 500, 667,
+    278, 333, 556, 556, 556, 556, 280, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 611, 556, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    722, 722, 722, 722, 722, 722, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 556, 556, 556, 556, 556, 278, 278, 278, 278,
+    611, 611, 611, 611, 611, 611, 611, 584, 611, 611, 611, 611, 611, 556, 611, 556,
+)
+
+TIMES_BOLD_WIDTHS = (
+    250, 333, 555, 500, 500, 1000, 833, 278, 333, 333, 500, 570, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 333, 333, 570, 570, 570, 500,
+    930, 722, 667, 722, 722, 667, 611, 778, 778, 389, 500, 778, 667, 944, 722, 778,
+    611, 778, 722, 556, 667, 722, 722, 1000, 722, 722, 667, 333, 278, 333, 581, 500,
+    333, 500, 556, 444, 556, 444, 333, 500, 556, 278, 333, 556, 278, 833, 556, 500,
+    556, 556, 444, 389, 333, 556, 500, 722, 500, 500, 444, 394, 220, 394, 520, 350,
+    500, 350, 333, 500, 500, 1000, 500, 500, 333, 1000, 556, 333, 1000, 350, 667, 350,
+    350, 333, 333, 500, 500, 350, 500, 1000, 333, 1000, 389, 333, 722, 350, 444, 722,
+    250, 333, 500, 500, 500, 500, 220, 500, 333, 747, 300, 500, 570, 333, 747, 333,
+    400, 570, 300, 300, 333, 556, 540, 250, 333, 300, 330, 500, 750, 750, 750, 500,
+    722, 722, 722, 722, 722, 722, 1000, 722, 667, 667, 667, 667, 389, 389, 389, 389,
+    722, 722, 778, 778, 778, 778, 778, 570, 778, 722, 722, 722, 722, 722, 611, 556,
+    500, 500, 500, 500, 500, 500, 722, 444, 444, 444, 444, 444, 278, 278, 278, 278,
+    500, 556, 500, 500, 500, 500, 500, 570, 500, 556, 556, 556, 556, 500, 556, 500,
+)
+
+
+@dataclass(frozen=True)
+class PdfFont:
+    """A bold standard PDF font with the metrics needed to place label text."""
+
+    base_font: str
+    widths: tuple
+    ascent: float       # baseline offset below the line top, in em
+    line_height: float  # single line spacing, in em
+
+    def text_width(self, text, fontsize):
+        """Returns the width of `text` in points."""
+        total = 0
+        for byte in encode_pdf_text(text):
+            total += self.widths[byte - 32] if byte >= 32 else 0
+        return total * fontsize / 1000
+
+
+PDF_FONTS = {
+    "helvetica": PdfFont("Helvetica-Bold", HELVETICA_BOLD_WIDTHS, 0.905, 1.149),
+    "times": PdfFont("Times-Bold", TIMES_BOLD_WIDTHS, 0.891, 1.15),
+    "courier": PdfFont("Courier-Bold", (600,) * 224, 0.833, 1.133),
+}
+
+
+def get_pdf_font(fontname):
+    """
+    Returns the standard PDF font closest to a preset font.
+
+    Times and Courier families map to their standard fonts; everything else (Arial, Calibri, ...)
+    uses Helvetica, which has the same metrics as Arial.
+
+    Args:
+        fontname (str): Font name from the preset.
+
+    Returns:
+        PdfFont: The font.
+    """
+    name = (fontname or "").lower()
+    if name.startswith("times"):
+        return PDF_FONTS["times"]
+    if name.startswith("courier"):
+        return PDF_FONTS["courier"]
+    return PDF_FONTS["helvetica"]
+
+
+def encode_pdf_text(text):
+    """Encodes text for a WinAnsiEncoding font; characters it cannot show become "?"."""
+    return text.encode("cp1252", errors="replace")
+
+
+def escape_pdf_string(data):
+    """Escapes encoded text for a PDF literal string."""
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def wrap_label_text(text, font, fontsize, max_width):
+    """
+    Splits label text into lines that fit the label width, breaking at spaces where possible.
+
+    Args:
+        text (str): Label text; newlines always start a new line.
+        font (PdfFont): Font of the text.
+        fontsize (float): Font size in points.
+        max_width (float): Available width in points.
+
+    Returns:
+        list: Lines of text.
+    """
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if font.text_width(candidate, fontsize) <= max_width or not line:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+            # Break words that are wider than the label on their own
+            while font.text_width(line, fontsize) > max_width and len(line) > 1:
+                cut = len(line) - 1
+                while cut > 1 and font.text_width(line[:cut], fontsize) > max_width:
+                    cut -= 1
+                lines.append(line[:cut])
+                line = line[cut:]
+        lines.append(line)
+    return lines
+
+
+@dataclass(frozen=True)
+class SheetGeometry:
+    """
+    Page size and the box of every table cell of a template, in points.
+
+    `cell_boxes` is indexed by the flat `w:tc` index used for label slots; each box is
+    (left, top, width, height) with the origin at the top left of the page.
+    """
+
+    page_width: float
+    page_height: float
+    cell_boxes: tuple
+    cell_margin_left: float
+    cell_margin_right: float
+
+
+@lru_cache(maxsize=16)
+def get_sheet_geometry(templatepath):
+    """
+    Reads the label positions of a template from its section properties and table layout.
+
+    Args:
+        templatepath (str): Path to the label template file.
+
+    Returns:
+        SheetGeometry: Geometry of one sheet.
+    """
+    template = template_cache.get(templatepath)
+    body = template.skeleton.element.body
+    sectPr = body.find(qn("w:sectPr"))
+    tbl = body.find(qn("w:tbl"))
+    tblPr = tbl.find(qn("w:tblPr"))
+
+    page_size = sectPr.find(qn("w:pgSz"))
+    page_margins = sectPr.find(qn("w:pgMar"))
+    cell_margins = tblPr.find(qn("w:tblCellMar"))
+    margin_left = get_twips(
+        cell_margins.find(qn("w:left")) if cell_margins is not None else None,
+        default=DEFAULT_CELL_MARGIN,
+    )
+    margin_right = get_twips(
+        cell_margins.find(qn("w:right")) if cell_margins is not None else None,
+        default=DEFAULT_CELL_MARGIN,
+    )
+
+    grid_columns = [
+        get_twips(col) for col in tbl.findall(qn("w:tblGrid") + "/" + qn("w:gridCol"))
+    ]
+    table_left = get_twips(page_margins, "w:left") + get_twips(tblPr.find(qn("w:tblInd")))
+
+    boxes = []
+    top = get_twips(page_margins, "w:top")
+    for tr in tbl.tr_lst:
+        row_height = get_twips(tr.find(qn("w:trPr") + "/" + qn("w:trHeight")), "w:val")
+        grid_column = 0
+        for tc in tr.tc_lst:
+            left = table_left + sum(grid_columns[:grid_column])
+            width = sum(grid_columns[grid_column:grid_column + tc.grid_span])
+            boxes.append(
+                tuple(v / TWIPS_PER_POINT for v in (left, top, width, row_height))
+            )
+            grid_column += tc.grid_span
+        top += row_height
+
+    return SheetGeometry(
+        page_width=get_twips(page_size, "w:w") / TWIPS_PER_POINT,
+        page_height=get_twips(page_size, "w:h") / TWIPS_PER_POINT,
+        cell_boxes=tuple(boxes),
+        cell_margin_left=margin_left / TWIPS_PER_POINT,
+        cell_margin_right=margin_right / TWIPS_PER_POINT,
+    )
+
+
+class PdfLabelWriter:
+    """
+    Writes label pages to a PDF file one page at a time.
+
+    Object 1 is the catalog, 2 the page tree and 3 the font; page content streams and page
+    objects follow in the order they are written. The catalog, page tree, font and cross-reference
+    table are written by `close()`.
+
+    Args:
+        stream (file-like): Writable binary stream.
+        geometry (SheetGeometry): Sheet layout.
+        spec (LabelSpec): Preset specification with the format and font settings.
+    """
+
+    def __init__(self, stream, geometry, spec):
+        self.stream = stream
+        self.geometry = geometry
+        self.spec = spec
+        self.font = get_pdf_font(spec.fontname)
+        self.fontsize = float(spec.fontsize)
+        self.alignment = (spec.alignment or "center").lower()
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = 4
+        self._position = 0
+        self._lines_memo = LastValueMemo()
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.stream.write(data)
+        self._position += len(data)
+
+    def _write_object(self, object_id, body):
+        self._offsets[object_id] = self._position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _lines_for(self, data, width):
+        # Copies of a row follow each other, so the last layout is reused while the row repeats
+        return self._lines_memo.get((data, width), self._wrap_label)
+
+    def _wrap_label(self, key):
+        data, width = key
+        spec = self.spec
+        text = get_label_string(
+            get_label_text(
+                data, spec.textboxformatinput, spec.date_format, spec.identical_or_incremental
+            )
+        )
+        return wrap_label_text(text, self.font, self.fontsize, width)
+
+    def label_commands(self, data, box):
+        """
+        Returns the content stream commands that draw one label, clipped to its cell.
+
+        Args:
+            data: Label data (a row of values, or the label text).
+            box (tuple): Cell box (left, top, width, height) in points.
+
+        Returns:
+            bytes: PDF content stream commands.
+        """
+        geometry = self.geometry
+        left, top, width, height = box
+        text_left = left + geometry.cell_margin_left
+        text_width = width - geometry.cell_margin_left - geometry.cell_margin_right
+        lines = self._lines_for(data, text_width)
+
+        line_height = self.font.line_height * self.fontsize
+        page_top = geometry.page_height - top
+        commands = [
+            b"q %.2f %.2f %.2f %.2f re W n BT /F1 %.2f Tf"
+            % (left, page_top - height, width, height, self.fontsize)
+        ]
+        baseline = page_top - self.font.ascent * self.fontsize
+        for line in lines:
+            if baseline < page_top - height:
+                break
+            line_width = self.font.text_width(line, self.fontsize)
+            if self.alignment == "right":
+                x = text_left + text_width - line_width
+            elif self.alignment == "left":
+                x = text_left
+            else:
+                x = text_left + (text_width - line_width) / 2
+            commands.append(
+                b"1 0 0 1 %.2f %.2f Tm (%s) Tj"
+                % (x, baseline, escape_pdf_string(encode_pdf_text(line)))
+            )
+            baseline -= line_height
+        commands.append(b"ET Q")
+        return b"\n".join(commands)
+
+    def add_page(self, data_list, slots):
+        """
+        Writes one page of labels.
+
+        Args:
+            data_list (list): Label data in fill order.
+            slots (sequence): Flat `w:tc` index of each label slot, in fill order.
+        """
+        boxes = self.geometry.cell_boxes
+        content = b"\n".join(
+            self.label_commands(data, boxes[slot]) for slot, data in zip(slots, data_list)
+        )
+        content = zlib.compress(content)
+
+        content_id, page_id = self._next_id, self._next_id + 1
+        self._next_id += 2
+        self._write_object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+            + content
+            + b"\nendstream",
+        )
+        self._write_object(
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>" % content_id,
+        )
+        self._page_ids.append(page_id)
+
+    def close(self):
+        """Writes the document catalog, page tree, font and cross-reference table."""
+        geometry = self.geometry
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._write_object(
+            2,
+            b"<< /Type /Pages /Kids [%s] /Count %d /MediaBox [0 0 %.2f %.2f]"
+            b" /Resources << /Font << /F1 3 0 R >> >> >>"
+            % (kids, len(self._page_ids), geometry.page_width, geometry.page_height),
+        )
+        self._write_object(
+            3,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+            % self.font.base_font.encode("ascii"),
+        )
+
+        xref_position = self._position
+        count = self._next_id
+        xref = [b"xref\n0 %d\n" % count, b"0000000000 65535 f \n"]
+        for object_id in range(1, count):
+            xref.append(b"%010d 00000 n \n" % self._offsets[object_id])
+        self._write(b"".join(xref))
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (count, xref_position)
+        )
+
+
+def write_labels_pdf(stream, templatepath, page_jobs, spec):
+    """
+    Writes label pages straight into a PDF stream.
+
+    Args:
+        stream (file-like): Writable binary stream, such as an output sink. It is left open.
+        templatepath (str): Path to the label template file.
+        page_jobs (iterable): Per-page tuples of (data, label slots, is last page).
+        spec (LabelSpec): Preset specification.
+    """
+    writer = PdfLabelWriter(stream, get_sheet_geometry(templatepath), spec)
+    for page, slots, _ in page_jobs:
+        writer.add_page(page, slots)
+    writer.close()
@@ -70,7 +70,7 @@ class PresetEditor(tk.Toplevel):
         if self.preset_type == "Text":
             self.geometry("500x655+70+1") 
         else:
-            self.geometry("500x700+70+1")
+            self.geometry("500x730+70+1")
 
     def _init_template_maps(self):
         self.template_display_map = {v["display_name"]: k for k, v in label_templates.items()}
@@ -94,6 +94,7 @@ class PresetEditor(tk.Toplevel):
         if self.preset_type == "File":
             self.fields.insert(3, ("date_format", "Date Format"))
             self.fields.insert(8, ("remove_duplicates", "Remove Duplicate Labels"))
+            self.fields.insert(3, ("copies_column", "Copies From Column"))
 
 
     def _create_fields_ui(self):
@@ -176,6 +177,13 @@ class PresetEditor(tk.Toplevel):
                 self.entries[key] = cb
 
 
+            elif key == "copies_column":
+                # Blank uses "Copies Per Label" for every row
+                cb = ttk.Combobox(self, values=[""] + self.preset_data.get("saved_headers", []))
+                cb.set(self.preset_data.get(key) or "")
+                cb.grid(row=field_row, column=1, padx=10, pady=2)
+                self.entries[key] = cb
+
             elif key == "copiesperlabel":
                 entry = tk.Entry(self, width=40)
                 entry.insert(0, str(self.preset_data.get(key, "")))
@@ -292,6 +300,8 @@ class PresetEditor(tk.Toplevel):
                             preset[key] = "Leave as is"  # ⬅️ Explicitly stores no format
                         else:
                             preset[key] = DATE_FORMAT_DISPLAY_MAP.get(val, "%m-%d-%Y")
+                    elif key == "copies_column":
+                        preset[key] = val.strip() or None
                     else:
                         preset[key] = int(val) if val.isdigit() else val
 
@@ -438,6 +448,8 @@ class PresetEditor(tk.Toplevel):
 
             filtered_headers = [h for h in headers if h and str(h).strip()]
             self.current_file_headers = filtered_headers  # store them on the instance
+            if "copies_column" in self.entries:
+                self.entries["copies_column"]["values"] = [""] + filtered_headers
 
 
             # Set up an inner frame with a fixed width that will be centered by pack
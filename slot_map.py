@@ -0,0 +1,326 @@
+"""
+Closed-form numbering of label positions.
+
+A job fills the usable positions of the first page, which may start and end part-way through a
+row, and then every position of each later page. Positions are numbered per page in fill order
+("slots", 0-based); rows and columns on the sheet are counted in labels, 1-based, as in the
+partial-sheet settings. Label `k` of a job is copy `k % copies` of data item `k // copies`.
+
+`SheetSlots` maps slots to sheet positions and back, and `SlotMap` maps a job's labels to pages
+and slots. Both answer with arithmetic alone, so any page of a job can be built, reprinted or
+rendered by a worker without walking the pages before it.
+
+When the copy count differs per item, the job is carried as (data item, count) runs instead;
+`iter_labels` expands them lazily and `LabelRuns` looks labels up by index without expanding them.
+"""
+
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import repeat
+
+
+def get_first_page_columns(col_start, col_end, row_start, row_end, labels_across):
+    """
+    Returns the label columns used on the first and on the last row of a partial first page.
+
+    A single-row range uses columns `col_start` to `col_end`. Otherwise the first row runs from
+    `col_start` to the end of the row, and the last row from the first column to `col_end`.
+
+    Args:
+        col_start (int): First column used on the first row (1-based).
+        col_end (int): Last column used on the last row (1-based).
+        row_start (int): First row used (1-based).
+        row_end (int): Last row used (1-based).
+        labels_across (int): Label columns of the sheet.
+
+    Returns:
+        tuple: (first row columns, last row columns) as ranges of 1-based columns. The last row
+        range is empty for a single-row range.
+    """
+    col_end = min(col_end, labels_across)
+    if row_end == row_start:
+        return range(col_start, col_end + 1), range(0)
+    return range(col_start, labels_across + 1), range(1, col_end + 1)
+
+
+@dataclass(frozen=True)
+class SheetSlots:
+    """
+    Slot numbering of a sheet and its partial first page.
+
+    Args:
+        labels_down (int): Label rows of the sheet.
+        labels_across (int): Label columns of the sheet.
+        row_start, row_end, col_start, col_end (int): Partial-sheet range of the first page
+            (1-based, inclusive; see `get_first_page_columns`).
+    """
+
+    labels_down: int
+    labels_across: int
+    row_start: int
+    row_end: int
+    col_start: int
+    col_end: int
+
+    @property
+    def first_page_columns(self):
+        """(first row columns, last row columns) of the first page."""
+        return get_first_page_columns(
+            self.col_start, self.col_end, self.row_start, self.last_row, self.labels_across
+        )
+
+    @property
+    def last_row(self):
+        """Last row used on the first page."""
+        return min(self.row_end, self.labels_down)
+
+    @property
+    def first_page_capacity(self):
+        first_columns, last_columns = self.first_page_columns
+        middle_rows = max(0, self.last_row - self.row_start - 1)
+        return len(first_columns) + middle_rows * self.labels_across + len(last_columns)
+
+    @property
+    def page_capacity(self):
+        return self.labels_down * self.labels_across
+
+    def slot_position(self, page_index, slot):
+        """
+        Returns the sheet position of a slot.
+
+        Args:
+            page_index (int): Zero-based page number.
+            slot (int): Zero-based slot on the page.
+
+        Returns:
+            tuple: (row, column), 1-based.
+
+        Raises:
+            IndexError: If the page has no such slot.
+        """
+        if page_index > 0:
+            if not 0 <= slot < self.page_capacity:
+                raise IndexError(f"Slot {slot} is not on the page")
+            return slot // self.labels_across + 1, slot % self.labels_across + 1
+
+        if not 0 <= slot < self.first_page_capacity:
+            raise IndexError(f"Slot {slot} is not on the first page")
+        first_columns = self.first_page_columns[0]
+        if slot < len(first_columns):
+            return self.row_start, first_columns[slot]
+        slot -= len(first_columns)
+        return self.row_start + 1 + slot // self.labels_across, slot % self.labels_across + 1
+
+    def slot_at(self, page_index, row, col):
+        """
+        Returns the slot at a sheet position.
+
+        Args:
+            page_index (int): Zero-based page number.
+            row (int): Label row on the sheet (1-based).
+            col (int): Label column on the sheet (1-based).
+
+        Returns:
+            int or None: Zero-based slot, or None if the position is not used on that page.
+        """
+        if not (1 <= row <= self.labels_down and 1 <= col <= self.labels_across):
+            return None
+        if page_index > 0:
+            return (row - 1) * self.labels_across + col - 1
+
+        first_columns, last_columns = self.first_page_columns
+        if row == self.row_start:
+            return col - first_columns.start if col in first_columns else None
+        if not self.row_start < row <= self.last_row:
+            return None
+        if row == self.last_row and col not in last_columns:
+            return None
+        return len(first_columns) + (row - self.row_start - 1) * self.labels_across + col - 1
+
+
+@dataclass(frozen=True)
+class SlotMap:
+    """
+    Page and slot of every label of a job.
+
+    Args:
+        first_page_capacity (int): Labels that fit on the first page.
+        page_capacity (int): Labels that fit on every later page.
+        item_count (int): Data items of the job.
+        copies (int): Copies of each item.
+    """
+
+    first_page_capacity: int
+    page_capacity: int
+    item_count: int
+    copies: int = 1
+
+    @property
+    def total_labels(self):
+        return self.item_count * self.copies
+
+    @property
+    def page_count(self):
+        """Pages of the job; a job always has at least one, possibly empty, page."""
+        remaining = self.total_labels - self.first_page_capacity
+        if remaining <= 0:
+            return 1
+        return 1 + math.ceil(remaining / self.page_capacity)
+
+    def page_start(self, page_index):
+        """Returns the index of the first label on a page."""
+        if page_index < 0:
+            raise IndexError(f"Page {page_index + 1} is not part of the job")
+        if page_index == 0:
+            return 0
+        return self.first_page_capacity + (page_index - 1) * self.page_capacity
+
+    def page_bounds(self, page_index):
+        """
+        Returns the range of labels on a page.
+
+        Args:
+            page_index (int): Zero-based page number.
+
+        Returns:
+            tuple: (start, end) label indices, `end` exclusive. Pages after the last one are
+            empty ranges.
+        """
+        start = self.page_start(page_index)
+        capacity = self.first_page_capacity if page_index == 0 else self.page_capacity
+        return start, max(start, min(start + capacity, self.total_labels))
+
+    def label_at(self, page_index, slot):
+        """Returns the label index in a slot, or None if the slot is empty or off the page."""
+        start, end = self.page_bounds(page_index)
+        index = start + slot
+        return index if 0 <= slot and index < end else None
+
+    def locate(self, page_index, slot):
+        """
+        Returns what is printed in a slot.
+
+        Args:
+            page_index (int): Zero-based page number.
+            slot (int): Zero-based slot on the page.
+
+        Returns:
+            tuple or None: (data item index, copy index), or None if the slot stays empty.
+        """
+        index = self.label_at(page_index, slot)
+        if index is None:
+            return None
+        return divmod(index, self.copies)
+
+    def label_position(self, label_index):
+        """
+        Returns where a label is printed.
+
+        Args:
+            label_index (int): Zero-based label index within the job.
+
+        Returns:
+            tuple: (page index, slot), both zero-based.
+        """
+        if not 0 <= label_index < self.total_labels:
+            raise IndexError(f"Label {label_index} is not part of the job")
+        if label_index < self.first_page_capacity:
+            return 0, label_index
+        page, slot = divmod(label_index - self.first_page_capacity, self.page_capacity)
+        return page + 1, slot
+
+    def pages_for_item(self, item_index):
+        """
+        Returns the pages the copies of a data item are printed on.
+
+        Args:
+            item_index (int): Zero-based data item index.
+
+        Returns:
+            range: Zero-based page indices.
+        """
+        first_page = self.label_position(item_index * self.copies)[0]
+        last_page = self.label_position((item_index + 1) * self.copies - 1)[0]
+        return range(first_page, last_page + 1)
+
+    def page_data(self, data_list, page_index):
+        """
+        Returns the label data of one page, one entry per filled slot.
+
+        Args:
+            data_list (list): Data items of the job.
+            page_index (int): Zero-based page number.
+
+        Returns:
+            list: Label data in slot order.
+        """
+        start, end = self.page_bounds(page_index)
+        copies = self.copies
+        return [data_list[i // copies] for i in range(start, end)]
+
+
+def iter_labels(runs):
+    """
+    Expands (data item, count) runs into the labels of a job, in print order.
+
+    Args:
+        runs (iterable): (data item, count) tuples.
+
+    Yields:
+        The data of each label.
+    """
+    for item, count in runs:
+        yield from repeat(item, count)
+
+
+class LabelRuns:
+    """
+    Labels of a job, stored as (data item, count) runs.
+
+    Args:
+        runs (iterable): (data item, count) tuples in print order. Runs with no copies are
+            dropped.
+    """
+
+    def __init__(self, runs):
+        self.items = []
+        # Exclusive end label index of each run
+        self.ends = []
+        total = 0
+        for item, count in runs:
+            if count > 0:
+                total += count
+                self.items.append(item)
+                self.ends.append(total)
+
+    @property
+    def total_labels(self):
+        return self.ends[-1] if self.ends else 0
+
+    def label_at(self, label_index):
+        """Returns the data of a label."""
+        if not 0 <= label_index < self.total_labels:
+            raise IndexError(f"Label {label_index} is not part of the job")
+        return self.items[bisect_right(self.ends, label_index)]
+
+    def labels(self, start, end):
+        """
+        Returns the data of a range of labels, e.g. the `SlotMap.page_bounds` of a page.
+
+        Args:
+            start (int): First label index.
+            end (int): Label index after the last one.
+
+        Returns:
+            list: Label data, one entry per label.
+        """
+        labels = []
+        run = bisect_right(self.ends, start)
+        end = min(end, self.total_labels)
+        while start < end:
+            count = min(self.ends[run], end) - start
+            labels.extend(repeat(self.items[run], count))
+            start += count
+            run += 1
+        return labels
@@ -0,0 +1,189 @@
+"""
+Streaming .docx writer for very large label jobs.
+
+Instead of appending every page to one python-docx document and saving it at the end, this
+engine writes `word/document.xml` into the output zip incrementally, one page at a time. Every
+other part of the template (styles, theme, fonts, settings, relationships) is copied into the
+zip unchanged, so memory use stays flat no matter how many pages the job has. Jobs with barcodes
+also get the barcode images, added to the document relationships and content types after the
+last page, when it is known which images the pages use.
+"""
+
+import copy
+import io
+import posixpath
+import re
+import zipfile
+from lxml import etree
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import CONTENT_TYPES_URI, PackURI
+from docx.oxml.ns import qn
+from label_format import add_label_styles
+from template_cache import template_cache
+from docx_writer import make_zip_info
+
+XMLNS_PATTERN = re.compile(rb'\s+xmlns(?::[\w.-]+)?="[^"]*"')
+
+RELATIONSHIPS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/content-types"
+EMPTY_RELATIONSHIPS = f'<Relationships xmlns="{RELATIONSHIPS_NAMESPACE}"/>'.encode()
+
+
+def serialize_body_element(element):
+    """
+    Serializes a body element without the namespace declarations it inherits.
+
+    lxml repeats every in-scope namespace on the root tag of a serialized fragment. They are all
+    declared once on the document element already, so they are stripped to keep pages small.
+
+    Args:
+        element (lxml.etree._Element): Element taken from a document body.
+
+    Returns:
+        bytes: The element's XML.
+    """
+    xml = etree.tostring(element)
+    end = xml.index(b">")
+    return XMLNS_PATTERN.sub(b"", xml[:end]) + xml[end:]
+
+
+def split_document_xml(document_element):
+    """
+    Splits a template's document element into the XML written before and after the body content.
+
+    Args:
+        document_element (lxml.etree._Element): The template's `w:document` element.
+
+    Returns:
+        tuple: (head, tail) bytes. `head` ends with the opening `<w:body>` tag and `tail` holds
+        the section properties and the closing tags.
+    """
+    shell = etree.fromstring(etree.tostring(document_element))
+    body = shell.find(qn("w:body"))
+    sectPr = body.find(qn("w:sectPr"))
+    for element in list(body):
+        body.remove(element)
+    marker = etree.Comment("labels")
+    body.append(marker)
+    xml = etree.tostring(shell, xml_declaration=True, encoding="UTF-8", standalone=True)
+    head, _, tail = xml.partition(etree.tostring(marker))
+    if sectPr is not None:
+        tail = serialize_body_element(sectPr) + tail
+    return head, tail
+
+
+def get_label_styles_part(templatepath, spec):
+    """
+    Builds the template's styles part with the compact output label styles added.
+
+    Args:
+        templatepath (str): Path to the label template file.
+        spec (LabelSpec): Preset specification with the font settings.
+
+    Returns:
+        tuple: (zip entry name, styles XML bytes).
+    """
+    template = template_cache.get(templatepath)
+    styles_part = template.skeleton.part.part_related_by(RT.STYLES)
+    styles_element = copy.deepcopy(styles_part.element)
+    add_label_styles(styles_element, spec)
+    xml = etree.tostring(styles_element, xml_declaration=True, encoding="UTF-8", standalone=True)
+    return styles_part.partname.lstrip("/"), xml
+
+
+def add_image_relationships(rels_xml, document_partname, parts):
+    """
+    Adds image relationships to a document's relationships part.
+
+    Args:
+        rels_xml (bytes): The template's relationships part.
+        document_partname (str): Zip entry name of the document part.
+        parts (list): (relationship id, part name, bytes) of each image.
+
+    Returns:
+        bytes: The relationships part.
+    """
+    rels = etree.fromstring(rels_xml)
+    base = posixpath.dirname("/" + document_partname)
+    for relationship_id, partname, _ in parts:
+        etree.SubElement(rels, f"{{{RELATIONSHIPS_NAMESPACE}}}Relationship", {
+            "Id": relationship_id,
+            "Type": RT.IMAGE,
+            "Target": posixpath.relpath(partname, base),
+        })
+    return etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def add_png_content_type(content_types_xml):
+    """Adds the PNG default to a [Content_Types].xml part if it has none."""
+    types = etree.fromstring(content_types_xml)
+    for default in types.iter(f"{{{CONTENT_TYPES_NAMESPACE}}}Default"):
+        if default.get("Extension", "").lower() == "png":
+            return content_types_xml
+    types.insert(0, etree.Element(
+        f"{{{CONTENT_TYPES_NAMESPACE}}}Default", {"Extension": "png", "ContentType": "image/png"}
+    ))
+    return etree.tostring(types, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def write_labels_stream(
+    filepath, templatepath, page_elements, part_overrides=None, compression="default", media=None
+):
+    """
+    Writes formatted label pages straight into a .docx file or binary stream.
+
+    Each page is serialized and released before the next one is produced, so `page_elements`
+    can be a generator of any length.
+
+    Args:
+        filepath (str or file-like): Path of the .docx file to create, or a writable binary
+            stream such as an output sink.
+        templatepath (str): Path to the label template file.
+        page_elements (iterable): Body elements of each page, as returned by
+            `PageAssembler.render_page`.
+        part_overrides (dict, optional): Zip entry name to bytes for template parts that are
+            replaced in the output, such as the styles part of compact output.
+        compression (str): "fast", "default" or "small" (see `docx_writer.make_zip_info`).
+        media (BarcodeMedia, optional): Collects the barcode images of the pages; they are
+            written after the document part.
+    """
+    template = template_cache.get(templatepath)
+    document_partname = template.skeleton.part.partname.lstrip("/")
+    rels_partname = PackURI("/" + document_partname).rels_uri.lstrip("/")
+    content_types_partname = CONTENT_TYPES_URI.lstrip("/")
+    head, tail = split_document_xml(template.skeleton.element)
+    part_overrides = part_overrides or {}
+    # Parts that list the images, written once the pages are done
+    deferred = {}
+
+    with zipfile.ZipFile(io.BytesIO(template.blob)) as source, \
+            zipfile.ZipFile(filepath, "w") as target:
+        for item in source.infolist():
+            if item.filename == document_partname:
+                continue
+            blob = part_overrides.get(item.filename) or source.read(item.filename)
+            if media is not None and item.filename in (rels_partname, content_types_partname):
+                deferred[item.filename] = blob
+                continue
+            target.writestr(make_zip_info(item.filename, compression), blob)
+
+        with target.open(make_zip_info(document_partname, compression), "w") as document_xml:
+            document_xml.write(head)
+            for elements in page_elements:
+                for element in elements:
+                    document_xml.write(serialize_body_element(element))
+            document_xml.write(tail)
+
+        if media is not None:
+            parts = media.parts()
+            for _, partname, png in parts:
+                target.writestr(make_zip_info(partname.lstrip("/"), compression), png)
+            if parts:
+                deferred[rels_partname] = add_image_relationships(
+                    deferred.get(rels_partname, EMPTY_RELATIONSHIPS), document_partname, parts
+                )
+                deferred[content_types_partname] = add_png_content_type(
+                    deferred[content_types_partname]
+                )
+            for name, blob in deferred.items():
+                target.writestr(make_zip_info(name, compression), blob)
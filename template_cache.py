@@ -0,0 +1,164 @@
+"""
+Shared cache of parsed label-sheet templates.
+
+Every label job needs the same template several times: once to work out the table layout and
+once per page of output. Unzipping and parsing a .docx is by far the most expensive part of that,
+so templates are read from disk once, kept in a small LRU cache keyed by path and modification
+time, and handed out as cheap deep copies of the parsed document body. Synthesized templates
+("synth://" paths, see `template_synth`) are built once per geometry and cached the same way.
+"""
+
+import copy
+import io
+import os
+import threading
+from collections import OrderedDict
+from docx import Document
+from docx.document import Document as DocumentProxy
+from template_synth import is_synthetic_path, build_template_blob, get_synthetic_template_key
+
+
+class CachedTemplate:
+    """
+    A parsed label-sheet template held in the cache.
+
+    The skeleton document is treated as read-only. Callers that need to fill labels get a copy
+    through `page_document()` (cheap, body only) or `new_document()` (full package, used once per
+    job as the output document).
+    """
+
+    def __init__(self, path, mtime, blob):
+        self.path = path
+        self.mtime = mtime
+        self.blob = blob
+        self.skeleton = Document(io.BytesIO(blob))
+        self._cell_grid = None
+
+    @property
+    def table(self):
+        """The label table of the skeleton document. Do not modify it."""
+        return self.skeleton.tables[0]
+
+    @property
+    def cell_grid(self):
+        """
+        Flat `w:tc` index for every (row, grid column) of the label table, built on first use.
+
+        See `get_cell_grid`.
+        """
+        if self._cell_grid is None:
+            self._cell_grid = get_cell_grid(self.table._tbl)
+        return self._cell_grid
+
+    def page_document(self):
+        """
+        Returns a document proxy around a deep copy of the skeleton's document element.
+
+        The copy shares the skeleton's package, so it supports `tables`, `add_page_break()` and
+        `element.body`, but it must not be saved. Use it as the source of one page of labels.
+
+        Returns:
+            docx.document.Document: Independent copy of the template body.
+        """
+        element = copy.deepcopy(self.skeleton.element)
+        return DocumentProxy(element, self.skeleton.part)
+
+    def new_document(self):
+        """
+        Returns a full, saveable Document loaded from the cached template bytes.
+
+        Returns:
+            docx.document.Document: New document with its own package.
+        """
+        return Document(io.BytesIO(self.blob))
+
+
+def get_cell_grid(tbl):
+    """
+    Maps every (row, grid column) of a table to the flat index of the `w:tc` that covers it.
+
+    Cells spanning several grid columns appear once per column they cover, so lookups by
+    column index match `table.rows[row].cells[col]`.
+
+    Args:
+        tbl (CT_Tbl): A `w:tbl` element.
+
+    Returns:
+        list: One list per row of flat cell indices, indexed by grid column.
+    """
+    grid = []
+    flat_index = 0
+    for tr in tbl.tr_lst:
+        row = []
+        for tc in tr.tc_lst:
+            row.extend([flat_index] * tc.grid_span)
+            flat_index += 1
+        grid.append(row)
+    return grid
+
+
+class TemplateCache:
+    """
+    LRU cache of parsed templates keyed by (absolute path, modification time).
+
+    Editing a template on disk changes its mtime, so the next lookup reloads it automatically.
+    Synthesized templates are keyed by (path, geometry) instead.
+
+    Args:
+        maxsize (int): Maximum number of templates kept in memory.
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, templatepath):
+        """
+        Returns the cached template for a path, loading or synthesizing it on a miss.
+
+        Args:
+            templatepath (str): Path to the .docx template, or a "synth://" path.
+
+        Returns:
+            CachedTemplate: The parsed template.
+        """
+        if is_synthetic_path(templatepath):
+            path = templatepath
+            key = (path, get_synthetic_template_key(path))
+        else:
+            path = os.path.abspath(templatepath)
+            key = (path, os.path.getmtime(path))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if is_synthetic_path(path):
+            blob = build_template_blob(path)
+        else:
+            with open(path, "rb") as f:
+                blob = f.read()
+        entry = CachedTemplate(path, key[1], blob)
+
+        with self._lock:
+            # Drop stale versions of the same file before inserting the new one
+            for old_key in [k for k in self._entries if k[0] == path]:
+                del self._entries[old_key]
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Removes every template from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+template_cache = TemplateCache()
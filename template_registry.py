@@ -0,0 +1,311 @@
+"""
+Registry of the label-sheet templates in templates/.
+
+Every .docx in the templates folder is read once to extract its table layout: the number of
+table rows and columns, which of them are spacer rows and columns, the label and page size, and
+the flat cell index of every (row, column). The results are stored in a JSON manifest in the user
+cache folder, keyed by the SHA-256 of each template file, so later starts and layout queries read
+the manifest instead of opening the templates. A template is only read again when its contents
+change.
+
+Template files that have no entry in `label_templates` are added to it with the geometry found
+in the file and default font settings, so a new label stock can be added by dropping its template
+into the folder.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import zipfile
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from file_io import resource_path, get_user_cache_folder
+from template_cache import template_cache, get_cell_grid
+from job_cache import hash_file
+from template_synth import TWIPS_PER_INCH, get_twips
+
+MANIFEST_NAME = "template_manifest.json"
+# Bump when the stored geometry changes, so old manifests are rebuilt
+MANIFEST_VERSION = 1
+
+# Settings of discovered templates that cannot be read from the file
+DEFAULT_CHARS_PER_LINE = 45
+DEFAULT_FONT_SIZE = 6
+
+
+def read_template_geometry(templatepath):
+    """
+    Extracts the label layout of a template file.
+
+    Label columns alternate with narrower spacer columns. If the rows alternate the same way,
+    the sheet is a "checkerboard"; otherwise every row holds labels ("LSL stripes").
+
+    Args:
+        templatepath (str): Path to the .docx template.
+
+    Returns:
+        dict or None: The geometry ("rows", "columns", "table_format", "labels_across",
+        "labels_down", "label_width", "label_height", "page_width", "page_height" and
+        "cell_grid"; sizes in inches), or None if the file has no label table of that shape.
+    """
+    with zipfile.ZipFile(templatepath) as source:
+        document = parse_xml(source.read("word/document.xml"))
+    body = document.find(qn("w:body"))
+    tbl = body.find(qn("w:tbl")) if body is not None else None
+    if tbl is None:
+        return None
+
+    column_widths = [
+        get_twips(col) for col in tbl.findall(qn("w:tblGrid") + "/" + qn("w:gridCol"))
+    ]
+    row_heights = [
+        get_twips(tr.find(qn("w:trPr") + "/" + qn("w:trHeight")), "w:val") for tr in tbl.tr_lst
+    ]
+    if not column_widths or not row_heights or len(column_widths) % 2 == 0:
+        return None
+    label_columns = column_widths[0::2]
+    if len(column_widths) > 1 and max(column_widths[1::2]) >= min(label_columns):
+        return None
+
+    label_rows = row_heights[0::2]
+    checkerboard = (
+        len(row_heights) > 1
+        and len(row_heights) % 2 == 1
+        and max(row_heights[1::2]) < min(label_rows)
+    )
+    if not checkerboard:
+        label_rows = row_heights
+
+    sectPr = body.find(qn("w:sectPr"))
+    page_size = sectPr.find(qn("w:pgSz")) if sectPr is not None else None
+    return {
+        "rows": len(row_heights),
+        "columns": len(column_widths),
+        "table_format": "checkerboard" if checkerboard else "LSL stripes",
+        "labels_across": len(label_columns),
+        "labels_down": len(label_rows),
+        "label_width": round(label_columns[0] / TWIPS_PER_INCH, 4),
+        "label_height": round(label_rows[0] / TWIPS_PER_INCH, 4),
+        "page_width": round(get_twips(page_size) / TWIPS_PER_INCH, 4),
+        "page_height": round(get_twips(page_size, "w:h") / TWIPS_PER_INCH, 4),
+        "cell_grid": get_cell_grid(tbl),
+    }
+
+
+def make_template_meta(templatepath, geometry):
+    """
+    Creates a `label_templates` entry for a discovered template.
+
+    Args:
+        templatepath (str): Path to the template file.
+        geometry (dict): Geometry from `read_template_geometry`.
+
+    Returns:
+        dict: The entry.
+    """
+    name = os.path.splitext(os.path.basename(templatepath))[0]
+    width, height = geometry["label_width"], geometry["label_height"]
+    return {
+        "display_name": f"{name} {width:.2f} x {height:.2f}",
+        "template_path": templatepath,
+        "label_width": width,
+        "label_height": height,
+        "labels_across": geometry["labels_across"],
+        "labels_down": geometry["labels_down"],
+        "chars_per_line": DEFAULT_CHARS_PER_LINE,
+        "lines_per_label": max(1, math.floor(height * 72 / DEFAULT_FONT_SIZE)),
+        "default_font_size": DEFAULT_FONT_SIZE,
+        "table_format": geometry["table_format"],
+        "needs_page_break": False,
+    }
+
+
+class TemplateRegistry:
+    """
+    Template geometry of a templates folder, backed by a manifest file.
+
+    The folder is scanned on first use. Entries whose file size and modification time are
+    unchanged are trusted without hashing; others are hashed, and only read if the hash is new.
+
+    Args:
+        folder (str, optional): Templates folder. Defaults to the bundled templates/.
+        manifest_path (str, optional): Manifest file. Defaults to the user cache folder.
+    """
+
+    def __init__(self, folder=None, manifest_path=None):
+        self._folder = folder
+        self._manifest_path = manifest_path
+        self._templates = None
+        self._lock = threading.Lock()
+
+    @property
+    def folder(self):
+        if self._folder is None:
+            self._folder = resource_path("templates")
+        return self._folder
+
+    @property
+    def manifest_path(self):
+        if self._manifest_path is None:
+            self._manifest_path = os.path.join(get_user_cache_folder(), MANIFEST_NAME)
+        return self._manifest_path
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("templates", {})
+
+    def _write_manifest(self, templates):
+        folder = os.path.dirname(self.manifest_path)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "templates": templates}, f)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            # The manifest only saves time; the registry works without it
+            print(f"Warning: could not save the template manifest: {e}")
+
+    def scan(self):
+        """
+        Scans the templates folder and refreshes the manifest.
+
+        Returns:
+            dict: File name to manifest entry ("sha256", "size", "mtime" and "geometry", which is
+            None for files without a label table).
+        """
+        with self._lock:
+            if self._templates is not None:
+                return self._templates
+
+            manifest = self._read_manifest()
+            by_hash = {entry["sha256"]: entry for entry in manifest.values()}
+            templates = {}
+            for filename in sorted(os.listdir(self.folder)):
+                if not filename.lower().endswith(".docx") or filename.startswith("~$"):
+                    continue
+                path = os.path.join(self.folder, filename)
+                stat = os.stat(path)
+                entry = manifest.get(filename)
+                if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                    templates[filename] = entry
+                    continue
+
+                sha256 = hash_file(path)
+                known = by_hash.get(sha256)
+                try:
+                    geometry = known["geometry"] if known else read_template_geometry(path)
+                except (KeyError, zipfile.BadZipFile) as e:
+                    print(f"Warning: skipping template {filename}: {e}")
+                    geometry = None
+                templates[filename] = {
+                    "sha256": sha256,
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "geometry": geometry,
+                }
+
+            if templates != manifest:
+                self._write_manifest(templates)
+            self._templates = templates
+            return templates
+
+    def get_geometry(self, templatepath):
+        """
+        Returns the geometry of a template in the templates folder.
+
+        Args:
+            templatepath (str): Path to the template.
+
+        Returns:
+            dict or None: Geometry from `read_template_geometry`, or None if the path is not a
+            registered template.
+        """
+        if os.path.dirname(os.path.abspath(templatepath)) != os.path.abspath(self.folder):
+            return None
+        entry = self.scan().get(os.path.basename(templatepath))
+        if entry is not None:
+            stat = os.stat(templatepath)
+            if entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                # The file changed since the scan; scan the folder again
+                self.clear()
+                entry = self.scan().get(os.path.basename(templatepath))
+        return entry["geometry"] if entry else None
+
+    def register(self, label_templates):
+        """
+        Adds the discovered templates that have no entry yet to a templates dict.
+
+        Args:
+            label_templates (dict): Template key to entry, updated in place.
+
+        Returns:
+            list: Keys of the added templates.
+        """
+        known_paths = {
+            os.path.basename(meta["template_path"])
+            for meta in label_templates.values()
+            if "template_path" in meta
+        }
+        added = []
+        for filename, entry in self.scan().items():
+            name = os.path.splitext(filename)[0]
+            if entry["geometry"] is None or filename in known_paths or name in label_templates:
+                continue
+            label_templates[name] = make_template_meta(
+                os.path.join(self.folder, filename), entry["geometry"]
+            )
+            added.append(name)
+        return added
+
+    def clear(self):
+        """Forgets the scan, so the next query scans the folder again."""
+        with self._lock:
+            self._templates = None
+
+
+template_registry = TemplateRegistry()
+
+
+def get_table_size(templatepath):
+    """
+    Returns the number of rows and columns of a template's label table.
+
+    Registered templates are answered from the manifest; others are opened.
+
+    Args:
+        templatepath (str): Path to the template, or a "synth://" path.
+
+    Returns:
+        tuple: (rows, columns).
+    """
+    geometry = template_registry.get_geometry(templatepath)
+    if geometry is not None:
+        return geometry["rows"], geometry["columns"]
+    table = template_cache.get(templatepath).table
+    return len(table.rows), len(table.columns)
+
+
+def get_template_cell_grid(templatepath):
+    """
+    Returns the flat `w:tc` index of every (row, grid column) of a template's label table.
+
+    Registered templates are answered from the manifest; others are opened. See `get_cell_grid`.
+
+    Args:
+        templatepath (str): Path to the template, or a "synth://" path.
+
+    Returns:
+        list: One list per row of flat cell indices, indexed by grid column.
+    """
+    geometry = template_registry.get_geometry(templatepath)
+    if geometry is not None:
+        return geometry["cell_grid"]
+    return template_cache.get(templatepath).cell_grid
@@ -0,0 +1,339 @@
+"""
+Label-sheet templates built from their dimensions.
+
+A label stock in `label_templates` without a "template_path" has its Word template synthesized
+in memory: the page size and margins, and a fixed-layout table with one exactly sized cell per
+label and spacer cells for the gaps between them. The table has the same structure as the
+hand-made templates in templates/ (spacer columns between labels, plus spacer rows for
+"checkerboard" sheets), so the rest of the program cannot tell the two apart. Adding a new stock
+is then a dictionary entry:
+
+    "EXAMPLE-1": {
+        "display_name": "Example 1.00 x 0.50",
+        "label_width": 1.0,         # inches
+        "label_height": 0.5,
+        "labels_across": 6,
+        "labels_down": 18,
+        "column_gap": 0.125,        # or "horizontal_pitch": 1.125
+        "row_gap": 0.0,             # or "vertical_pitch"; must be > 0 for "checkerboard"
+        "table_format": "LSL stripes",
+        ...
+    }
+
+Optional fields are "page_width" and "page_height" (default US Letter), "top_margin" and
+"left_margin" (default: the labels are centered on the page) and "cell_padding" (space between
+the label edge and its text). Synthesized templates are addressed by "synth://<stock name>"
+paths and cached by `template_cache` like template files.
+"""
+
+import io
+from dataclasses import dataclass, astuple, replace
+from docx import Document
+from docx.enum.section import WD_SECTION_START
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Twips
+from label_templates import label_templates
+from docx_writer import save_document
+
+SYNTH_PREFIX = "synth://"
+
+TWIPS_PER_INCH = 1440
+# Cell margin of the label table; the table is indented by the same amount so the cell edges,
+# not the text, line up with the page margin (as in the hand-made templates)
+CELL_MARGIN = 15
+
+DEFAULT_PAGE_WIDTH = 8.5
+DEFAULT_PAGE_HEIGHT = 11.0
+DEFAULT_CELL_PADDING = 0.03
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """
+    Geometry of a label sheet, in twips.
+
+    Use `get_sheet_spec` to build one from a `label_templates` entry.
+    """
+
+    page_width: int
+    page_height: int
+    top_margin: int
+    left_margin: int
+    label_width: int
+    label_height: int
+    column_gap: int
+    row_gap: int
+    labels_across: int
+    labels_down: int
+    spacer_rows: bool
+    cell_padding: int
+
+    @property
+    def table_width(self):
+        return self.labels_across * self.label_width + (self.labels_across - 1) * self.column_gap
+
+    @property
+    def table_height(self):
+        return self.labels_down * self.label_height + (self.labels_down - 1) * self.row_gap
+
+
+def to_twips(inches):
+    return round(inches * TWIPS_PER_INCH)
+
+
+def get_twips(element, attribute="w:w", default=0):
+    """Returns a twips attribute of an optional element, or `default` if either is missing."""
+    value = element.get(qn(attribute)) if element is not None else None
+    return int(value) if value else default
+
+
+def is_synthetic_path(templatepath):
+    """Returns whether a template path refers to a synthesized template."""
+    return templatepath.startswith(SYNTH_PREFIX)
+
+
+def get_synthetic_template_path(labeltemplate):
+    """Returns the template path of a synthesized stock, e.g. "synth://EXAMPLE-1"."""
+    return SYNTH_PREFIX + labeltemplate
+
+
+def get_sheet_spec(template_meta):
+    """
+    Reads the sheet geometry of a `label_templates` entry.
+
+    Gaps between labels are taken from "column_gap"/"row_gap", or derived from
+    "horizontal_pitch"/"vertical_pitch" (distance between the left or top edges of neighbouring
+    labels). Margins that are not given center the labels on the page.
+
+    Args:
+        template_meta (dict): Entry of `label_templates`.
+
+    Returns:
+        SheetSpec: The geometry.
+
+    Raises:
+        ValueError: If the labels do not fit on the page, a gap is negative, or the row gap does
+            not match the table format ("checkerboard" needs spacer rows, "LSL stripes" has none).
+    """
+    label_width = template_meta["label_width"]
+    label_height = template_meta["label_height"]
+    column_gap = template_meta.get(
+        "column_gap", template_meta.get("horizontal_pitch", label_width) - label_width
+    )
+    row_gap = template_meta.get(
+        "row_gap", template_meta.get("vertical_pitch", label_height) - label_height
+    )
+    spacer_rows = template_meta["table_format"] == "checkerboard"
+
+    spec = SheetSpec(
+        page_width=to_twips(template_meta.get("page_width", DEFAULT_PAGE_WIDTH)),
+        page_height=to_twips(template_meta.get("page_height", DEFAULT_PAGE_HEIGHT)),
+        top_margin=0,
+        left_margin=0,
+        label_width=to_twips(label_width),
+        label_height=to_twips(label_height),
+        column_gap=to_twips(column_gap),
+        row_gap=to_twips(row_gap),
+        labels_across=template_meta["labels_across"],
+        labels_down=template_meta["labels_down"],
+        spacer_rows=spacer_rows,
+        cell_padding=to_twips(template_meta.get("cell_padding", DEFAULT_CELL_PADDING)),
+    )
+    if spec.column_gap < 0 or spec.row_gap < 0:
+        raise ValueError("Label pitch must not be smaller than the label size")
+    if spacer_rows and spec.row_gap == 0:
+        raise ValueError("'checkerboard' sheets need a row gap; use 'LSL stripes' instead")
+    if not spacer_rows and spec.row_gap != 0:
+        raise ValueError("'LSL stripes' sheets have no row gap; use 'checkerboard' instead")
+
+    top_margin = template_meta.get("top_margin")
+    left_margin = template_meta.get("left_margin")
+    spec = replace(
+        spec,
+        top_margin=(
+            to_twips(top_margin) if top_margin is not None
+            else (spec.page_height - spec.table_height) // 2
+        ),
+        left_margin=(
+            to_twips(left_margin) if left_margin is not None
+            else (spec.page_width - spec.table_width) // 2
+        ),
+    )
+    if (
+        spec.top_margin < 0
+        or spec.left_margin < 0
+        or spec.top_margin + spec.table_height > spec.page_height
+        or spec.left_margin + spec.table_width > spec.page_width
+    ):
+        raise ValueError("The labels do not fit on the page")
+    return spec
+
+
+def make_table_properties():
+    """Returns the `w:tblPr` of a label table: fixed layout, no borders, narrow cell margins."""
+    tblPr = OxmlElement("w:tblPr")
+    tblPr.append(OxmlElement("w:tblStyle", {qn("w:val"): "TableGrid"}))
+    tblPr.append(OxmlElement("w:tblW", {qn("w:w"): "0", qn("w:type"): "auto"}))
+    tblPr.append(OxmlElement("w:tblInd", {qn("w:w"): str(-CELL_MARGIN), qn("w:type"): "dxa"}))
+
+    borders = OxmlElement("w:tblBorders")
+    for side in ("top", "left", "bottom", "right", "insideH", "insideV"):
+        borders.append(OxmlElement(f"w:{side}", {
+            qn("w:val"): "none", qn("w:sz"): "0", qn("w:space"): "0", qn("w:color"): "auto",
+        }))
+    tblPr.append(borders)
+    tblPr.append(OxmlElement("w:tblLayout", {qn("w:type"): "fixed"}))
+
+    cell_margins = OxmlElement("w:tblCellMar")
+    for side in ("left", "right"):
+        cell_margins.append(
+            OxmlElement(f"w:{side}", {qn("w:w"): str(CELL_MARGIN), qn("w:type"): "dxa"})
+        )
+    tblPr.append(cell_margins)
+    tblPr.append(OxmlElement("w:tblLook", {qn("w:val"): "0000"}))
+    return tblPr
+
+
+def make_padded_paragraph(padding, hidden=False):
+    """Returns an empty paragraph indented by `padding` twips on both sides."""
+    p = OxmlElement("w:p")
+    pPr = OxmlElement("w:pPr")
+    pPr.append(OxmlElement("w:ind", {qn("w:left"): str(padding), qn("w:right"): str(padding)}))
+    if hidden:
+        rPr = OxmlElement("w:rPr")
+        rPr.append(OxmlElement("w:vanish"))
+        pPr.append(rPr)
+    p.append(pPr)
+    return p
+
+
+def make_label_table(sheet):
+    """
+    Builds the label table of a sheet.
+
+    Label columns alternate with spacer columns, and for sheets with spacer rows, label rows
+    alternate with spacer rows. Every row has an exact height and cannot split across pages.
+
+    Args:
+        sheet (SheetSpec): The geometry.
+
+    Returns:
+        CT_Tbl: The `w:tbl` element.
+    """
+    column_widths = []
+    for col in range(sheet.labels_across):
+        if col:
+            column_widths.append(sheet.column_gap)
+        column_widths.append(sheet.label_width)
+    row_heights = []
+    for row in range(sheet.labels_down):
+        if row and sheet.spacer_rows:
+            row_heights.append(sheet.row_gap)
+        row_heights.append(sheet.label_height)
+
+    tbl = OxmlElement("w:tbl")
+    tbl.append(make_table_properties())
+    grid = OxmlElement("w:tblGrid")
+    for width in column_widths:
+        grid.append(OxmlElement("w:gridCol", {qn("w:w"): str(width)}))
+    tbl.append(grid)
+
+    for height in row_heights:
+        tr = OxmlElement("w:tr")
+        trPr = OxmlElement("w:trPr")
+        trPr.append(OxmlElement("w:cantSplit"))
+        trPr.append(OxmlElement("w:trHeight", {qn("w:hRule"): "exact", qn("w:val"): str(height)}))
+        tr.append(trPr)
+        for width in column_widths:
+            tc = OxmlElement("w:tc")
+            tcPr = OxmlElement("w:tcPr")
+            tcPr.append(OxmlElement("w:tcW", {qn("w:w"): str(width), qn("w:type"): "dxa"}))
+            tc.append(tcPr)
+            tc.append(make_padded_paragraph(sheet.cell_padding))
+            tr.append(tc)
+        tbl.append(tr)
+    return tbl
+
+
+def build_template_document(sheet):
+    """
+    Builds a label-sheet template document.
+
+    The document starts from python-docx's default template for its styles and theme, with
+    paragraph and font defaults matching the hand-made templates.
+
+    Args:
+        sheet (SheetSpec): The geometry.
+
+    Returns:
+        docx.document.Document: The template document.
+    """
+    document = Document()
+    body = document.element.body
+    for child in list(body):
+        if child.tag != qn("w:sectPr"):
+            body.remove(child)
+
+    section = document.sections[0]
+    section.start_type = WD_SECTION_START.CONTINUOUS
+    section.page_width = Twips(sheet.page_width)
+    section.page_height = Twips(sheet.page_height)
+    section.top_margin = Twips(sheet.top_margin)
+    section.bottom_margin = Twips(0)
+    section.left_margin = Twips(sheet.left_margin + CELL_MARGIN)
+    section.right_margin = Twips(
+        max(0, sheet.page_width - sheet.left_margin - CELL_MARGIN - sheet.table_width)
+    )
+
+    defaults = document.styles.element.find(qn("w:docDefaults"))
+    spacing = defaults.find(f"{qn('w:pPrDefault')}/{qn('w:pPr')}/{qn('w:spacing')}")
+    spacing.set(qn("w:after"), "160")
+    spacing.set(qn("w:line"), "278")
+    run_defaults = defaults.find(f"{qn('w:rPrDefault')}/{qn('w:rPr')}")
+    for tag in ("w:sz", "w:szCs"):
+        run_defaults.find(qn(tag)).set(qn("w:val"), "24")
+
+    # A table cannot be the last body element; the hidden paragraph after it takes no space
+    sectPr = body.find(qn("w:sectPr"))
+    sectPr.addprevious(make_label_table(sheet))
+    sectPr.addprevious(make_padded_paragraph(sheet.cell_padding, hidden=True))
+    return document
+
+
+def get_stock_sheet_spec(templatepath):
+    """Returns the `SheetSpec` of the stock a "synth://<stock name>" path refers to."""
+    return get_sheet_spec(label_templates[templatepath[len(SYNTH_PREFIX):]])
+
+
+def build_template_blob(templatepath):
+    """
+    Synthesizes the template of a label stock and returns it as .docx bytes.
+
+    The bytes depend only on the stock's geometry, so they can be hashed to identify it.
+
+    Args:
+        templatepath (str): "synth://<stock name>" path.
+
+    Returns:
+        bytes: The .docx file contents.
+    """
+    sheet = get_stock_sheet_spec(templatepath)
+    buffer = io.BytesIO()
+    save_document(build_template_document(sheet), buffer, compression="fast")
+    return buffer.getvalue()
+
+
+def get_synthetic_template_key(templatepath):
+    """
+    Returns the geometry of a synthesized template, used as its cache version.
+
+    Editing the stock's entry changes the key, so the template is rebuilt.
+
+    Args:
+        templatepath (str): "synth://<stock name>" path.
+
+    Returns:
+        tuple: The stock's `SheetSpec` fields.
+    """
+    return astuple(get_stock_sheet_spec(templatepath))
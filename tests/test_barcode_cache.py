@@ -0,0 +1,71 @@
+"""
+Regression checks for the barcode cache: codes evicted between or within jobs must not leave
+drawings whose PNG can no longer be found.
+"""
+
+import csv
+import pytest
+import main
+from barcodes import BarcodeCache, barcode_cache
+from label_spec import LabelSpec
+from output_sinks import BytesSink
+
+
+@pytest.fixture
+def small_cache():
+    maxsize = barcode_cache.maxsize
+    barcode_cache.clear()
+    barcode_cache.maxsize = 40
+    yield barcode_cache
+    barcode_cache.maxsize = maxsize
+    barcode_cache.clear()
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "samples.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Proj", "SampleID"])
+        for i in range(100):
+            writer.writerow([f"P{i % 7}", f"S{i:04d}"])
+    return str(path)
+
+
+def make_spec():
+    return LabelSpec(
+        presettype="File", labeltemplate="LCRY-1258", copiesperlabel=1, fontname="Arial",
+        fontsize=6, textboxformatinput="{Proj|code128}\n{SampleID|code128}",
+        date_format="%m/%d/%Y", partialsheet=False,
+    )
+
+
+@pytest.mark.parametrize("engine, workers", [("docx", 1), ("stream", 1), ("docx", 2)])
+def test_repeated_jobs_with_small_cache(small_cache, input_file, engine, workers):
+    results = []
+    for _ in range(2):
+        sink = BytesSink()
+        main.main(make_spec(), input_file_path=input_file, sink=sink, engine=engine,
+                  workers=workers)
+        results.append(sink.result)
+    assert results[0] == results[1]
+    assert len(small_cache._entries) <= small_cache.maxsize
+
+
+def test_page_with_more_codes_than_maxsize(small_cache, input_file):
+    small_cache.maxsize = 3
+    sink = BytesSink()
+    main.main(make_spec(), input_file_path=input_file, sink=sink)
+    assert sink.result
+
+
+def test_image_and_png_are_dropped_together():
+    cache = BarcodeCache(maxsize=2)
+    first = cache.get("code128", "A1", 1.0, 0.5)
+    second = cache.get("code128", "B2", 1.0, 0.5)
+    cache.get("code128", "A1", 1.0, 0.5)
+    cache.get("code128", "C3", 1.0, 0.5)
+    cache.trim()
+    assert cache.png(first.digest)
+    with pytest.raises(KeyError):
+        cache.png(second.digest)
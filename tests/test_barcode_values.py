@@ -0,0 +1,46 @@
+"""
+Barcode values and presets that cannot be printed must fail with a message naming the problem,
+before anything is written.
+"""
+
+import csv
+import pytest
+import main
+from barcodes import get_barcode_modules
+from label_spec import LabelSpec
+from output_sinks import BytesSink
+
+
+def test_code128_value_error_names_value_and_kind():
+    with pytest.raises(ValueError, match=r"'Säule-7' as a code128 barcode"):
+        get_barcode_modules("code128", "Säule-7")
+
+
+@pytest.mark.parametrize("engine, workers", [("docx", 1), ("stream", 1), ("docx", 2)])
+def test_job_with_unencodable_value_writes_nothing(tmp_path, engine, workers):
+    input_file = tmp_path / "samples.csv"
+    with open(input_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["SampleID"])
+        for i in range(300):
+            writer.writerow(["Säule-7" if i == 250 else f"S{i:04d}"])
+    spec = LabelSpec(
+        presettype="File", labeltemplate="LCRY-1258", copiesperlabel=1, fontname="Arial",
+        fontsize=6, textboxformatinput="{SampleID|code128}", date_format="%m/%d/%Y",
+        partialsheet=False,
+    )
+    output = tmp_path / "labels.docx"
+    with pytest.raises(ValueError, match="Säule-7"):
+        main.main(spec, input_file_path=str(input_file), output_file_path=str(output),
+                  engine=engine, workers=workers)
+    assert list(tmp_path.iterdir()) == [input_file]
+
+
+def test_identical_preset_with_barcodes_is_rejected():
+    spec = LabelSpec(
+        presettype="Text", labeltemplate="LCRY-1258", copiesperlabel=3, fontname="Arial",
+        fontsize=6, identical_or_incremental="Identical", textboxformatinput="{ID|qr}",
+        partialsheet=False,
+    )
+    with pytest.raises(ValueError, match=main.BARCODE_IDENTICAL_ERROR):
+        main.main(spec, text_box_input="S0001", sink=BytesSink())
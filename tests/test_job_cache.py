@@ -0,0 +1,124 @@
+"""
+Job keys must change with everything that changes the document, and the job cache must hand
+back the document a real run produced.
+"""
+
+import csv
+import os
+import pytest
+import job_cache
+import main
+from job_cache import JobCache, make_job_key
+from label_spec import LabelSpec
+from layout_plan import get_layout_plan
+from output_sinks import FileSink
+
+
+def write_samples(path, count):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Date"])
+        for i in range(count):
+            writer.writerow([f"S{i:03d}", f"2024-03-{i % 28 + 1:02d}"])
+    return str(path)
+
+
+def make_spec(**fields):
+    values = dict(
+        presettype="File", labeltemplate="LCRY-1700", copiesperlabel=2, fontname="Arial",
+        fontsize=6, textboxformatinput="{ID}\n{Date}", date_format="%m/%d/%Y",
+        partialsheet=False,
+    )
+    values.update(fields)
+    return LabelSpec(**values)
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    return write_samples(tmp_path / "samples.csv", 50)
+
+
+def job_key(spec, input_file, options=None):
+    templatepath = get_layout_plan(spec).templatepath
+    return make_job_key(spec, templatepath, input_file, None, options or {"engine": "docx"})
+
+
+def test_key_ignores_fields_that_do_not_change_the_document(input_file):
+    key = job_key(make_spec(), input_file)
+    assert job_key(make_spec(fontsize="6"), input_file) == key
+    assert job_key(make_spec(outputfilenameprefix="run2_"), input_file) == key
+
+
+@pytest.mark.parametrize("fields", [
+    dict(fontsize=7),
+    dict(copiesperlabel=3),
+    dict(textboxformatinput="{ID}"),
+    dict(date_format="%Y-%m-%d"),
+    dict(labeltemplate="LCRY-1100"),
+])
+def test_key_changes_with_spec(input_file, fields):
+    assert job_key(make_spec(**fields), input_file) != job_key(make_spec(), input_file)
+
+
+def test_key_changes_with_input_options_stock_and_version(tmp_path, input_file, monkeypatch):
+    spec = make_spec()
+    key = job_key(spec, input_file)
+    assert job_key(spec, write_samples(tmp_path / "more.csv", 51)) != key
+    assert job_key(spec, input_file, {"engine": "stream"}) != key
+
+    stock = dict(job_cache.label_templates[spec.labeltemplate])
+    stock["chars_per_line"] = stock.get("chars_per_line", 45) + 1
+    monkeypatch.setitem(job_cache.label_templates, spec.labeltemplate, stock)
+    assert job_key(spec, input_file) != key
+    monkeypatch.undo()
+    assert job_key(spec, input_file) == key
+
+    monkeypatch.setattr(job_cache, "FORMAT_VERSION", job_cache.FORMAT_VERSION + 1)
+    assert job_key(spec, input_file) != key
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_cached_document_matches_rendered_one(tmp_path, input_file):
+    cache = JobCache(str(tmp_path / "cache"))
+    first = main.main(make_spec(), input_file, str(tmp_path / "first.docx"), cache=cache,
+                      sink=FileSink(str(tmp_path / "first.docx")))
+    second = main.main(make_spec(), input_file, str(tmp_path / "second.docx"), cache=cache,
+                       sink=FileSink(str(tmp_path / "second.docx")))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert read_bytes(second) == read_bytes(first)
+
+    uncached = main.main(make_spec(), input_file, str(tmp_path / "uncached.docx"),
+                         sink=FileSink(str(tmp_path / "uncached.docx")))
+    assert read_bytes(uncached) == read_bytes(first)
+
+    main.main(make_spec(fontsize=7), input_file, str(tmp_path / "third.docx"), cache=cache,
+              sink=FileSink(str(tmp_path / "third.docx")))
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.stats["entries"] == 2
+
+
+def test_least_recently_used_documents_are_evicted(tmp_path):
+    documents = {}
+    for name, size in [("a", 400), ("b", 300), ("c", 500)]:
+        documents[name] = tmp_path / f"{name}.docx"
+        documents[name].write_bytes(b"x" * size)
+    cache = JobCache(str(tmp_path / "cache"), max_bytes=1000)
+
+    cache.put("a", str(documents["a"]))
+    cache.put("b", str(documents["b"]))
+    os.utime(cache.get("a"), (2000, 2000))
+    os.utime(cache._entry_path("b"), (1000, 1000))
+    cache.put("c", str(documents["c"]))
+
+    assert cache.get("b") is None
+    assert read_bytes(cache.get("a")) == documents["a"].read_bytes()
+    assert read_bytes(cache.get("c")) == documents["c"].read_bytes()
+    assert cache.stats == {"hits": 3, "misses": 1, "entries": 2, "bytes": 900}
+    assert not [name for name in os.listdir(cache.folder) if name.endswith(".tmp")]
+
+    cache.clear()
+    assert cache.stats == {"hits": 0, "misses": 0, "entries": 0, "bytes": 0}
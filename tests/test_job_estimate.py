@@ -0,0 +1,88 @@
+"""
+Dry-run estimates compared with the documents a real run writes: labels, pages and the fill of
+the first and last page must agree.
+"""
+
+import csv
+import io
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+import main
+from job_estimate import format_job_estimate
+from label_spec import LabelSpec
+from layout_plan import get_layout_plan
+from output_sinks import BytesSink
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    # Rows 0-59 come back as differently written dates of the same days and as exact repeats
+    path = tmp_path / "samples.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Date", "Copies"])
+        for i in range(150):
+            day = i % 60 % 28 + 1
+            date = f"2024-03-{day:02d}" if i < 60 or i % 2 else f"03/{day:02d}/2024"
+            writer.writerow([f"S{i % 60 if i < 120 else i:03d}", date, "" if i % 11 == 0 else i % 3])
+    return str(path)
+
+
+def filled_slots(docx_bytes, layout):
+    """Returns the number of labels printed on each page of a document."""
+    pages = []
+    for page_index, table in enumerate(Document(io.BytesIO(docx_bytes)).tables):
+        cells = list(table._tbl.iter(qn("w:tc")))
+        pages.append(sum(
+            any(t.text for t in cells[i].iter(qn("w:t")))
+            for i in layout.slots_for_page(page_index)
+        ))
+    return pages
+
+
+CASES = [
+    dict(textboxformatinput="{ID}\n{Date}", copiesperlabel=2, date_format="%m/%d/%Y",
+         remove_duplicates=True),
+    dict(textboxformatinput="{ID}\n{Date}", copiesperlabel=2, date_format="%m/%d/%Y"),
+    dict(textboxformatinput="{ID}", copiesperlabel=1, copies_column="Copies",
+         remove_duplicates=True, partialsheet=True, row_start=3, row_end=8, col_start=2,
+         col_end=4),
+    dict(textboxformatinput="{ID}\n{Date}", copiesperlabel=3, date_format="Leave as is",
+         partialsheet=True, row_start=16, row_end=17, col_start=5, col_end=5),
+]
+
+
+@pytest.mark.parametrize("fields", CASES)
+def test_file_estimate_matches_real_run(input_file, fields):
+    spec = LabelSpec(presettype="File", labeltemplate="LCRY-1700", fontname="Arial",
+                     fontsize=6, **{"partialsheet": False, **fields})
+    check_estimate(spec, dict(input_file_path=input_file))
+
+
+@pytest.mark.parametrize("fields, text", [
+    (dict(identical_or_incremental="Identical", copiesperlabel=""), "Tube"),
+    (dict(identical_or_incremental="Identical", copiesperlabel=200, partialsheet=True,
+          row_start=2, row_end=17, col_start=3, col_end=1), "Tube"),
+    (dict(identical_or_incremental="Incremental", copiesperlabel=2, pages_of_labels=3), "AB-0098"),
+])
+def test_text_estimate_matches_real_run(fields, text):
+    spec = LabelSpec(presettype="Text", labeltemplate="LCRY-1700", fontname="Arial",
+                     fontsize=6, **{"partialsheet": False, **fields})
+    check_estimate(spec, dict(text_box_input=text))
+
+
+def check_estimate(spec, job_input):
+    estimate = main.main(spec, dry_run=True, **job_input)
+    sink = BytesSink()
+    main.main(spec, sink=sink, **job_input)
+    layout = get_layout_plan(spec)
+    pages = filled_slots(sink.result, layout)
+
+    assert estimate.label_count == sum(pages)
+    assert estimate.page_count == len(pages)
+    assert estimate.first_page_labels == pages[0]
+    assert estimate.first_page_capacity == len(layout.slots_for_page(0))
+    last_capacity = len(layout.slots_for_page(len(pages) - 1))
+    assert estimate.last_page_empty_slots == last_capacity - pages[-1]
+    assert f"Labels: {estimate.label_count} " in format_job_estimate(estimate)
@@ -0,0 +1,98 @@
+"""
+FileSink must claim a free name up front, only show complete documents under it, give them the
+permissions of a plain `open`, and leave nothing behind when writing fails.
+"""
+
+import os
+import stat
+import sys
+import threading
+import pytest
+import main
+from label_spec import LabelSpec
+from output_sinks import BytesSink, FileSink, reserve_file_path
+
+
+def make_spec():
+    return LabelSpec(
+        presettype="Text", labeltemplate="SIDE-1000", copiesperlabel=2, fontname="Arial",
+        fontsize=6, identical_or_incremental="Incremental", pages_of_labels=2,
+        partialsheet=False,
+    )
+
+
+def test_reserve_suffixes_taken_names(tmp_path):
+    target = tmp_path / "labels.docx"
+    target.write_bytes(b"earlier job")
+    assert reserve_file_path(str(target)) == str(tmp_path / "labels_1.docx")
+    assert reserve_file_path(str(target)) == str(tmp_path / "labels_2.docx")
+    assert target.read_bytes() == b"earlier job"
+    assert (tmp_path / "labels_1.docx").read_bytes() == b""
+
+
+def test_concurrent_reservations_get_distinct_names(tmp_path):
+    target = str(tmp_path / "labels.docx")
+    reserved = []
+    barrier = threading.Barrier(8)
+
+    def reserve():
+        barrier.wait()
+        reserved.append(reserve_file_path(target))
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(reserved)) == 8
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in reserved)
+
+
+def test_job_written_through_file_sink_matches_bytes(tmp_path):
+    (tmp_path / "labels.docx").write_bytes(b"earlier job")
+    in_memory = BytesSink()
+    main.main(make_spec(), text_box_input="AB-0001", sink=in_memory)
+
+    path = main.main(make_spec(), text_box_input="AB-0001",
+                     sink=FileSink(str(tmp_path / "labels.docx")))
+    assert path == str(tmp_path / "labels_1.docx")
+    with open(path, "rb") as f:
+        assert f.read() == in_memory.result
+    assert sorted(os.listdir(tmp_path)) == ["labels.docx", "labels_1.docx"]
+
+
+def test_document_appears_only_when_complete(tmp_path):
+    sink = FileSink(str(tmp_path / "labels.docx"))
+    with sink.open() as f:
+        f.write(b"first half")
+        assert (tmp_path / "labels.docx").read_bytes() == b""
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+        f.write(b", second half")
+    assert (tmp_path / "labels.docx").read_bytes() == b"first half, second half"
+    assert os.listdir(tmp_path) == ["labels.docx"]
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="POSIX permissions")
+def test_document_gets_umask_permissions(tmp_path):
+    old_umask = os.umask(0o027)
+    try:
+        with FileSink(str(tmp_path / "labels.docx")).open() as f:
+            f.write(b"labels")
+        with open(tmp_path / "plain.docx", "wb") as f:
+            f.write(b"labels")
+    finally:
+        os.umask(old_umask)
+    mode = stat.S_IMODE(os.stat(tmp_path / "labels.docx").st_mode)
+    assert mode == stat.S_IMODE(os.stat(tmp_path / "plain.docx").st_mode) == 0o640
+
+
+def test_failed_write_leaves_nothing_behind(tmp_path):
+    (tmp_path / "labels.docx").write_bytes(b"earlier job")
+    sink = FileSink(str(tmp_path / "labels.docx"))
+    with pytest.raises(RuntimeError):
+        with sink.open() as f:
+            f.write(b"partial")
+            raise RuntimeError("renderer failed")
+    assert sink.result is None
+    assert os.listdir(tmp_path) == ["labels.docx"]
+    assert (tmp_path / "labels.docx").read_bytes() == b"earlier job"
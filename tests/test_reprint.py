@@ -0,0 +1,94 @@
+"""
+Reprints compared with the job they come from: a reprinted page must hold exactly what that page
+held in the full document, and reprinted labels what their positions held.
+"""
+
+import csv
+import io
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+import main
+from data_process import parse_reprint_selection
+from label_spec import LabelSpec
+from layout_plan import get_layout_plan
+from output_sinks import BytesSink
+
+
+@pytest.fixture
+def job(tmp_path):
+    input_file = tmp_path / "samples.csv"
+    with open(input_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Site"])
+        for i in range(140):
+            writer.writerow([f"S{i:03d}", f"Rack {i % 9}"])
+    spec = LabelSpec(
+        presettype="File", labeltemplate="LCRY-1700", copiesperlabel=2, fontname="Arial",
+        fontsize=6, textboxformatinput="{ID}\n{Site}", partialsheet=True, row_start=4,
+        row_end=12, col_start=3, col_end=2,
+    )
+    sink = BytesSink()
+    main.main(spec, input_file_path=str(input_file), sink=sink)
+    return spec, str(input_file), page_cells(sink.result)
+
+
+def page_cells(docx_bytes):
+    """Returns the text of every table cell, in document order, for each page."""
+    return [
+        ["".join(t.text or "" for t in tc.iter(qn("w:t"))) for tc in table._tbl.iter(qn("w:tc"))]
+        for table in Document(io.BytesIO(docx_bytes)).tables
+    ]
+
+
+def test_parse_reprint_selection():
+    assert parse_reprint_selection("37, 40-42,37/2/4") == ([37, 40, 41, 42], [(37, 2, 4)])
+    assert parse_reprint_selection(" 3 - 4 , 1 / 2 / 3 ,, ") == ([3, 4], [(1, 2, 3)])
+    assert parse_reprint_selection("") == ([], [])
+
+
+@pytest.mark.parametrize("raw", ["a", "3-", "1/2", "2/3/4/5", "-1"])
+def test_parse_reprint_selection_rejects(raw):
+    with pytest.raises(ValueError, match="Cannot read"):
+        parse_reprint_selection(raw)
+
+
+def test_reprinted_pages_match_full_job(job):
+    spec, input_file, full_pages = job
+    assert len(full_pages) == 4
+    sink = BytesSink()
+    main.reprint(spec, input_file_path=input_file, pages=[4, 1, 3], sink=sink)
+    assert page_cells(sink.result) == [full_pages[3], full_pages[0], full_pages[2]]
+
+
+def test_reprinted_labels_match_their_positions(job):
+    spec, input_file, full_pages = job
+    layout = get_layout_plan(spec)
+    selection = [(1, 4, 3), (1, 12, 2), (2, 1, 1), (3, 17, 5), (4, 2, 4)]
+
+    expected = []
+    for page_number, row, col in selection:
+        slot = layout.sheet_slots.slot_at(page_number - 1, row, col)
+        expected.append(full_pages[page_number - 1][layout.slots_for_page(page_number - 1)[slot]])
+    assert all(expected)
+
+    sink = BytesSink()
+    main.reprint(spec, input_file_path=input_file, slots=selection, sink=sink)
+    reprinted = page_cells(sink.result)
+    assert len(reprinted) == 1
+    first_page_slots = layout.slots_for_page(0)
+    assert [reprinted[0][i] for i in first_page_slots[:len(selection)]] == expected
+    assert not any(reprinted[0][i] for i in first_page_slots[len(selection):])
+
+
+@pytest.mark.parametrize("selection", [
+    dict(pages=[5]),
+    dict(pages=[0]),
+    dict(slots=[(1, 1, 1)]),
+    dict(slots=[(4, 17, 5)]),
+    dict(),
+])
+def test_reprint_rejects_selection_outside_job(job, selection):
+    spec, input_file, _ = job
+    with pytest.raises(ValueError):
+        main.reprint(spec, input_file_path=input_file, sink=BytesSink(), **selection)
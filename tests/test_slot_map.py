@@ -0,0 +1,134 @@
+"""
+Slot arithmetic checked against rendered documents: every label must be in the sheet position
+`SheetSlots` and `SlotMap` (or `LabelRuns`) give for it, including on partial first pages.
+"""
+
+import csv
+import io
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+import main
+from label_spec import LabelSpec
+from layout_plan import get_layout_plan
+from output_sinks import BytesSink
+from slot_map import LabelRuns, SlotMap
+
+PARTIAL_RANGES = [
+    dict(partialsheet=False),
+    dict(partialsheet=True, row_start=3, row_end=9, col_start=4, col_end=2),
+    dict(partialsheet=True, row_start=5, row_end=5, col_start=2, col_end=4),
+    dict(partialsheet=True, row_start=16, row_end=40, col_start=5, col_end=1),
+]
+
+
+def read_sheets(document, layout):
+    """Returns the text of every label position of each page, keyed by (row, column)."""
+    sheets = []
+    for table in document.tables:
+        rows = table._tbl.tr_lst
+        sheets.append({
+            (row, col): "".join(t.text or "" for t in rows[ri].tc_lst[ci].iter(qn("w:t")))
+            for row, ri in enumerate(layout.row_indices, start=1)
+            for col, ci in enumerate(layout.column_indices, start=1)
+        })
+    return sheets
+
+
+def check_sheets(sheets, layout, page_count, label_text_at, total_labels):
+    sheet_slots = layout.sheet_slots
+    assert len(sheets) == page_count
+    placed = 0
+    for page_index, sheet in enumerate(sheets):
+        filled = {}
+        for (row, col), text in sheet.items():
+            slot = sheet_slots.slot_at(page_index, row, col)
+            if slot is None:
+                assert text == ""
+                continue
+            assert sheet_slots.slot_position(page_index, slot) == (row, col)
+            filled[slot] = text
+        for slot, text in filled.items():
+            label_index = layout.page_bounds(page_index)[0] + slot
+            if label_index < total_labels:
+                assert text == label_text_at(label_index, page_index, slot)
+                placed += 1
+            else:
+                assert text == ""
+    assert placed == total_labels
+
+
+@pytest.mark.parametrize("partial", PARTIAL_RANGES)
+def test_incremental_labels_match_slot_map(partial):
+    spec = LabelSpec(
+        presettype="Text", labeltemplate="LCRY-1700", copiesperlabel=2, fontname="Arial",
+        fontsize=6, identical_or_incremental="Incremental", pages_of_labels=3, **partial,
+    )
+    sink = BytesSink()
+    main.main(spec, text_box_input="AB-0001", sink=sink)
+    layout = get_layout_plan(spec)
+    sheets = read_sheets(Document(io.BytesIO(sink.result)), layout)
+
+    labels = sum(1 for sheet in sheets for text in sheet.values() if text)
+    slot_map = layout.slot_map(labels // 2, copies=2)
+
+    def label_text_at(label_index, page_index, slot):
+        assert slot_map.label_position(label_index) == (page_index, slot)
+        item_index, _ = slot_map.locate(page_index, slot)
+        return f"AB-{item_index + 1:04d}"
+
+    check_sheets(sheets, layout, slot_map.page_count, label_text_at, slot_map.total_labels)
+
+
+@pytest.mark.parametrize("partial", PARTIAL_RANGES)
+def test_copies_column_labels_match_label_runs(tmp_path, partial):
+    input_file = tmp_path / "samples.csv"
+    runs = [(f"S{i:03d}", (i * 7) % 5) for i in range(60)]
+    with open(input_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Copies"])
+        writer.writerows(runs)
+    spec = LabelSpec(
+        presettype="File", labeltemplate="LCRY-1700", copiesperlabel=1, fontname="Arial",
+        fontsize=6, textboxformatinput="{ID}", copies_column="Copies", **partial,
+    )
+    sink = BytesSink()
+    main.main(spec, input_file_path=str(input_file), sink=sink)
+    layout = get_layout_plan(spec)
+    sheets = read_sheets(Document(io.BytesIO(sink.result)), layout)
+
+    label_runs = LabelRuns(runs)
+    slot_map = SlotMap(
+        layout.first_page_max_labels, layout.max_labels_per_page, label_runs.total_labels
+    )
+    for page_index in range(slot_map.page_count):
+        start, end = slot_map.page_bounds(page_index)
+        assert label_runs.labels(start, end) == [
+            label_runs.label_at(i) for i in range(start, end)
+        ]
+
+    def label_text_at(label_index, page_index, slot):
+        assert slot_map.label_position(label_index) == (page_index, slot)
+        return label_runs.label_at(label_index)
+
+    check_sheets(sheets, layout, slot_map.page_count, label_text_at, label_runs.total_labels)
+
+
+def test_first_page_capacity_matches_page_jobs():
+    for partial in PARTIAL_RANGES:
+        spec = LabelSpec(
+            presettype="Text", labeltemplate="LCRY-1700", copiesperlabel=1,
+            identical_or_incremental="Identical", **partial,
+        )
+        layout = get_layout_plan(spec)
+        sheet_slots = layout.sheet_slots
+        total = sheet_slots.first_page_capacity + 2 * sheet_slots.page_capacity + 3
+        pages = list(main.iter_page_jobs([("x", total)], layout))
+        slot_map = layout.slot_map(total)
+        assert len(pages) == slot_map.page_count
+        for page_index, (page, slots, _) in enumerate(pages):
+            start, end = slot_map.page_bounds(page_index)
+            assert len(page) == end - start
+            assert len(slots) == (
+                sheet_slots.first_page_capacity if page_index == 0 else sheet_slots.page_capacity
+            )
@@ -45,6 +45,9 @@ Choose how many full pages of serial labels to generate.
 Generates and saves the labels. You’ll choose a location and filename.  
 The default filename chosen when creating the preset will be suggested.
 
+**Estimate Job Size** *(Labels menu)*  
+Counts the labels and pages the current settings would produce, without generating them: the number of labels, the number of pages, how full the first page is, how many labels are left empty on the last page and roughly how long the labels will take to generate. It only reads the input, so it answers in moments even for very large files.
+
 **Footer Bar**  
 The Footer Bar displays helpful information about the currently loaded preset.  
 Depending on the preset type (Text Input or File Input), the footer may include:
@@ -77,6 +80,11 @@ Choose which label sheet template to use for formatting the labels.
 - A comma-separated list (e.g. `1, 2, 3`)  
 This will determine how many labels will be generated for each row of data.
 
+**Copies From Column**  
+Optionally choose a column of your spreadsheet that holds the number of copies of each row (e.g. an "Aliquots" column).  
+Rows with a blank cell get the **Copies Per Label** count, and rows with `0` are skipped.  
+Leave blank to print the same number of copies of every row.
+
 **Date Format**  
 Choose a date format from the dropdown to automatically format any dates found in the spreadsheet.  
 Select **"Leave as is"** to use the date exactly as shown in the Excel/CSV file (without formatting changes).
@@ -123,6 +131,13 @@ You can also slice part of a value using Python-style slicing:
 - To get characters from position 6 onward: `{Sample ID}[6:]`
 - To get the first 4 characters: `{Sample ID}[:4]`
 
+To print a value as a barcode, add the code type after a `|`:
+- `{Sample ID|code128}`: a Code 128 barcode, placed where the placeholder is.
+- `{Sample ID|qr}` or `{Sample ID|datamatrix}`: a QR or DataMatrix code at the left of the label, with the text beside it.
+
+For example, `{Sample ID|qr}{Sample ID}` on the first line and `{Date}` on the second prints a QR code with the ID and date next to it.  
+Barcodes are available for Word output. QR codes need the `segno` package and DataMatrix codes the `ppf-datamatrix` package.
+
 These features allow for flexible formatting of your label text.
 
 **Save Preset Button**
@@ -0,0 +1,151 @@
+"""
+ZPL output for Zebra thermal label printers.
+
+Labels are written as plain ZPL text, one `^XA ... ^XZ` block per label, straight to the output
+file as they are produced, so runs of any length use constant memory. The label size comes from
+the template's `label_width` and `label_height`, and the font size and alignment from the preset.
+Label text is produced by the same formatting code as the Word output.
+"""
+
+import io
+import math
+from label_format import LastValueMemo, get_label_text, get_label_string
+
+DEFAULT_DPI = 203
+
+ZPL_JUSTIFICATION = {
+    "left": "L",
+    "center": "C",
+    "right": "R",
+}
+
+# Characters with a meaning in ZPL field data; they are written as ^FH hex escapes
+ZPL_RESERVED = {"_", "^", "~"}
+
+
+def escape_zpl_text(text):
+    """
+    Escapes label text for a `^FH^FD` field inside a `^FB` field block.
+
+    Reserved characters and non-ASCII characters are written as `_XX` hex escapes of their UTF-8
+    bytes, backslashes are doubled and newlines become `\\&` line breaks.
+
+    Args:
+        text (str): Label text.
+
+    Returns:
+        str: ASCII field data.
+    """
+    parts = []
+    for char in text:
+        if char == "\n":
+            parts.append("\\&")
+        elif char == "\\":
+            parts.append("\\\\")
+        elif char in ZPL_RESERVED or not char.isascii() or not char.isprintable():
+            parts.append("".join(f"_{byte:02X}" for byte in char.encode("utf-8")))
+        else:
+            parts.append(char)
+    return "".join(parts)
+
+
+class ZplLabelFormat:
+    """
+    Pre-computed geometry and font settings of one label in printer dots.
+
+    Args:
+        template_meta (dict): Entry of `label_templates` (label_width, label_height,
+            lines_per_label).
+        fontsize (str or float): Font size in points.
+        alignment (str): "left", "center" or "right" (case-insensitive).
+        dpi (int): Printer resolution in dots per inch.
+    """
+
+    def __init__(self, template_meta, fontsize, alignment, dpi=DEFAULT_DPI):
+        self.width = round(template_meta["label_width"] * dpi)
+        label_height = template_meta.get("label_height", template_meta["label_width"])
+        self.height = round(label_height * dpi)
+        self.margin = max(1, round(dpi / 50))
+        self.font_height = max(10, round(float(fontsize) * dpi / 72))
+        self.justification = ZPL_JUSTIFICATION.get(alignment.lower(), "C")
+
+        lines_that_fit = max(1, math.floor((self.height - 2 * self.margin) / self.font_height))
+        self.max_lines = min(lines_that_fit, template_meta.get("lines_per_label", lines_that_fit))
+
+    def make_block(self, text):
+        """
+        Returns the ZPL block that prints one label.
+
+        Args:
+            text (str): Label text; newlines start a new line.
+
+        Returns:
+            str: The `^XA ... ^XZ` block, ending with a newline.
+        """
+        block_width = self.width - 2 * self.margin
+        return (
+            "^XA\n"
+            "^CI28\n"
+            f"^PW{self.width}\n"
+            f"^LL{self.height}\n"
+            f"^FO{self.margin},{self.margin}"
+            f"^A0N,{self.font_height},{self.font_height}"
+            f"^FB{block_width},{self.max_lines},0,{self.justification},0"
+            f"^FH^FD{escape_zpl_text(text)}^FS\n"
+            "^XZ\n"
+        )
+
+
+def write_zpl(stream, labels, spec, template_meta, dpi=DEFAULT_DPI):
+    """
+    Writes labels to a text stream as ZPL, one block per label.
+
+    Copies of the same data follow each other, so the last block is reused while the data
+    repeats (see `LastValueMemo`).
+
+    Args:
+        stream (io.TextIOBase): Writable text stream.
+        labels (iterable): Label data in print order, as produced for the Word output.
+        spec (LabelSpec): Preset specification.
+        template_meta (dict): Entry of `label_templates` for the preset's template.
+        dpi (int): Printer resolution in dots per inch.
+
+    Returns:
+        int: Number of labels written.
+    """
+    label_format = ZplLabelFormat(template_meta, spec.fontsize, spec.alignment, dpi)
+
+    def make_block(data):
+        text = get_label_text(
+            data, spec.textboxformatinput, spec.date_format, spec.identical_or_incremental
+        )
+        return label_format.make_block(get_label_string(text))
+
+    memo = LastValueMemo()
+    count = 0
+    for data in labels:
+        stream.write(memo.get(data, make_block))
+        count += 1
+    return count
+
+
+def write_zpl_binary(stream, labels, spec, template_meta, dpi=DEFAULT_DPI):
+    """
+    Writes labels as ZPL to a binary stream, such as an output sink (see `write_zpl`).
+
+    Args:
+        stream (file-like): Writable binary stream. It is left open.
+        labels (iterable): Label data in print order.
+        spec (LabelSpec): Preset specification.
+        template_meta (dict): Entry of `label_templates` for the preset's template.
+        dpi (int): Printer resolution in dots per inch.
+
+    Returns:
+        int: Number of labels written.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="ascii", newline="\n")
+    try:
+        return write_zpl(text_stream, labels, spec, template_meta, dpi)
+    finally:
+        text_stream.flush()
+        text_stream.detach()